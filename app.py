@@ -1,17 +1,43 @@
-from flask import Flask, render_template, request, redirect, url_for, jsonify, make_response
+from flask import Flask, Response, abort, render_template, request, redirect, url_for, jsonify, make_response, session
 from pymongo import MongoClient
+from pymongo.errors import DuplicateKeyError, PyMongoError
 from datetime import datetime, timedelta
-from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity
 from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.middleware.proxy_fix import ProxyFix
 from bson.objectid import ObjectId
+from bson.errors import InvalidId
 import re
 import os
+import json
+import uuid
 from dotenv import load_dotenv
-from flask_jwt_extended import JWTManager, create_access_token, create_refresh_token, jwt_required, get_jwt_identity, verify_jwt_in_request
-from redis_service import save_refresh_token, get_refresh_token, delete_refresh_token
-import bcrypt
-import functools
-from flask_wtf.csrf import CSRFProtect
+from flask_jwt_extended import JWTManager, create_access_token, create_refresh_token, jwt_required, get_jwt_identity, \
+    get_jwt, decode_token
+from redis_service import redis_client, consume_rate_limits, create_session, rotate_session, revoke_session, \
+    revoke_all_sessions, list_sessions, claim_legacy_refresh_token, reset_rate_limit, SESSION_ROTATED
+from availability import get_available_times, slot_duration, in_blackout, AVAILABILITY_DAYS
+from machine_status import get_machine_statuses
+from reservations import get_user_reservations, create_reservation, decode_cursor, serialize_reservation, \
+    create_reservations, cancel_reservations, unclaimed_filter, expand_weekly, derive_status, BATCH_MAX_RESERVATIONS, \
+    RECURRENCE_MAX_WEEKS
+from schema import ensure_indexes
+from redis.exceptions import RedisError
+import occupancy
+from catalog import get_campuses, get_laundries, get_laundry, campus_exists, default_campus_id, start_invalidation_listener, catalog_stats, \
+    CAMPUS_COOKIE, CAMPUS_COOKIE_MAX_AGE
+from status_stream import CampusStatusHub, publish_status_change, serialize_status, STREAM_RETRY_MS
+from usage_stats import record_usage, usage_heatmap
+from grid_cache import get_available_times_fragment, bump_version, page_etag, versions_etag, grid_cache_stats
+from notifications import schedule_reminders, cancel_reminders, register_device_token, unregister_device_token, \
+    reminder_queue_stats
+from waitlist import join_waitlist, leave_waitlist, get_user_waitlist, serialize_waitlist_entry, promote_waiters, \
+    leave_overlapping, slot_holders, WAITLIST_MAX_PER_USER
+import metrics
+from metrics import MongoCommandTimer, instrument_redis
+from auth import authenticate_request, get_current_user_id, login_required, unauthorized
+from passwords import hash_password, check_password, PasswordHasherBusy
+import math
+from flask_wtf.csrf import CSRFProtect, generate_csrf
 
 
 # 환경 변수 로드
@@ -20,11 +46,21 @@ load_dotenv()
 app = Flask(__name__)
 app.secret_key = os.getenv("SECRET_KEY", "default_secret_key")
 
+# 앞단 프록시 뒤에서 실행할 때 X-Forwarded-For의 클라이언트 IP 사용 (IP별 로그인 횟수 제한용)
+# TRUSTED_PROXIES: 앞에 있는 프록시 수 (0이면 헤더를 믿지 않음)
+TRUSTED_PROXIES = int(os.getenv("TRUSTED_PROXIES", 0))
+if TRUSTED_PROXIES:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXIES, x_proto=TRUSTED_PROXIES)
+
+# 요청별 계측 (다른 before_request 훅보다 먼저 등록)
+metrics.init_app(app)
+instrument_redis(redis_client)
+
 # CSRF 보호 설정
 csrf = CSRFProtect(app)
 
 # JWT 설정
-app.config["JWT_SECRET_KEY"] = os.getenv("JWT_SECRET_KEY")
+app.config["JWT_SECRET_KEY"] = os.getenv("JWT_SECRET_KEY", "your-secret-key")  # 운영 환경에서는 반드시 환경 변수로 설정
 app.config["JWT_ACCESS_TOKEN_EXPIRES"] = timedelta(seconds=int(os.getenv("ACCESS_TOKEN_EXPIRES", 1800)))
 app.config["JWT_REFRESH_TOKEN_EXPIRES"] = timedelta(seconds=int(os.getenv("REFRESH_TOKEN_EXPIRES", 1209600)))
 app.config["JWT_TOKEN_LOCATION"] = ["headers", "cookies"]
@@ -37,269 +73,642 @@ jwt = JWTManager(app)
 # MongoDB 연결 - 도커 컴포즈 환경에 맞게 수정
 # docker-compose.yml에서 설정한 MONGO_URI 환경 변수 사용
 mongo_uri = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
-client = MongoClient(mongo_uri)
-db = client["jungdry"]
 
-# JWT 설정
-app.config['JWT_SECRET_KEY'] = 'your-secret-key'  # 비밀키 (안전하게 관리해야 함)
-app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=1)  # 토큰 만료 시간 1시간
-jwt = JWTManager(app)
 
-# JWT가 필요한 엔드포인트용 데코레이터
-def jwt_login_required(f):
-    @functools.wraps(f)  # 원본 함수의 메타데이터 유지
-    def decorated_function(*args, **kwargs):
-        try:
-            # JWT 토큰 검증 시도
-            verify_jwt_in_request()
-            # JWT에서 사용자 ID 가져오기
-            current_user_id = get_jwt_identity()
-            return f(current_user_id, *args, **kwargs)
-        except:
-            # JWT 검증 실패 시 로그인 페이지로 리디렉션
-            return redirect(url_for("login"))
+# MongoDB 클라이언트 생성 (MongoClient는 fork 이후 재사용하면 안 되므로 워커마다 새로 생성)
+def create_mongo_client():
+    return MongoClient(
+        mongo_uri,
+        maxPoolSize=int(os.getenv("MONGO_MAX_POOL_SIZE", 32)),
+        minPoolSize=int(os.getenv("MONGO_MIN_POOL_SIZE", 2)),
+        waitQueueTimeoutMS=int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", 2000)),
+        serverSelectionTimeoutMS=int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", 3000)),
+        connectTimeoutMS=int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", 2000)),
+        socketTimeoutMS=int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", 5000)),
+        event_listeners=[MongoCommandTimer()],
+    )
+
+
+client = create_mongo_client()
+db = client[os.getenv("MONGO_DB", "jungdry")]
+
+# 인덱스 생성 (이미 있으면 무시, 기존 중복 데이터로 유니크 인덱스를 만들지 못하면 중복 값을 출력하고 계속 실행)
+ensure_indexes(db)
 
-    return decorated_function
+# 종료 중 여부 (readiness 체크가 503을 반환해 로드밸런서가 트래픽을 빼도록 함)
+draining = False
 
 
-# 하나의 통합된 방식으로 인증 처리
+# 워커 프로세스 초기화
+# gunicorn preload_app 사용 시 fork 이후 post_fork 훅에서 호출 (fork 전에 만든 클라이언트/스레드는 사용할 수 없음)
+def init_worker():
+    global client, db
+    client = create_mongo_client()
+    db = client[os.getenv("MONGO_DB", "jungdry")]
+    redis_client.connection_pool.reset()
+    start_invalidation_listener()
+
+
+# 종료 시작: readiness 실패 처리 + 열린 SSE 연결 종료 (진행 중인 요청은 끝까지 처리)
+def start_draining():
+    global draining
+    draining = True
+    status_hub.close()
+
+
+# 기기 목록 캐시 무효화 알림 수신
+start_invalidation_listener()
+
+# Redis 예약 점유 비트맵 재구성 (실패하면 MongoDB로 조회)
+try:
+    occupancy.rebuild_occupancy(db)
+except RedisError as e:
+    print(f"예약 점유 비트맵 재구성 실패: {e}")
+
+# 하나의 통합된 방식으로 인증 처리 (요청당 토큰 검증 1회, 결과는 g에 저장)
 @app.before_request
 def authenticate():
-    # 공개 라우트는 제외
-    if request.endpoint in ['login', 'register', 'static']:
+    if request.endpoint == 'static':
         return
 
-    # JWT 토큰 검증
-    try:
-        verify_jwt_in_request()
-    except:
-        return redirect(url_for('login'))
+    authenticate_request()
+
+    # 공개 라우트는 제외 (리프레시 엔드포인트는 리프레시 토큰을 따로 검증)
+    if request.endpoint in ['home', 'login', 'register', 'logout', 'refresh',
+                            'prometheus_metrics', 'healthz', 'readyz']:
+        return
+
+    if get_current_user_id() is None:
+        return unauthorized()
 
 
 @app.route("/")
 def home():
-    # JWT 토큰이 있는지 확인 (로그인 상태 확인)
-    try:
-        verify_jwt_in_request(optional=True)
-        current_user = get_jwt_identity()
-        if current_user:
-            # 로그인된 경우 인덱스 페이지로
-            return redirect(url_for("index"))
-    except:
-        pass
+    # 로그인 상태 확인 (before_request에서 검증한 결과 사용)
+    if get_current_user_id():
+        # 로그인된 경우 인덱스 페이지로
+        return redirect(url_for("index"))
 
     # 로그인되지 않은 경우 로그인 페이지로
     return redirect(url_for("login"))
 
 
+# 캠퍼스 ID 문자열 → ObjectId (없는 캠퍼스면 None)
+def parse_campus_id(value):
+    if value and ObjectId.is_valid(value) and campus_exists(db, ObjectId(value)):
+        return ObjectId(value)
+    return None
+
+
+# 현재 캠퍼스: ?campus= → 마지막으로 고른 캠퍼스(쿠키) → 기본 캠퍼스
+def current_campus_id():
+    return (parse_campus_id(request.args.get("campus"))
+            or parse_campus_id(request.cookies.get(CAMPUS_COOKIE))
+            or default_campus_id(db))
+
+
+# /index: 현재 캠퍼스 대시보드, /campus/<campus_id>: 캠퍼스를 골라서 보고 쿠키에 기억
 @app.route("/index")
-@jwt_required()
-def index():
-    # 현재 사용자 ID 가져오기
-    current_user_id = get_jwt_identity()
+@app.route("/campus/<campus_id>")
+@login_required
+def index(campus_id=None):
+    if campus_id is not None:
+        campus_id = parse_campus_id(campus_id)
+        if campus_id is None:
+            abort(404)
+    selected = campus_id
+    campus_id = campus_id or current_campus_id()
+
+    # 캠퍼스의 세탁기와 건조기 상태를 한 번에 계산
+    laundries = compute_machine_statuses(campus_id)
+
+    response = make_response(render_template("index.html", laundries=laundries, campus_id=campus_id,
+                                             campuses=get_campuses(db)))
+    if selected is not None:
+        response.set_cookie(CAMPUS_COOKIE, str(selected), max_age=CAMPUS_COOKIE_MAX_AGE, httponly=True)
+    return response
 
-    # 모든 세탁기와 건조기 정보 가져오기
-    laundries = list(db.laundry.find())
 
-    # 현재 시간
-    now = datetime.now()
+# 캠퍼스 기기 상태 계산 (다른 캠퍼스 기기 수와 상관없음)
+# Redis 비트맵 우선 (파이프라인 1회), 준비되지 않았으면 MongoDB (기기 수와 상관없이 쿼리 1회)
+def compute_machine_statuses(campus_id):
+    if campus_id is None:
+        return []
+    laundries = get_laundries(db, campus_id)
+    if occupancy.get_machine_statuses(laundries) is None:
+        get_machine_statuses(db, campus_id, laundries)
+    return laundries
+
+
+status_hub = CampusStatusHub(compute_machine_statuses)
+
+
+# 기기 상태 실시간 스트림 (SSE, ?campus=) - 처음에 캠퍼스 전체 상태, 이후 바뀐 기기만 전송
+@app.route("/api/status/stream")
+@login_required
+def machine_status_stream():
+    campus_id = current_campus_id()
+    if campus_id is None:
+        return api_error("캠퍼스가 없습니다.", 404)
+    # 워커의 스트림 수가 가득 차면 스레드를 더 잡지 않고 503 (페이지는 JSON API 폴링으로 전환)
+    if not status_hub.accepting():
+        return Response(f"retry: {STREAM_RETRY_MS}\n\n", status=503, mimetype="text/event-stream",
+                        headers={"Retry-After": str(STREAM_RETRY_MS // 1000), "Cache-Control": "no-cache"})
+    return Response(
+        status_hub.get(campus_id).stream(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
-    # 각 기기의 사용 가능 여부 확인
-    for laundry in laundries:
-        # 현재 시간으로부터 기기 사용 시간 이내에 예약이 있는지 확인
-        duration_hours = 2 if laundry.get("type") == "dryer" else 1
-        end_time = now + timedelta(hours=duration_hours)
 
-        # 해당 기기에 대한 현재 활성화된 예약이 있는지 확인
-        reservation = db.use.find_one({
-            "laundry_id": laundry["_id"],
-            "$or": [
-                # 현재 진행 중인 예약
-                {"start_time": {"$lte": now}, "end_time": {"$gte": now}},
-                # 현재부터 사용 시간 이내에 시작하는 예약
-                {"start_time": {"$gt": now, "$lt": end_time}}
-            ]
-        })
+# 예약 페이지 렌더링 (시간표는 Redis 조각 캐시 사용)
+# 시간표 버전이 같으면 ETag가 같으므로 브라우저가 다시 보면 304
+# waitlist_start: 이미 예약된 시간이면 그 시간으로 대기 등록 버튼 표시
+def render_reserve(laundry, error=None, status=200, waitlist_start=None):
+    # CSRF 세션 토큰이 먼저 있어야 ETag가 렌더링 전후로 같음
+    generate_csrf()
+    tag, available_times_json = reserve_grid(laundry)
+    etag = page_etag(tag, get_current_user_id(), session.get("csrf_token")) if tag and not error else None
+    if etag and request.if_none_match.contains_weak(etag):
+        response = make_response("", 304)
+    else:
+        response = make_response(render_template("reserve.html", laundry=laundry, error=error,
+                                                 available_times_json=available_times_json,
+                                                 waitlist_start=waitlist_start), status)
+    if etag:
+        response.set_etag(etag, weak=True)
+        response.headers["Cache-Control"] = "private, no-cache"
+    return response
 
-        # 예약이 없으면 사용 가능(0), 있으면 사용 불가(1)
-        laundry["status"] = 1 if reservation else 0
 
-    return render_template("index.html", laundries=laundries)
+# 예약 가능한 시간 (Redis 비트맵 우선, 없으면 MongoDB 쿼리 1회) → (캐시 버전, 캐시된 JSON 조각)
+def reserve_grid(laundry):
+    def compute():
+        available_times = occupancy.get_available_times(laundry)
+        if available_times is None:
+            available_times = get_available_times(db, laundry)
+        return available_times
 
+    return get_available_times_fragment(laundry, compute)
 
-@app.route("/reserve/<laundry_id>", methods=["GET", "POST"])
-@jwt_required()
-def reserve(laundry_id):
-    current_user_id = get_jwt_identity()
-    laundry = db.laundry.find_one({"_id": ObjectId(laundry_id)})
 
-    if request.method == "POST":
-        # 예약 날짜와 시간 가져오기
-        reserve_date = request.form.get("reserve_date")
-        reserve_time = request.form.get("reserve_time")
+# JSON API 응답: 압축 JSON + 강한 ETag + Cache-Control
+# 브라우저가 매번 If-None-Match로 확인하고, 바뀌지 않았으면 본문 없이 304
+# 기기 상태 / 예약 가능 시간은 버전 기반 ETag를 먼저 계산해서 조회 전에 304 (나머지는 본문 해시)
+API_CACHE_CONTROL = "private, no-cache"
+API_MAX_DAYS = 14
 
-        # 시작 시간 생성
-        start_time = datetime.strptime(f"{reserve_date} {reserve_time}", "%Y-%m-%d %H:%M")
 
-        # 종료 시간 (세탁기: 1시간, 건조기: 2시간)
-        duration_hours = 2 if laundry.get("type") == "dryer" else 1
-        end_time = start_time + timedelta(hours=duration_hours)
+def api_response(response, etag=None):
+    response.headers["Cache-Control"] = API_CACHE_CONTROL
+    if etag:
+        response.set_etag(etag)
+    else:
+        response.add_etag()
+    return response.make_conditional(request)
 
-        # 0시~6시 사이의 예약은 거부
-        if start_time.hour < 6 and start_time.hour >= 0:
-            return render_template("reserve.html", laundry=laundry, error="오전 0시부터 6시까지는 예약할 수 없습니다.")
-
-        # 예약 잠금 문서 생성
-        lock_id = f"{laundry_id}_{start_time.isoformat()}"
-
-        # findAndModify를 사용하여 원자적으로 예약 생성 시도
-        result = db.reservation_locks.find_one_and_update(
-            {
-                "_id": lock_id,
-                "reserved": {"$ne": True}  # 아직 예약되지 않은 경우에만
-            },
-            {
-                "$set": {
-                    "reserved": True,
-                    "user_id": ObjectId(current_user_id),
-                    "timestamp": datetime.now()
-                }
-            },
-            upsert=True,
-            return_document=True
-        )
-
-        # 다른 사용자가 이미 예약한 경우
-        if result.get("user_id") != ObjectId(current_user_id):
-            return render_template("reserve.html", laundry=laundry, error="이미 예약된 시간입니다.")
-
-        # 시간 충돌 확인
-        existing_reservation = db.use.find_one({
-            "laundry_id": ObjectId(laundry_id),
-            "$or": [
-                # 새 예약 시간이 기존 예약 시간과 겹치는 경우
-                {"start_time": {"$lt": end_time}, "end_time": {"$gt": start_time}}
-            ]
-        })
-
-        if existing_reservation:
-            # 잠금 해제
-            db.reservation_locks.delete_one({"_id": lock_id})
-            return render_template("reserve.html", laundry=laundry, error="이미 예약된 시간입니다.")
-
-        # 새 예약 생성
-        new_reservation = {
-            "laundry_id": ObjectId(laundry_id),
-            "user_id": ObjectId(current_user_id),
-            "status": "reserved",
-            "start_time": start_time,
-            "end_time": end_time,
-            "created_at": datetime.now()
-        }
 
-        db.use.insert_one(new_reservation)
-        return redirect(url_for("index"))
+# 본문을 만들기 전에 검증값이 같으면 304 응답 (아니면 None)
+def api_not_modified(etag):
+    if not etag or not request.if_none_match.contains(etag):
+        return None
+    response = app.response_class(status=304)
+    response.headers["Cache-Control"] = API_CACHE_CONTROL
+    response.set_etag(etag)
+    return response
 
-    # 예약 가능한 시간 확인
-    available_times = get_available_times(laundry_id)
 
-    return render_template("reserve.html", laundry=laundry, available_times=available_times)
+def api_error(message, status):
+    return jsonify({"msg": message}), status
 
 
-def get_available_times(laundry_id):
-    # 세탁기/건조기 정보 가져오기
-    laundry = db.laundry.find_one({"_id": ObjectId(laundry_id)})
+# URL의 기기 id → 기기 (잘못된 id이거나 없는 기기면 404, /api/ 경로는 JSON 오류 응답)
+def get_laundry_or_404(laundry_id):
+    try:
+        laundry = get_laundry(db, ObjectId(laundry_id))
+    except InvalidId:
+        laundry = None
+    if laundry is None:
+        if request.path.startswith("/api/"):
+            abort(make_response(api_error("기기를 찾을 수 없습니다.", 404)))
+        abort(404)
+    return laundry
+
+
+# 캠퍼스 목록
+@app.route("/api/campuses")
+@login_required
+def api_campuses():
+    return api_response(jsonify({
+        "campuses": [{"id": str(campus["_id"]), "email": campus.get("email")} for campus in get_campuses(db)],
+    }))
+
+
+# 캠퍼스 기기 상태 (대시보드 폴링용) - /api/laundries는 현재 캠퍼스
+@app.route("/api/laundries")
+@app.route("/api/campuses/<campus_id>/laundries")
+@login_required
+def api_laundries(campus_id=None):
+    if campus_id is not None:
+        campus_id = parse_campus_id(campus_id)
+        if campus_id is None:
+            return api_error("캠퍼스를 찾을 수 없습니다.", 404)
+    campus_id = campus_id or current_campus_id()
+    etag = versions_etag("laundries", [laundry["_id"] for laundry in get_laundries(db, campus_id)], campus_id) \
+        if campus_id else None
+    not_modified = api_not_modified(etag)
+    if not_modified:
+        return not_modified
+
+    laundries = compute_machine_statuses(campus_id)
+    return api_response(jsonify({
+        "campus_id": str(campus_id),
+        "laundries": [{**serialize_status(laundry), "type": laundry["type"], "no": laundry["id"]}
+                      for laundry in laundries],
+    }), etag)
+
+
+# 기기 한 대의 예약 가능 시간 (?from=YYYY-MM-DD&days=N)
+# 기본 범위(오늘부터 7일)는 예약 페이지와 같은 시간표 캐시 조각을 그대로 사용
+@app.route("/api/laundries/<laundry_id>/availability")
+@login_required
+def api_laundry_availability(laundry_id):
+    laundry = get_laundry_or_404(laundry_id)
 
-    # 현재 날짜부터 7일간의 예약 가능 시간 생성
-    available_times = {}
     now = datetime.now()
+    today = now.date()
+    try:
+        start = datetime.strptime(request.args["from"], "%Y-%m-%d").date() if "from" in request.args else today
+        days = int(request.args.get("days", AVAILABILITY_DAYS))
+    except ValueError:
+        return api_error("from=YYYY-MM-DD, days=정수 형식이어야 합니다.", 400)
+    if start < today or start > today + timedelta(days=API_MAX_DAYS) or not 1 <= days <= API_MAX_DAYS:
+        return api_error(f"오늘부터 {API_MAX_DAYS}일 이내만 조회할 수 있습니다.", 400)
+
+    etag = versions_etag("availability", [laundry["_id"]], laundry_id, start, days, now=now)
+    not_modified = api_not_modified(etag)
+    if not_modified:
+        return not_modified
+
+    if start == today and days == AVAILABILITY_DAYS:
+        _, times_json = reserve_grid(laundry)
+    else:
+        window_now = max(now, datetime.combine(start, datetime.min.time()))
+        times_json = json.dumps(get_available_times(db, laundry, now=window_now, days=days), separators=(",", ":"))
+
+    body = f'{{"id":{json.dumps(laundry_id)},"from":"{start.isoformat()}","days":{days},"times":{times_json}}}'
+    return api_response(app.response_class(body, mimetype="application/json"), etag)
+
+
+# 사용률 히트맵 (?campus=&from=YYYY-MM-DD&to=YYYY-MM-DD&by=weekday|day|laundry)
+# 기본: 최근 30일, 요일 × 시간 / 기기 × 날짜 집계 문서만 읽음
+STATS_MAX_DAYS = 366
+
+
+@app.route("/api/stats")
+@login_required
+def api_stats():
+    campus_id = current_campus_id()
+    if campus_id is None:
+        return api_error("캠퍼스가 없습니다.", 404)
+
+    today = datetime.combine(datetime.now().date(), datetime.min.time())
+    by = request.args.get("by", "weekday")
+    try:
+        end = datetime.strptime(request.args["to"], "%Y-%m-%d") if "to" in request.args else today + timedelta(days=1)
+        start = datetime.strptime(request.args["from"], "%Y-%m-%d") if "from" in request.args else end - timedelta(days=30)
+    except ValueError:
+        return api_error("from/to=YYYY-MM-DD 형식이어야 합니다.", 400)
+    if by not in ("weekday", "day", "laundry") or not 0 < (end - start).days <= STATS_MAX_DAYS:
+        return api_error(f"by=weekday|day|laundry, 기간은 1~{STATS_MAX_DAYS}일이어야 합니다.", 400)
+
+    laundries = get_laundries(db, campus_id)
+    heatmap = usage_heatmap(db, campus_id, start, end, [laundry["_id"] for laundry in laundries], by)
+    return api_response(jsonify({
+        "campus_id": str(campus_id),
+        "from": start.strftime("%Y-%m-%d"),
+        "to": end.strftime("%Y-%m-%d"),
+        "by": by,
+        "heatmap": heatmap,
+    }))
+
+
+# 내 대기 목록 (대기열 순번 / 대기 인원) - 차례가 되어 예약된 항목은 /api/me/reservations에 나타남
+@app.route("/api/me/waitlist")
+@login_required
+def api_my_waitlist():
+    try:
+        waitlist = get_user_waitlist(get_current_user_id())
+    except RedisError:
+        return api_error("대기 목록을 불러올 수 없습니다.", 503)
+    return api_response(jsonify({"waitlist": [serialize_waitlist_entry(entry) for entry in waitlist]}))
+
+
+# 알림 받을 기기 등록 / 해제 - {"token": "FCM 등록 토큰"}
+@app.route("/api/me/devices", methods=["POST", "DELETE"])
+@login_required
+def api_my_devices():
+    token = (request.get_json(silent=True) or {}).get("token")
+    if not isinstance(token, str) or not token or len(token) > 4096:
+        return api_error("기기 토큰이 필요합니다.", 400)
+    user_id = ObjectId(get_current_user_id())
+    if request.method == "POST":
+        register_device_token(db, user_id, token)
+    else:
+        unregister_device_token(db, user_id, token)
+    return jsonify({"msg": "ok"})
+
+
+# 내 예약 목록 (?before=커서 로 지난 예약 다음 페이지)
+@app.route("/api/me/reservations")
+@login_required
+def api_my_reservations():
+    cursor = decode_cursor(request.args.get("before"))
+    reservations, next_cursor = get_user_reservations(db, ObjectId(get_current_user_id()), datetime.now(), cursor)
+    return api_response(jsonify({
+        "reservations": [serialize_reservation(reservation) for reservation in reservations],
+        "next": next_cursor,
+    }))
+
+
+# 사용률 집계 반영 (실패해도 예약/취소는 그대로 진행, 집계는 usage_stats.py --rebuild로 복구)
+def record_usage_safely(reservation, sign):
+    try:
+        record_usage(db, reservation, sign)
+    except PyMongoError as e:
+        print(f"사용률 집계 반영 실패: {e}")
 
-    # 시작 시간을 현재 시간의 다음 시간 단위로 맞춤
-    start_hour = now.hour
-    if now.minute > 0:  # 현재 분이 0분이 아니면 다음 시간으로
-        start_hour = (now.hour + 1) % 24
 
-    # 현재 날짜부터 7일 동안의 예약 가능 시간 생성
-    for day_offset in range(7):
-        check_date = (now + timedelta(days=day_offset)).date()
-        date_str = check_date.strftime("%Y-%m-%d")
-        available_times[date_str] = []
+# 예약 생성 / 삭제 후 처리: 점유 비트맵, 사용률 집계, 시간표 캐시 버전, 상태 변경 알림
+# 시간표 버전과 상태 알림은 기기마다 한 번만 (여러 예약을 한꺼번에 처리할 때)
+def reservations_created(reservations):
+    for reservation in reservations:
+        occupancy.mark_reservation(reservation["laundry_id"], reservation["start_time"], reservation["end_time"])
+        record_usage_safely(reservation, 1)
+    notify_laundries_changed(reservations)
+    try:
+        schedule_reminders([(r, get_laundry(db, r["laundry_id"])) for r in reservations])
+    except RedisError as e:
+        print(f"예약 알림 등록 실패: {e}")
 
-        # 첫날은 현재 시간 이후의 시간만 표시
-        if day_offset == 0:
-            hour_range = range(start_hour, 24)
-        else:
-            hour_range = range(0, 24)
 
-        for hour in hour_range:
-            # 00시~05시(새벽 시간)는 제외
-            if hour < 6:
-                continue
+def reservations_deleted(reservations):
+    for reservation in reservations:
+        occupancy.clear_reservation(reservation["laundry_id"], reservation["start_time"], reservation["end_time"])
+        record_usage_safely(reservation, -1)
+    notify_laundries_changed(reservations)
+    try:
+        cancel_reminders(reservations)
+    except RedisError as e:
+        print(f"예약 알림 삭제 실패: {e}")
+
+
+def notify_laundries_changed(reservations):
+    for campus_id, laundry_id in {(r.get("campus_id"), r["laundry_id"]) for r in reservations}:
+        bump_version(laundry_id)
+        publish_status_change(campus_id, laundry_id)
+
+
+def reservation_created(reservation):
+    reservations_created([reservation])
+
 
-            time_slot = f"{hour:02d}:00"
-            check_time = datetime.strptime(f"{date_str} {time_slot}", "%Y-%m-%d %H:%M")
+# 취소된 예약 후처리 + 비게 된 시간의 대기자를 바로 예약으로 옮김
+# 취소한 사용자가 같은 시간에 대기 등록해 둔 것은 먼저 지움 (자기 취소로 자기가 다시 예약되지 않도록)
+def reservations_cancelled(reservations):
+    reservations_deleted(reservations)
+    promoted = []
+    for reservation in reservations:
+        laundry = get_laundry(db, reservation["laundry_id"])
+        if laundry:
+            try:
+                leave_overlapping(laundry, reservation["start_time"], reservation["end_time"],
+                                  reservation["user_id"])
+            except RedisError as e:
+                print(f"취소한 사용자의 대기 등록 정리 실패: {e}")
+            promoted += promote_waiters(db, laundry, reservation["start_time"], reservation["end_time"])
+    if promoted:
+        reservations_created(promoted)
+
+
+# 예약 날짜/시간 폼 값 → 시작 시간 (잘못된 값이면 None)
+def parse_reserve_start():
+    try:
+        return datetime.strptime(f"{request.form.get('reserve_date')} {request.form.get('reserve_time')}",
+                                 "%Y-%m-%d %H:%M")
+    except ValueError:
+        return None
+
+
+@app.route("/reserve/<laundry_id>", methods=["GET", "POST"])
+@login_required
+def reserve(laundry_id):
+    current_user_id = get_current_user_id()
+    laundry = get_laundry_or_404(laundry_id)
 
-            # 예약 종료 시간 (세탁기: 1시간, 건조기: 2시간)
-            duration_hours = 2 if laundry.get("type") == "dryer" else 1
-            end_time = check_time + timedelta(hours=duration_hours)
+    if request.method == "POST":
+        # 예약 날짜와 시간으로 시작 시간 생성
+        start_time = parse_reserve_start()
+        if start_time is None:
+            return render_reserve(laundry, error="예약 날짜와 시간을 선택해주세요.")
 
-            # 해당 시간에 예약이 있는지 확인
-            existing_reservation = db.use.find_one({
-                "laundry_id": ObjectId(laundry_id),
-                "$or": [
-                    # 새 예약 시간이 기존 예약 시간과 겹치는 경우
-                    {"start_time": {"$lt": end_time}, "end_time": {"$gt": check_time}}
-                ]
-            })
+        # 종료 시간 (세탁기: 1시간, 건조기: 2시간)
+        end_time = start_time + slot_duration(laundry)
 
-            if not existing_reservation:
-                available_times[date_str].append(time_slot)
+        # 0시~6시 사이의 예약은 거부
+        if in_blackout(start_time):
+            return render_reserve(laundry, error="오전 0시부터 6시까지는 예약할 수 없습니다.")
+
+        # Redis 비트맵으로 이미 찬 시간인지 먼저 확인 (GETBIT 파이프라인 1회, 찼으면 MongoDB 쓰기 생략)
+        # 비어 있다고 나오면 저장은 여전히 슬롯 유니크 인덱스가 최종 확인
+        if occupancy.is_slot_free(laundry["_id"], start_time, end_time) is False:
+            return render_reserve(laundry, error="이미 예약된 시간입니다.",
+                                  waitlist_start=start_time if start_time > datetime.now() else None)
+
+        # 예약 생성 (슬롯 유니크 인덱스로 겹침 확인과 저장을 한 번에 처리)
+        reservation = create_reservation(db, laundry["campus_id"], laundry["_id"], ObjectId(current_user_id),
+                                         start_time, end_time)
+        if reservation is None:
+            # 다시 시도하는 대신 대기 등록을 할 수 있게 함 (취소되면 자동으로 예약)
+            return render_reserve(laundry, error="이미 예약된 시간입니다.",
+                                  waitlist_start=start_time if start_time > datetime.now() else None)
+
+        reservation_created(reservation)
+        return redirect(url_for("index"))
 
-    return available_times
+    return render_reserve(laundry)
+
+
+# 웹 푸시 클라이언트 설정 (Firebase 웹 앱 설정 JSON + VAPID 공개 키) - 없으면 알림 받기 버튼을 숨김
+FCM_WEB_CONFIG = os.getenv("FCM_WEB_CONFIG")
+FCM_VAPID_KEY = os.getenv("FCM_VAPID_KEY")
+PUSH_CONFIG = {"firebase": json.loads(FCM_WEB_CONFIG), "vapidKey": FCM_VAPID_KEY} \
+    if FCM_WEB_CONFIG and FCM_VAPID_KEY else None
+PUSH_TOKEN_COOKIE = "push_token"
 
 
 @app.route("/my_reservations")
-@jwt_required()
+@login_required
 def my_reservations():
-    current_user_id = get_jwt_identity()
+    current_user_id = get_current_user_id()
 
     # 현재 시간
     now = datetime.now()
-    custom_date = datetime(2025, 5, 14, 15, 5, 0)
 
-    # 현재 로그인한 사용자의 예약 목록 가져오기
-    reservations = list(db.use.find({"user_id": ObjectId(current_user_id)}).sort("start_time", 1))
-
-    # 세탁기 정보 추가
-    for reservation in reservations:
-        laundry = db.laundry.find_one({"_id": reservation["laundry_id"]})
-        if reservation.get('start_time') <= now and reservation.get('end_time') >= now:
-            db.use.update_one({'laundry_id':laundry['_id']},{'$set':{'status':"using"}})
-        elif reservation.get('end_time') <= now:
-            db.use.update_one({'laundry_id':laundry['_id']},{'$set':{'status':"finished"}})
-        reservation["laundry_info"] = laundry
+    # 예약 목록 + 기기 정보를 한 페이지씩 조회, 상태는 시작/종료 시간으로 계산 (DB 쓰기 없음)
+    # ?before=커서 : 지난 예약 다음 페이지 (오래된 기록은 월별 기록 컬렉션에서 조회)
+    cursor = decode_cursor(request.args.get("before"))
+    reservations, next_cursor = get_user_reservations(db, ObjectId(current_user_id), now, cursor)
 
-    # 상태별 정렬 우선순위 정의
-    reservations.sort(key=lambda x: x.get('status'), reverse=True)
+    # 대기 목록은 첫 페이지에만 표시 (Redis 오류면 생략)
+    waitlist = []
+    if cursor is None:
+        try:
+            waitlist = get_user_waitlist(current_user_id, now)
+        except RedisError as e:
+            print(f"대기 목록 조회 실패: {e}")
+        for entry in waitlist:
+            entry["laundry_info"] = get_laundry(db, entry["laundry_id"])
 
-    return render_template("my_reservations.html", reservations=reservations, now=custom_date)
+    return render_template("my_reservations.html", reservations=reservations, now=now, waitlist=waitlist,
+                           next_cursor=next_cursor, is_first_page=cursor is None, push_config=PUSH_CONFIG)
 
 
 
 @app.route("/cancel_reservation/<reservation_id>")
-@jwt_required()
+@login_required
 def cancel_reservation(reservation_id):
-    current_user_id = get_jwt_identity()
+    current_user_id = get_current_user_id()
 
-    # 예약 삭제
-    db.use.delete_one({
+    # 예약 삭제 (여러 건 취소 요청이 이미 표시해 둔 예약은 그쪽에서 처리, 오래된 표시는 무시)
+    reservation = db.use.find_one_and_delete({
         "_id": ObjectId(reservation_id),
-        "user_id": ObjectId(current_user_id)
+        "user_id": ObjectId(current_user_id),
+        **unclaimed_filter(),
     })
 
+    if reservation:
+        reservations_cancelled([reservation])
+
+    return redirect(url_for("my_reservations"))
+
+
+# 여러 예약 한꺼번에 생성 (전부 성공하거나 전부 실패)
+# {"reservations": [{"laundry_id": "...", "start": "2025-05-13T20:00"}, ...], "repeat_weeks": 4}
+# repeat_weeks를 주면 같은 요일/시간으로 매주 반복 (예: 매주 화요일 세탁기 20시 + 건조기 21시, 4주)
+@app.route("/api/reservations/batch", methods=["POST"])
+@login_required
+def api_reserve_batch():
+    body = request.get_json(silent=True) or {}
+    entries = body.get("reservations")
+    weeks = body.get("repeat_weeks", 1)
+    if not isinstance(entries, list) or not entries:
+        return api_error("예약할 기기와 시간을 입력해주세요.", 400)
+    if not isinstance(weeks, int) or not 1 <= weeks <= RECURRENCE_MAX_WEEKS:
+        return api_error(f"반복은 1~{RECURRENCE_MAX_WEEKS}주까지 가능합니다.", 400)
+    if len(entries) * weeks > BATCH_MAX_RESERVATIONS:
+        return api_error(f"한 번에 최대 {BATCH_MAX_RESERVATIONS}건까지 예약할 수 있습니다.", 400)
+
+    now = datetime.now()
+    items = []
+    for entry in entries:
+        try:
+            laundry = get_laundry(db, ObjectId(entry["laundry_id"]))
+            start_time = datetime.strptime(entry["start"], "%Y-%m-%dT%H:%M")
+        except (KeyError, TypeError, ValueError, InvalidId):
+            return api_error("잘못된 예약 요청입니다.", 400)
+        if laundry is None:
+            return api_error("기기가 없습니다.", 404)
+        if start_time <= now or in_blackout(start_time):
+            return api_error(f"예약할 수 없는 시간입니다: {entry['start']}", 400)
+        items.append((laundry, start_time))
+
+    reservations, conflicts = create_reservations(db, ObjectId(get_current_user_id()), expand_weekly(items, weeks))
+    if reservations is None:
+        return jsonify({
+            "msg": "이미 예약된 시간이 있습니다.",
+            "conflicts": [{"laundry_id": str(laundry_id), "start": start_time.isoformat()}
+                          for laundry_id, start_time in conflicts],
+        }), 409
+
+    reservations_created(reservations)
+    for reservation in reservations:
+        reservation["status"] = derive_status(reservation, now)
+        reservation["laundry_info"] = get_laundry(db, reservation["laundry_id"])
+    return jsonify({"reservations": [serialize_reservation(r) for r in reservations]}), 201
+
+
+# 여러 예약 한꺼번에 취소 (본인 예약만) - {"ids": ["...", ...]}
+@app.route("/api/reservations/cancel", methods=["POST"])
+@login_required
+def api_cancel_batch():
+    body = request.get_json(silent=True) or {}
+    ids = body.get("ids")
+    if not isinstance(ids, list) or not ids or len(ids) > BATCH_MAX_RESERVATIONS:
+        return api_error(f"취소할 예약을 1~{BATCH_MAX_RESERVATIONS}건 입력해주세요.", 400)
+    try:
+        reservation_ids = [ObjectId(reservation_id) for reservation_id in ids]
+    except (TypeError, InvalidId):
+        return api_error("잘못된 예약 번호입니다.", 400)
+
+    cancelled = cancel_reservations(db, ObjectId(get_current_user_id()), reservation_ids)
+    if cancelled:
+        reservations_cancelled(cancelled)
+    return jsonify({"cancelled": [str(reservation["_id"]) for reservation in cancelled]})
+
+
+# 대기 등록 (예약 페이지에서 이미 예약된 시간을 고른 경우)
+@app.route("/waitlist/<laundry_id>", methods=["POST"])
+@login_required
+def join_reservation_waitlist(laundry_id):
+    laundry = get_laundry_or_404(laundry_id)
+    start_time = parse_reserve_start()
+    if start_time is None or start_time <= datetime.now() or in_blackout(start_time):
+        return render_reserve(laundry, error="대기 등록할 수 없는 시간입니다.")
+    # 비어 있는 시간이면 대기하지 않고 바로 예약하도록 (대기열은 예약이 취소될 때만 처리됨)
+    # 자기 예약과 겹치는 시간은 대기 불가 (취소하면 바로 다시 자기에게 예약되어 뒤 사람이 받지 못함)
+    holders = slot_holders(db, laundry, start_time)
+    if not holders:
+        return render_reserve(laundry, error="예약되지 않은 시간입니다. 바로 예약해주세요.")
+    if ObjectId(get_current_user_id()) in holders:
+        return render_reserve(laundry, error="이미 예약한 시간입니다.")
+
+    try:
+        position = join_waitlist(laundry["_id"], start_time, get_current_user_id())
+    except RedisError as e:
+        print(f"대기 등록 실패: {e}")
+        return render_reserve(laundry, error="대기 등록에 실패했습니다. 잠시 후 다시 시도해주세요.", status=503)
+    if position is None:
+        return render_reserve(laundry, error=f"대기 등록은 최대 {WAITLIST_MAX_PER_USER}개까지 할 수 있습니다.")
+    return redirect(url_for("my_reservations"))
+
+
+# 대기 취소
+@app.route("/waitlist/<laundry_id>/leave", methods=["POST"])
+@login_required
+def leave_reservation_waitlist(laundry_id):
+    laundry = get_laundry_or_404(laundry_id)
+    start_time = parse_reserve_start()
+    if start_time is not None:
+        try:
+            leave_waitlist(laundry["_id"], start_time, get_current_user_id())
+        except RedisError as e:
+            print(f"대기 취소 실패: {e}")
     return redirect(url_for("my_reservations"))
 
 
+# 로그인/회원가입 요청 제한 (토큰 버킷: 최대 연속 요청 수, 초당 충전량)
+LOGIN_EMAIL_BUCKET = (int(os.getenv("LOGIN_EMAIL_BURST", 5)), float(os.getenv("LOGIN_EMAIL_PER_SEC", 1 / 60)))
+LOGIN_IP_BUCKET = (int(os.getenv("LOGIN_IP_BURST", 20)), float(os.getenv("LOGIN_IP_PER_SEC", 0.5)))
+
+
+# 요청 제한 초과 (429) 또는 비밀번호 처리 대기열 초과 (503) 응답
+def retry_later(template, status, retry_after):
+    response = make_response(render_template(template, error="요청이 많습니다. 잠시 후 다시 시도해주세요."), status)
+    response.headers["Retry-After"] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
 @app.route("/register", methods=["GET", "POST"])
 def register():
     if request.method == "POST":
@@ -307,13 +716,21 @@ def register():
         password = request.form.get("password")
         phone = request.form.get("phone")
 
+        # IP별 요청 제한
+        allowed, retry_after = consume_rate_limits([(f"ip:{request.remote_addr}", *LOGIN_IP_BUCKET)])
+        if not allowed:
+            return retry_later("register.html", 429, retry_after)
+
         # 이메일 중복 확인
         existing_user = db.user.find_one({"email": email})
         if existing_user:
             return render_template("register.html", error="이미 등록된 이메일입니다.")
 
         # 비밀번호 해싱 (bcrypt 사용)
-        hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+        try:
+            hashed_password = hash_password(password)
+        except PasswordHasherBusy:
+            return retry_later("register.html", 503, 1)
 
         # 새 사용자 등록
         new_user = {
@@ -323,36 +740,14 @@ def register():
             "created_at": datetime.now()
         }
 
-        user_id = db.user.insert_one(new_user).inserted_id
-
-        # JWT 토큰 생성
-        access_token = create_access_token(identity=str(user_id))
-        refresh_token = create_refresh_token(identity=str(user_id))
-
-        # Redis에 리프레시 토큰 저장
-        save_refresh_token(
-            str(user_id),
-            refresh_token,
-            int(os.getenv("REFRESH_TOKEN_EXPIRES", 1209600))
-        )
-
-        response = make_response(redirect(url_for("index")))
-
-        # 쿠키에 토큰 설정
-        response.set_cookie(
-            'access_token_cookie',
-            access_token,
-            max_age=int(os.getenv("ACCESS_TOKEN_EXPIRES", 1800)),
-            httponly=True
-        )
-        response.set_cookie(
-            'refresh_token_cookie',
-            refresh_token,
-            max_age=int(os.getenv("REFRESH_TOKEN_EXPIRES", 1209600)),
-            httponly=True
-        )
-
-        return response
+        # 동시에 같은 이메일로 가입하면 위의 확인을 둘 다 통과하므로 유니크 인덱스로 한 번 더 막음
+        try:
+            user_id = db.user.insert_one(new_user).inserted_id
+        except DuplicateKeyError:
+            return render_template("register.html", error="이미 등록된 이메일입니다.")
+
+        # JWT 토큰 생성 + 이 기기의 세션 저장
+        return start_session(make_response(redirect(url_for("index"))), str(user_id))
 
     return render_template("register.html")
 
@@ -363,6 +758,16 @@ def login():
         email = request.form.get("email")
         password = request.form.get("password")
 
+        # 이메일별 + IP별 요청 제한 (Redis 왕복 1회)
+        # 이메일별 버킷은 실패한 시도만 세도록 로그인에 성공하면 초기화 (정상 사용자가 자주 로그인해도 막히지 않음)
+        # 먼저 차감하고 성공 시 되돌리므로 동시에 들어온 시도도 버킷 용량 이상 비밀번호 확인까지 가지 못함
+        allowed, retry_after = consume_rate_limits([
+            (f"email:{email}", *LOGIN_EMAIL_BUCKET),
+            (f"ip:{request.remote_addr}", *LOGIN_IP_BUCKET),
+        ])
+        if not allowed:
+            return retry_later("login.html", 429, retry_after)
+
         user = db.user.find_one({"email": email})
 
         # 사용자가 존재하는지 확인
@@ -371,43 +776,20 @@ def login():
 
         try:
             if isinstance(user['pw'], bytes):
-                login_success = bcrypt.checkpw(password.encode('utf-8'), user['pw'])
+                login_success = check_password(password, user['pw'])
             # 평문인 경우
             else:
                 login_success = (user['pw'] == password)
+        except PasswordHasherBusy:
+            return retry_later("login.html", 503, 1)
         except:
             login_success = False
 
 
         if login_success:
-            # JWT 토큰 생성
-            access_token = create_access_token(identity=str(user["_id"]))
-            refresh_token = create_refresh_token(identity=str(user["_id"]))
-
-            # Redis에 리프레시 토큰 저장
-            save_refresh_token(
-                str(user["_id"]),
-                refresh_token,
-                int(os.getenv("REFRESH_TOKEN_EXPIRES", 1209600))
-            )
-
-            response = make_response(redirect(url_for("index")))
-
-            # 쿠키에 토큰 설정 (HttpOnly)
-            response.set_cookie(
-                'access_token_cookie',
-                access_token,
-                max_age=int(os.getenv("ACCESS_TOKEN_EXPIRES", 1800)),
-                httponly=True
-            )
-            response.set_cookie(
-                'refresh_token_cookie',
-                refresh_token,
-                max_age=int(os.getenv("REFRESH_TOKEN_EXPIRES", 1209600)),
-                httponly=True
-            )
-
-            return response
+            reset_rate_limit(f"email:{email}")
+            # JWT 토큰 생성 + 이 기기의 세션 저장 (다른 기기의 세션은 그대로 유지)
+            return start_session(make_response(redirect(url_for("index"))), str(user["_id"]))
         else:
             session['message'] = "이메일 또는 비밀번호가 올바르지 않습니다."  # 오류 메시지 세션에 저장
             session['message_type'] = 'error'  # 메시지 유형 저장
@@ -416,108 +798,180 @@ def login():
     # GET 요청 시 로그인 페이지 렌더링
     return render_template('login.html')
 
-# -------------------------------
-# 회원가입 페이지 렌더링
-# -------------------------------
-@app.route('/register', methods=['GET', 'POST'])
-def register():
-    if request.method == 'POST':
-        email = request.form.get('email')
-        password = request.form.get('password')
-        phone = request.form.get('phone_Number')
-        
-        print(f'test{email}')
-        print(f'test{password}')
-        print(f'test{phone}')
-
-        # 필수 입력값 검증
-        if not email or not password or not phone:
-            session['message'] = '모든 필드를 입력해주세요.'
-            session['message_type'] = 'error'
-            return redirect(url_for('register'))
-        
-        # 이메일 중복 체크
-        if db.user.find_one({'email': email}):
-            session['message'] = '이미 등록된 이메일입니다.'
-            session['message_type'] = 'error'
-            return redirect(url_for('register'))
-
-        # 비밀번호 해싱
-        hashed_pw = generate_password_hash(password)
-
-        # 사용자 저장
-        db.user.insert_one({
-            'email': email,
-            'password': hashed_pw,
-            'phone_number': phone,
-            'created_at': datetime.now()
-        })
-
-        session['message'] = '회원가입이 완료되었습니다. 로그인해주세요.'
-        session['message_type'] = 'success'
-        return redirect(url_for('login'))
-
-    return render_template('register.html')
-
-# 토큰 갱신 엔드포인트
+# 액세스 / 리프레시 토큰 쿠키 설정 (HttpOnly)
+def set_token_cookies(response, access_token, refresh_token):
+    response.set_cookie(
+        'access_token_cookie',
+        access_token,
+        max_age=int(os.getenv("ACCESS_TOKEN_EXPIRES", 1800)),
+        httponly=True
+    )
+    response.set_cookie(
+        'refresh_token_cookie',
+        refresh_token,
+        max_age=int(os.getenv("REFRESH_TOKEN_EXPIRES", 1209600)),
+        httponly=True
+    )
+    return response
+
+
+# 로그인 / 회원가입: 기기마다 새 세션 id를 만들어 리프레시 토큰(sid 클레임)과 Redis 세션에 저장
+def start_session(response, user_id):
+    session_id = uuid.uuid4().hex
+    access_token = create_access_token(identity=user_id)
+    refresh_token = create_refresh_token(identity=user_id, additional_claims={"sid": session_id})
+    create_session(user_id, session_id, refresh_token, request.headers.get("User-Agent", ""))
+    return set_token_cookies(response, access_token, refresh_token)
+
+
+# 리프레시 토큰 쿠키의 (사용자, 세션 id) - 없거나 잘못된 토큰이면 (None, None)
+def refresh_cookie_session():
+    token = request.cookies.get('refresh_token_cookie')
+    if not token:
+        return None, None
+    try:
+        claims = decode_token(token, allow_expired=True)
+    except Exception:
+        return None, None
+    return claims.get(app.config["JWT_IDENTITY_CLAIM"]), claims.get("sid")
+
+
+# 토큰 갱신 엔드포인트: 리프레시 토큰도 매번 새로 발급 (이전 토큰은 유예 시간 안에서만 다시 사용 가능)
+# CSRF 검사 제외: 리프레시 토큰 쿠키가 자격 증명이고, 다른 사이트에서 호출해도 응답을 읽을 수 없어 토큰만 교체됨
+# (비동기 조회 서버가 렌더링한 페이지에는 CSRF 토큰이 없음)
 @app.route("/api/refresh", methods=["POST"])
+@csrf.exempt
 @jwt_required(refresh=True)
 def refresh():
     current_user_id = get_jwt_identity()
-
-    # Redis에서 저장된 리프레시 토큰 확인
-    stored_token = get_refresh_token(current_user_id)
-
-    # 요청의 리프레시 토큰
+    session_id = get_jwt().get("sid")
     refresh_token = request.cookies.get('refresh_token_cookie')
+    access_token = create_access_token(identity=current_user_id)
 
-    # 토큰 불일치 시 거부 (토큰 재사용 시도)
-    if stored_token != refresh_token:
+    if session_id:
+        # 세션의 현재 토큰과 비교해서 교체 (Redis 왕복 1회)
+        # 예전 토큰을 다시 쓰면 탈취로 보고 그 기기의 세션을 폐기
+        new_refresh_token = create_refresh_token(identity=current_user_id, additional_claims={"sid": session_id})
+        if rotate_session(current_user_id, session_id, refresh_token, new_refresh_token) != SESSION_ROTATED:
+            return jsonify({"msg": "유효하지 않은 리프레시 토큰입니다."}), 401
+    elif claim_legacy_refresh_token(current_user_id, refresh_token):
+        # 기기별 세션 도입 전에 발급된 토큰 (sid 없음): 예전 저장 값과 같으면 한 번만 새 세션으로 옮김
+        session_id = uuid.uuid4().hex
+        new_refresh_token = create_refresh_token(identity=current_user_id, additional_claims={"sid": session_id})
+        create_session(current_user_id, session_id, new_refresh_token, request.headers.get("User-Agent", ""))
+    else:
         return jsonify({"msg": "유효하지 않은 리프레시 토큰입니다."}), 401
 
-    # 새로운 액세스 토큰 생성
-    access_token = create_access_token(identity=current_user_id)
+    return set_token_cookies(jsonify({"access_token": access_token}), access_token, new_refresh_token)
 
-    response = jsonify({"access_token": access_token})
-    response.set_cookie(
-        'access_token_cookie',
-        access_token,
-        max_age=int(os.getenv("ACCESS_TOKEN_EXPIRES", 1800)),
-        httponly=True
-    )
 
+# 로그아웃 시 쿠키 삭제
+def clear_token_cookies(response):
+    response.delete_cookie('access_token_cookie')
+    response.delete_cookie('refresh_token_cookie')
     return response
 
 
+# 이 기기만 로그아웃 (다른 기기의 세션은 유지)
 @app.route("/logout")
-@jwt_required(optional=True)
 def logout():
-    current_user_id = get_jwt_identity()
+    user_id, session_id = refresh_cookie_session()
+    if user_id and session_id:
+        revoke_session(user_id, session_id)
+
+    # 이 기기의 알림 토큰도 지워서 로그아웃한 기기로 예약 알림이 가지 않도록
+    push_token = request.cookies.get(PUSH_TOKEN_COOKIE)
+    owner = user_id or get_current_user_id()
+    if owner and push_token:
+        unregister_device_token(db, ObjectId(owner), push_token)
+
+    response = clear_token_cookies(make_response(redirect(url_for("login"))))
+    response.delete_cookie(PUSH_TOKEN_COOKIE)
+    return response
 
-    # 사용자가 로그인된 상태면 토큰 삭제
-    if current_user_id:
-        delete_refresh_token(current_user_id)
 
-    response = make_response(redirect(url_for("login")))
+# 모든 기기에서 로그아웃 (이미 발급된 액세스 토큰은 만료 시간까지 유효)
+@app.route("/logout/all", methods=["POST"])
+@login_required
+def logout_all():
+    revoke_all_sessions(get_current_user_id())
+    return clear_token_cookies(make_response(redirect(url_for("login"))))
 
-    # 쿠키 삭제
-    response.delete_cookie('access_token_cookie')
-    response.delete_cookie('refresh_token_cookie')
 
-    return response
+# 로그인된 기기 목록 (current: 이 요청을 보낸 기기)
+@app.route("/api/me/sessions")
+@login_required
+def api_my_sessions():
+    _, current_session_id = refresh_cookie_session()
+    sessions = list_sessions(get_current_user_id())
+    for item in sessions:
+        item["current"] = item["id"] == current_session_id
+    return jsonify({"sessions": sessions})
+
+
+# 기기 하나 로그아웃
+@app.route("/api/me/sessions/<session_id>", methods=["DELETE"])
+@login_required
+def api_revoke_session(session_id):
+    revoke_session(get_current_user_id(), session_id)
+    return jsonify({"msg": "ok"})
+
+
+# liveness: 프로세스가 요청을 처리할 수 있는지만 확인
+@app.route("/healthz")
+def healthz():
+    return jsonify({"status": "ok"})
+
+
+# readiness: MongoDB/Redis 연결 확인, 종료 중이면 503
+@app.route("/readyz")
+def readyz():
+    if draining:
+        return jsonify({"status": "draining"}), 503
+    checks = {}
+    try:
+        client.admin.command("ping")
+        checks["mongo"] = "ok"
+    except Exception as e:
+        checks["mongo"] = str(e)
+    try:
+        redis_client.ping()
+        checks["redis"] = "ok"
+    except RedisError as e:
+        checks["redis"] = str(e)
+    ready = all(value == "ok" for value in checks.values())
+    return jsonify({"status": "ok" if ready else "unavailable", **checks}), 200 if ready else 503
+
+
+# Prometheus 메트릭 (워커 프로세스별 값)
+@app.route("/metrics")
+def prometheus_metrics():
+    return Response(metrics.render_metrics(), mimetype="text/plain; version=0.0.4")
+
+
+metrics.register_gauge("jungdry_catalog_cache_hit_ratio", "기기 목록 캐시 적중률",
+                       lambda: catalog_stats()["hit_rate"])
+metrics.register_gauge("jungdry_grid_cache_hit_ratio", "예약 시간표 캐시 적중률",
+                       lambda: grid_cache_stats()["hit_rate"])
+
+
+# 보낼 시각이 지났는데 아직 발송되지 않은 알림 수 (알림 워커 지연 확인용)
+def reminders_due():
+    try:
+        return reminder_queue_stats()["due"]
+    except RedisError:
+        return float("nan")
+
+
+metrics.register_gauge("jungdry_reminders_due", "발송 대기 중인 예약 알림 수", reminders_due)
 
 
 @app.context_processor
 def inject_user():
-    try:
-        verify_jwt_in_request(optional=True)
-        current_user_id = get_jwt_identity()
-        if current_user_id:
-            return {'is_logged_in': True}
-    except:
-        pass
-    return {'is_logged_in': False}
+    # before_request에서 검증한 결과 사용 (다시 검증하지 않음)
+    return {'is_logged_in': get_current_user_id() is not None}
 
 
+# 개발 서버 (운영 환경은 gunicorn -c gunicorn.conf.py app:app)
 if __name__ == "__main__":
     app.run(host='0.0.0.0', port=5001, debug=True)
\ No newline at end of file
@@ -0,0 +1,627 @@
+"""비동기 조회 서버 (aiohttp + PyMongo 비동기 클라이언트 + redis.asyncio)
+
+대시보드와 상태 폴링처럼 요청이 많고 I/O 대기가 대부분인 읽기 요청만 처리합니다.
+예약/취소/로그인 등 쓰기 요청은 기존 Flask 서버(app.py)가 그대로 처리하고,
+앞단 프록시가 아래 경로만 이 서버로 보냅니다.
+SSE 연결은 스레드를 차지하지 않고 이벤트 루프의 코루틴 하나씩이므로 대기 중인 연결이 많아도 비용이 작습니다.
+
+- GET /index, /campus/<campus_id>           : 대시보드 (같은 템플릿)
+- GET /api/campuses                          : 캠퍼스 목록
+- GET /api/laundries, /api/campuses/<id>/laundries : 캠퍼스 기기 상태
+- GET /api/laundries/<laundry_id>/availability     : 기기 예약 가능 시간
+- GET /api/status/stream                     : 기기 상태 실시간 스트림 (SSE)
+
+인증은 Flask 서버가 발급한 액세스 토큰(Authorization 헤더 또는 쿠키)을 같은 비밀 키로 검증하고,
+응답 본문/ETag/Cache-Control은 Flask 서버와 같게 만들어서 어느 서버가 응답해도 브라우저 캐시가 그대로 동작합니다.
+서로 의존하지 않는 조회(캠퍼스 목록 + 기기 목록, 기기 정보 + 시간표 캐시)는 asyncio.gather로 동시에 보냅니다.
+
+    python async_app.py --port 5002 --workers 4
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+from datetime import datetime, timedelta
+
+import jwt
+from aiohttp import web
+from bson.errors import InvalidId
+from bson.objectid import ObjectId
+from dotenv import load_dotenv
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from jinja2.utils import htmlsafe_json_dumps
+from pymongo import AsyncMongoClient
+from pymongo.errors import PyMongoError
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+from werkzeug.routing import Map, Rule
+
+import catalog
+import occupancy
+from auth import verify_access_token
+from availability import (AVAILABILITY_DAYS, availability_window, compute_available_times, reservations_query,
+                          slot_duration)
+from grid_cache import (GRID_CACHE_TTL_SECONDS, LOOKUP_LUA, api_etag, api_version_keys, fragment_key, lookup_args,
+                        version_key)
+from machine_status import compute_status, group_by_laundry, upcoming_reservations_query
+from status_stream import (CLIENT_QUEUE_SIZE, HEARTBEAT_SECONDS, MAX_WAIT_SECONDS, STATUS_CHANNEL, next_transition,
+                           serialize_status)
+
+load_dotenv()
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
+MONGO_DB = os.getenv("MONGO_DB", "jungdry")
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
+JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "your-secret-key")
+ACCESS_COOKIE = "access_token_cookie"
+
+# 프로세스 하나가 이벤트 루프 하나로 동시에 많은 요청을 처리하므로 연결 풀은 Flask 워커보다 크게
+ASYNC_MONGO_MAX_POOL_SIZE = int(os.getenv("ASYNC_MONGO_MAX_POOL_SIZE", 64))
+ASYNC_REDIS_MAX_CONNECTIONS = int(os.getenv("ASYNC_REDIS_MAX_CONNECTIONS", 64))
+
+# app.py의 JSON API와 같은 값
+API_CACHE_CONTROL = "private, no-cache"
+API_MAX_DAYS = 14
+
+MONGO = web.AppKey("mongo", AsyncMongoClient)
+DB = web.AppKey("db", object)
+REDIS = web.AppKey("redis", aioredis.Redis)
+GRID_LOOKUP = web.AppKey("grid_lookup", object)
+STATUS_HUB = web.AppKey("status_hub", object)
+STATUS_LISTENER = web.AppKey("status_listener", asyncio.Task)
+
+# 템플릿: Flask와 같은 templates/ 디렉터리, url_for는 템플릿이 쓰는 라우트만 같은 URL로 만듦
+_urls = Map([
+    Rule("/static/<path:filename>", endpoint="static"),
+    Rule("/index", endpoint="index"),
+    Rule("/campus/<campus_id>", endpoint="index"),
+    Rule("/reserve/<laundry_id>", endpoint="reserve"),
+    Rule("/api/status/stream", endpoint="machine_status_stream"),
+    Rule("/api/laundries", endpoint="api_laundries"),
+    Rule("/my_reservations", endpoint="my_reservations"),
+    Rule("/login", endpoint="login"),
+    Rule("/logout", endpoint="logout"),
+]).bind("localhost")
+
+
+def url_for(endpoint, **values):
+    return _urls.build(endpoint, {key: str(value) for key, value in values.items()})
+
+
+templates = Environment(loader=FileSystemLoader(os.path.join(BASE_DIR, "templates")),
+                        autoescape=select_autoescape(["html"]), enable_async=True)
+templates.globals["url_for"] = url_for
+
+
+# Flask 앱 컨텍스트 없이 액세스 토큰 디코딩 (flask_jwt_extended 기본 설정과 같은 HS256)
+def decode_access_token(token):
+    return jwt.decode(token, JWT_SECRET_KEY, algorithms=["HS256"])
+
+
+# Flask jsonify와 같은 형식 (키 정렬, 공백 없음, 끝에 줄바꿈) → 같은 데이터면 ETag도 같음
+def json_body(data):
+    return json.dumps(data, sort_keys=True, separators=(",", ":")) + "\n"
+
+
+# JSON API 응답: 강한 ETag + Cache-Control, 바뀌지 않았으면 304
+# etag가 없으면 본문 SHA-1 (werkzeug add_etag와 같음)
+def api_response(request, body, etag=None):
+    etag = etag or hashlib.sha1(body.encode("utf-8")).hexdigest()
+    headers = {"Cache-Control": API_CACHE_CONTROL, "ETag": f'"{etag}"'}
+    if not_modified(request, etag):
+        return web.Response(status=304, headers=headers)
+    return web.Response(text=body, content_type="application/json", headers=headers)
+
+
+def not_modified(request, etag):
+    return any(tag.value in (etag, "*") for tag in request.if_none_match or ())
+
+
+# 기기 상태 / 예약 가능 시간 검증값 (Flask 서버와 같은 값, 버전 MGET 1회) - Redis 오류면 None
+async def versions_etag(app, tag, laundry_ids, now, *parts):
+    try:
+        versions = await app[REDIS].mget(api_version_keys(laundry_ids))
+    except RedisError:
+        return None
+    return api_etag(tag, versions, now, *parts)
+
+
+# 본문 없이 304 (검증값이 같을 때 조회 전에 반환)
+def not_modified_response(etag):
+    return web.Response(status=304, headers={"Cache-Control": API_CACHE_CONTROL, "ETag": f'"{etag}"'})
+
+
+def api_error(message, status):
+    return web.Response(text=json_body({"msg": message}), status=status, content_type="application/json")
+
+
+# 요청마다 액세스 토큰 검증 (Flask 서버와 같은 검증 캐시 사용)
+# 로그인 안 된 요청: JSON API는 401, 페이지는 로그인 페이지로 이동
+@web.middleware
+async def authenticate(request, handler):
+    if request.path.startswith("/static/") or request.path == "/healthz":
+        return await handler(request)
+
+    header = request.headers.get("Authorization", "")
+    token = header[len("Bearer "):] if header.startswith("Bearer ") else request.cookies.get(ACCESS_COOKIE)
+    claims = verify_access_token(token, decode_access_token) if token else None
+    request["user_id"] = claims["sub"] if claims else None
+    if request["user_id"] is None:
+        if request.path.startswith("/api/"):
+            return api_error("로그인이 필요합니다.", 401)
+        raise web.HTTPFound(url_for("login"))
+    return await handler(request)
+
+
+# 기기 목록 캐시 버전 (캐시를 채울 때 같이 저장, 무효화 메시지와 비교하는 데 사용)
+async def catalog_version(app):
+    try:
+        return int(await app[REDIS].get(catalog.VERSION_KEY) or 0)
+    except RedisError:
+        return None
+
+
+# 캠퍼스 목록 {ID: 문서} (Flask 서버와 같은 프로세스 내 캐시 모듈 사용)
+async def load_campuses(app):
+    campuses = catalog.cached_campuses()
+    if campuses is None:
+        docs, version = await asyncio.gather(app[DB].campus.find().sort("_id", 1).to_list(None),
+                                             catalog_version(app))
+        campuses = catalog.store_campuses(docs, version)
+    return campuses
+
+
+async def fetch_laundries(app, campus_id):
+    return await app[DB].laundry.find({"campus_id": campus_id}).to_list(None)
+
+
+# 캠퍼스의 기기 목록 (복사본)
+async def load_laundries(app, campus_id):
+    if campus_id is None:
+        return []
+    laundries = catalog.cached_laundries(campus_id)
+    if laundries is None:
+        docs, version = await asyncio.gather(fetch_laundries(app, campus_id), catalog_version(app))
+        laundries = catalog.store_laundries(campus_id, docs, version)
+    return [dict(laundry) for laundry in laundries.values()]
+
+
+# 기기 하나 조회 (없으면 None)
+async def get_laundry(app, laundry_id):
+    campus_id = catalog.cached_laundry_campus(laundry_id)
+    if campus_id is None:
+        found = await app[DB].laundry.find_one({"_id": laundry_id}, {"campus_id": 1})
+        if found is None:
+            return None
+        campus_id = found.get("campus_id")
+    for laundry in await load_laundries(app, campus_id):
+        if laundry["_id"] == laundry_id:
+            return laundry
+    return None
+
+
+# 캠퍼스 고르기: 후보(우선순위 순 문자열) 중 있는 캠퍼스, 없으면 기본 캠퍼스
+# 캠퍼스 목록 캐시가 비었으면 첫 번째 후보의 기기 목록도 같이 조회 (없는 캠퍼스면 버림)
+# → (캠퍼스 {ID: 문서}, 캠퍼스 ID, 기기 목록)
+async def resolve_campus(app, candidates):
+    candidates = [ObjectId(value) for value in candidates if value and ObjectId.is_valid(value)]
+    guess = candidates[0] if candidates else None
+    campuses = catalog.cached_campuses()
+    speculative = None
+    if campuses is None:
+        if guess is None:
+            campuses = await load_campuses(app)
+        else:
+            campuses, speculative = await asyncio.gather(load_campuses(app), fetch_laundries(app, guess))
+
+    campus_id = next((candidate for candidate in candidates if candidate in campuses), None)
+    campus_id = campus_id or catalog.pick_default_campus(campuses)
+    if speculative is not None and campus_id == guess:
+        laundries = catalog.store_laundries(campus_id, speculative)
+        return campuses, campus_id, [dict(laundry) for laundry in laundries.values()]
+    return campuses, campus_id, await load_laundries(app, campus_id)
+
+
+# 날짜별 점유 비트맵을 파이프라인 1회로 읽어 기기별 예약 구간으로 변환 (준비되지 않았으면 None)
+async def load_bitmap_intervals(app, laundry_ids, first_day, days):
+    keys = occupancy.bitmap_keys(laundry_ids, first_day, days)
+    pipe = app[REDIS].pipeline(transaction=False)
+    pipe.exists(occupancy.READY_KEY)
+    for _, _, key in keys:
+        pipe.get(key)
+    try:
+        ready, *values = await pipe.execute()
+    except RedisError:
+        return None
+    if not ready:
+        return None
+    return occupancy.intervals_from_bitmaps(laundry_ids, keys, values)
+
+
+# 캠퍼스 기기 상태 계산 (Redis 비트맵 우선, 준비되지 않았으면 MongoDB $in 쿼리 1회)
+async def machine_statuses(app, campus_id, laundries, now=None):
+    now = now or datetime.now()
+    laundry_ids = [laundry["_id"] for laundry in laundries]
+    if not laundry_ids:
+        return laundries
+    intervals = await load_bitmap_intervals(app, laundry_ids, datetime(now.year, now.month, now.day),
+                                            AVAILABILITY_DAYS + 1)
+    if intervals is None:
+        query, projection = upcoming_reservations_query(campus_id, laundry_ids, now)
+        rows = await app[DB].use.find(query, projection).sort("start_time", 1).to_list(None)
+        intervals = group_by_laundry(laundry_ids, rows)
+    for laundry in laundries:
+        laundry.update(compute_status(intervals.get(laundry["_id"], []), slot_duration(laundry), now))
+    return laundries
+
+
+# 기기 한 대의 예약 가능 시간
+# 기본 범위(오늘부터 7일)만 비트맵 사용 (비트맵은 그 기간만 유지), 그 외 범위는 MongoDB 쿼리 1회
+async def available_times(app, laundry, now, days=AVAILABILITY_DAYS):
+    duration = slot_duration(laundry)
+    window_start, window_end = availability_window(now, duration, days)
+    intervals = None
+    if days == AVAILABILITY_DAYS:
+        intervals = await load_bitmap_intervals(app, [laundry["_id"]], window_start,
+                                                (window_end - window_start).days + 1)
+    if intervals is None:
+        query, projection = reservations_query(laundry.get("campus_id"), laundry["_id"], window_start, window_end)
+        rows = await app[DB].use.find(query, projection).sort("start_time", 1).to_list(None)
+        busy = [(r["start_time"], r["end_time"]) for r in rows]
+    else:
+        busy = intervals[laundry["_id"]]
+    return compute_available_times(busy, duration, now, days)
+
+
+# 시간표 캐시 조회 (Flask 서버와 같은 스크립트/키) → (버전, 조각 또는 None), Redis 오류면 (None, None)
+async def grid_lookup(app, laundry_id, hour):
+    try:
+        version, fragment = await app[GRID_LOOKUP](keys=[version_key(laundry_id)],
+                                                   args=lookup_args(laundry_id, hour))
+    except RedisError:
+        return None, None
+    return (version.decode() if isinstance(version, bytes) else str(version)), fragment
+
+
+# 시간표 조각 (캐시에 없으면 계산해서 저장)
+# Flask 서버와 달리 잠금 없이 계산: 같은 조각을 여러 요청이 계산해도 결과가 같고 이벤트 루프를 막지 않음
+async def available_times_fragment(app, laundry, version, fragment, now):
+    if fragment is not None:
+        return fragment.decode()
+    fragment = str(htmlsafe_json_dumps(await available_times(app, laundry, now)))
+    if version is not None:
+        key = fragment_key(str(laundry["_id"]), version, now.strftime("%Y%m%d%H"))
+        try:
+            await app[REDIS].set(key, fragment, ex=GRID_CACHE_TTL_SECONDS)
+        except RedisError:
+            pass
+    return fragment
+
+
+# 대기 중인 메시지를 버리고 종료 신호(None)를 넣어 스트림을 끝냄
+def _disconnect(client):
+    while not client.empty():
+        client.get_nowait()
+    client.put_nowait(None)
+
+
+# 캠퍼스 하나의 상태 전송 (status_stream.StatusBroadcaster의 이벤트 루프 버전)
+# 연결이 있는 동안만 태스크 하나가 이벤트/상태 전환 시간마다 다시 계산해서 바뀐 기기만 전달
+class AsyncStatusBroadcaster:
+    def __init__(self, app, campus_id):
+        self.app = app
+        self.campus_id = campus_id
+        self.clients = set()
+        self.snapshot = {}
+        self.wakeup = asyncio.Event()
+        self.task = None
+
+    # 연결 하나 등록: (대기열, 현재 전체 상태)
+    def subscribe(self):
+        client = asyncio.Queue(maxsize=CLIENT_QUEUE_SIZE)
+        self.clients.add(client)
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+        return client, list(self.snapshot.values())
+
+    def unsubscribe(self, client):
+        self.clients.discard(client)
+
+    async def refresh(self):
+        laundries = await machine_statuses(self.app, self.campus_id, await load_laundries(self.app, self.campus_id))
+        current = {str(laundry["_id"]): serialize_status(laundry) for laundry in laundries}
+        changed = [status for key, status in current.items() if self.snapshot.get(key) != status]
+        self.snapshot = current
+        if changed:
+            for client in list(self.clients):
+                try:
+                    client.put_nowait(changed)
+                except asyncio.QueueFull:
+                    # 너무 느린 연결은 끊어서 다시 접속하게 함
+                    self.unsubscribe(client)
+                    _disconnect(client)
+        return laundries
+
+    async def _run(self):
+        try:
+            while self.clients:
+                try:
+                    laundries = await self.refresh()
+                    now = datetime.now()
+                    timeout = (next_transition(laundries, now) - now).total_seconds()
+                except (PyMongoError, RedisError) as e:
+                    print(f"기기 상태 계산 실패: {e}")
+                    timeout = MAX_WAIT_SECONDS
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), timeout=max(timeout, 0.5))
+                except asyncio.TimeoutError:
+                    pass
+                self.wakeup.clear()
+        finally:
+            self.task = None
+
+    def close(self):
+        for client in list(self.clients):
+            _disconnect(client)
+        self.clients.clear()
+
+
+# 캠퍼스별 브로드캐스터 모음 (프로세스마다 하나)
+class AsyncStatusHub:
+    def __init__(self, app):
+        self.app = app
+        self.broadcasters = {}
+
+    def get(self, campus_id):
+        key = str(campus_id)
+        if key not in self.broadcasters:
+            self.broadcasters[key] = AsyncStatusBroadcaster(self.app, campus_id)
+        return self.broadcasters[key]
+
+    def wake(self, key):
+        broadcaster = self.broadcasters.get(key)
+        if broadcaster is not None:
+            broadcaster.wakeup.set()
+
+    def close(self):
+        for broadcaster in self.broadcasters.values():
+            broadcaster.close()
+
+
+# 상태 변경 채널 구독 (machine_status:events:<campus_id> 패턴, 연결이 끊기면 재연결)
+async def listen_status_events(app):
+    prefix = f"{STATUS_CHANNEL}:"
+    while True:
+        try:
+            pubsub = app[REDIS].pubsub(ignore_subscribe_messages=True)
+            await pubsub.psubscribe(f"{prefix}*")
+            while True:
+                # 소켓 타임아웃에 걸리지 않도록 짧은 대기로 반복
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message is None:
+                    continue
+                channel = message["channel"]
+                if isinstance(channel, bytes):
+                    channel = channel.decode()
+                app[STATUS_HUB].wake(channel[len(prefix):])
+        except RedisError:
+            await asyncio.sleep(1)
+
+
+# /index: 현재 캠퍼스 대시보드, /campus/<campus_id>: 캠퍼스를 골라서 보고 쿠키에 기억
+async def index(request):
+    app = request.app
+    selected = request.match_info.get("campus_id")
+    if selected is not None:
+        candidates = [selected]
+    else:
+        candidates = [request.query.get("campus"), request.cookies.get(catalog.CAMPUS_COOKIE)]
+    campuses, campus_id, laundries = await resolve_campus(app, candidates)
+    if selected is not None and (not ObjectId.is_valid(selected) or campus_id != ObjectId(selected)):
+        raise web.HTTPNotFound()
+
+    laundries = await machine_statuses(app, campus_id, laundries)
+    html = await templates.get_template("index.html").render_async(
+        laundries=laundries, campus_id=campus_id, campuses=[dict(campus) for campus in campuses.values()],
+        is_logged_in=True)
+    response = web.Response(text=html, content_type="text/html")
+    if selected is not None:
+        response.set_cookie(catalog.CAMPUS_COOKIE, str(campus_id), max_age=catalog.CAMPUS_COOKIE_MAX_AGE,
+                            httponly=True)
+    return response
+
+
+# 캠퍼스 목록
+async def api_campuses(request):
+    campuses = await load_campuses(request.app)
+    return api_response(request, json_body({
+        "campuses": [{"id": str(campus["_id"]), "email": campus.get("email")} for campus in campuses.values()],
+    }))
+
+
+# 캠퍼스 기기 상태 (대시보드 폴링용) - /api/laundries는 현재 캠퍼스
+async def api_laundries(request):
+    app = request.app
+    selected = request.match_info.get("campus_id")
+    if selected is not None:
+        candidates = [selected]
+    else:
+        candidates = [request.query.get("campus"), request.cookies.get(catalog.CAMPUS_COOKIE)]
+    _, campus_id, laundries = await resolve_campus(app, candidates)
+    if selected is not None and (not ObjectId.is_valid(selected) or campus_id != ObjectId(selected)):
+        return api_error("캠퍼스를 찾을 수 없습니다.", 404)
+
+    now = datetime.now()
+    etag = await versions_etag(app, "laundries", [laundry["_id"] for laundry in laundries], now, campus_id) \
+        if campus_id else None
+    if etag and not_modified(request, etag):
+        return not_modified_response(etag)
+
+    laundries = await machine_statuses(app, campus_id, laundries, now)
+    return api_response(request, json_body({
+        "campus_id": str(campus_id),
+        "laundries": [{**serialize_status(laundry), "type": laundry["type"], "no": laundry["id"]}
+                      for laundry in laundries],
+    }), etag)
+
+
+# 기기 한 대의 예약 가능 시간 (?from=YYYY-MM-DD&days=N)
+# 기본 범위는 기기 정보, 검증값, 시간표 캐시 조각을 동시에 조회
+async def api_laundry_availability(request):
+    app = request.app
+    laundry_id = request.match_info["laundry_id"]
+    try:
+        oid = ObjectId(laundry_id)
+    except InvalidId:
+        return api_error("기기를 찾을 수 없습니다.", 404)
+
+    now = datetime.now()
+    today = now.date()
+    try:
+        start = datetime.strptime(request.query["from"], "%Y-%m-%d").date() if "from" in request.query else today
+        days = int(request.query.get("days", AVAILABILITY_DAYS))
+    except ValueError:
+        return api_error("from=YYYY-MM-DD, days=정수 형식이어야 합니다.", 400)
+    if start < today or start > today + timedelta(days=API_MAX_DAYS) or not 1 <= days <= API_MAX_DAYS:
+        return api_error(f"오늘부터 {API_MAX_DAYS}일 이내만 조회할 수 있습니다.", 400)
+
+    # 기기 정보, 검증값, (기본 범위면) 시간표 캐시 조각을 동시에 조회
+    lookups = [get_laundry(app, oid), versions_etag(app, "availability", [oid], now, laundry_id, start, days)]
+    if start == today and days == AVAILABILITY_DAYS:
+        lookups.append(grid_lookup(app, laundry_id, now.strftime("%Y%m%d%H")))
+    laundry, etag, *grid = await asyncio.gather(*lookups)
+    if laundry is None:
+        return api_error("기기를 찾을 수 없습니다.", 404)
+    if etag and not_modified(request, etag):
+        return not_modified_response(etag)
+
+    if grid:
+        version, fragment = grid[0]
+        times_json = await available_times_fragment(app, laundry, version, fragment, now)
+    else:
+        window_now = max(now, datetime.combine(start, datetime.min.time()))
+        times_json = json.dumps(await available_times(app, laundry, window_now, days), separators=(",", ":"))
+
+    body = f'{{"id":{json.dumps(laundry_id)},"from":"{start.isoformat()}","days":{days},"times":{times_json}}}'
+    return api_response(request, body, etag)
+
+
+# 기기 상태 실시간 스트림 (SSE, ?campus=) - 처음에 캠퍼스 전체 상태, 이후 바뀐 기기만 전송
+async def machine_status_stream(request):
+    app = request.app
+    _, campus_id, _ = await resolve_campus(app, [request.query.get("campus"),
+                                                 request.cookies.get(catalog.CAMPUS_COOKIE)])
+    if campus_id is None:
+        return api_error("캠퍼스가 없습니다.", 404)
+
+    response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache",
+                                           "X-Accel-Buffering": "no"})
+    await response.prepare(request)
+    broadcaster = app[STATUS_HUB].get(campus_id)
+    client, snapshot = broadcaster.subscribe()
+    try:
+        if snapshot:
+            await response.write(f"event: snapshot\ndata: {json.dumps(snapshot)}\n\n".encode())
+        while True:
+            try:
+                changed = await asyncio.wait_for(client.get(), timeout=HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                await response.write(b": heartbeat\n\n")
+                continue
+            if changed is None:
+                break
+            await response.write(f"event: status\ndata: {json.dumps(changed)}\n\n".encode())
+    except ConnectionResetError:
+        pass
+    finally:
+        broadcaster.unsubscribe(client)
+    return response
+
+async def healthz(request):
+    return web.Response(text=json_body({"status": "ok"}), content_type="application/json")
+
+
+# 이벤트 루프 안에서 클라이언트 생성 (프로세스마다 따로)
+async def open_clients(app):
+    app[MONGO] = AsyncMongoClient(
+        MONGO_URI,
+        maxPoolSize=ASYNC_MONGO_MAX_POOL_SIZE,
+        waitQueueTimeoutMS=int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", 2000)),
+        serverSelectionTimeoutMS=int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", 3000)),
+        connectTimeoutMS=int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", 2000)),
+        socketTimeoutMS=int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", 5000)),
+    )
+    app[DB] = app[MONGO][MONGO_DB]
+    app[REDIS] = aioredis.Redis.from_url(
+        REDIS_URL,
+        connection_pool_class=aioredis.BlockingConnectionPool,
+        max_connections=ASYNC_REDIS_MAX_CONNECTIONS,
+        socket_timeout=float(os.getenv("REDIS_SOCKET_TIMEOUT", 2)),
+        socket_connect_timeout=float(os.getenv("REDIS_CONNECT_TIMEOUT", 2)),
+        health_check_interval=30,
+    )
+    app[GRID_LOOKUP] = app[REDIS].register_script(LOOKUP_LUA)
+    app[STATUS_HUB] = AsyncStatusHub(app)
+    app[STATUS_LISTENER] = asyncio.create_task(listen_status_events(app))
+    # 기기 목록 캐시 무효화 알림 수신 (Flask 워커와 같은 채널)
+    catalog.start_invalidation_listener()
+
+
+# 종료 시작: 열린 SSE 연결을 먼저 닫아서 종료를 막지 않도록
+async def close_streams(app):
+    app[STATUS_HUB].close()
+
+
+async def close_clients(app):
+    app[STATUS_LISTENER].cancel()
+    await app[REDIS].aclose()
+    await app[MONGO].close()
+
+
+def create_app():
+    app = web.Application(middlewares=[authenticate])
+    app.on_startup.append(open_clients)
+    app.on_shutdown.append(close_streams)
+    app.on_cleanup.append(close_clients)
+    app.add_routes([
+        web.get("/index", index),
+        web.get("/campus/{campus_id}", index),
+        web.get("/api/campuses", api_campuses),
+        web.get("/api/laundries", api_laundries),
+        web.get("/api/campuses/{campus_id}/laundries", api_laundries),
+        web.get("/api/laundries/{laundry_id}/availability", api_laundry_availability),
+        web.get("/api/status/stream", machine_status_stream),
+        web.get("/healthz", healthz),
+        web.static("/static", os.path.join(BASE_DIR, "static")),
+    ])
+    return app
+
+
+def serve(host, port):
+    web.run_app(create_app(), host=host, port=port, reuse_port=True, access_log=None, print=None)
+
+
+# 코어마다 프로세스 하나 (같은 포트를 SO_REUSEPORT로 공유)
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default=os.getenv("ASYNC_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("ASYNC_PORT", 5002)))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("ASYNC_WORKERS", multiprocessing.cpu_count())))
+    args = parser.parse_args()
+
+    if args.workers <= 1:
+        serve(args.host, args.port)
+        return
+    workers = [multiprocessing.Process(target=serve, args=(args.host, args.port), daemon=True)
+               for _ in range(args.workers)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import functools
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, g, jsonify, redirect, request, url_for
+from flask_jwt_extended import decode_token
+
+from metrics import timed
+
+# 요청당 한 번만 액세스 토큰을 검증하고 결과를 g에 저장
+# - before_request의 authenticate_request()가 검증
+# - login_required, 템플릿(inject_user) 등은 g.current_user_id만 사용
+# 최근 검증한 토큰은 토큰 해시 기준 LRU에 보관 (토큰 만료 시간까지만 유효, 0이면 사용 안 함)
+JWT_CACHE_SIZE = int(os.getenv("JWT_CACHE_SIZE", 1024))
+
+
+class VerifiedTokenCache:
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        self.items = OrderedDict()      # 토큰 해시 → 검증된 클레임
+
+    def get(self, key):
+        with self.lock:
+            claims = self.items.get(key)
+            if claims is None:
+                return None
+            if claims.get("exp", 0) <= time.time():
+                del self.items[key]
+                return None
+            self.items.move_to_end(key)
+            return claims
+
+    def put(self, key, claims):
+        if self.max_size <= 0:
+            return
+        with self.lock:
+            self.items[key] = claims
+            self.items.move_to_end(key)
+            while len(self.items) > self.max_size:
+                self.items.popitem(last=False)
+
+
+_token_cache = VerifiedTokenCache(JWT_CACHE_SIZE)
+
+
+# 요청에서 액세스 토큰 꺼내기 (Authorization 헤더 우선, 없으면 쿠키)
+def _access_token():
+    header = request.headers.get("Authorization", "")
+    if header.startswith("Bearer "):
+        return header[len("Bearer "):]
+    return request.cookies.get(current_app.config["JWT_ACCESS_COOKIE_NAME"])
+
+
+# 토큰 검증 (캐시에 있으면 서명 검증 생략), 실패 시 None
+# decode: Flask 앱 컨텍스트 밖(비동기 조회 서버)에서 쓸 디코더 (기본: flask_jwt_extended)
+def verify_access_token(token, decode=decode_token):
+    key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+    claims = _token_cache.get(key)
+    if claims is not None:
+        return claims
+    try:
+        with timed("jwt"):
+            claims = decode(token)
+    except Exception:
+        return None
+    if claims.get("type") != "access":
+        return None
+    _token_cache.put(key, claims)
+    return claims
+
+
+# before_request: 요청마다 한 번 검증해서 g.current_user_id / g.jwt_claims 설정 (로그인 안 됨: None)
+def authenticate_request():
+    if "current_user_id" in g:
+        return
+    g.current_user_id = None
+    g.jwt_claims = None
+    token = _access_token()
+    if token:
+        claims = verify_access_token(token)
+        if claims:
+            g.jwt_claims = claims
+            g.current_user_id = claims[current_app.config["JWT_IDENTITY_CLAIM"]]
+
+
+def get_current_user_id():
+    return g.get("current_user_id")
+
+
+# 로그인 안 된 요청: JSON API는 401, 페이지는 로그인 페이지로 이동
+def unauthorized():
+    if request.path.startswith("/api/"):
+        return jsonify({"msg": "로그인이 필요합니다."}), 401
+    return redirect(url_for("login"))
+
+
+# 로그인이 필요한 라우트용 데코레이터 (검증은 authenticate_request에서 이미 끝남)
+def login_required(f):
+    @functools.wraps(f)
+    def decorated_function(*args, **kwargs):
+        if get_current_user_id() is None:
+            return unauthorized()
+        return f(*args, **kwargs)
+
+    return decorated_function
@@ -0,0 +1,134 @@
+from datetime import datetime, timedelta
+
+# 예약 가능 시간 계산 설정
+AVAILABILITY_DAYS = 7          # 오늘부터 며칠간 보여줄지
+SLOT_MINUTES = 60              # 예약 시작 시간 간격 (분)
+BLACKOUT_HOURS = (0, 6)        # 예약 불가 시간대 [시작, 끝) - 오전 0시~6시
+
+# 기기 종류별 사용 시간 (세탁기: 1시간, 건조기: 2시간)
+DURATION_HOURS = {
+    "washer": 1,
+    "dryer": 2,
+}
+
+
+# 기기 한 번 사용 시간 계산
+def slot_duration(laundry):
+    return timedelta(hours=DURATION_HOURS.get(laundry.get("type"), 1))
+
+
+# 시작 시간이 예약 불가 시간대에 포함되는지 확인 (예: (23, 6)처럼 자정을 넘기는 구간도 지원)
+def in_blackout(start_time, blackout=BLACKOUT_HOURS):
+    if not blackout:
+        return False
+    begin, end = blackout
+    hour = start_time.hour
+    if begin <= end:
+        return begin <= hour < end
+    return hour >= begin or hour < end
+
+
+# 예약 구간 [start, end)가 걸치는 (날짜, 슬롯 번호) 목록
+def covered_slots(start, end, slot_minutes=SLOT_MINUTES):
+    step = timedelta(minutes=slot_minutes)
+    day = datetime(start.year, start.month, start.day)
+    time = day + int((start - day) / step) * step
+    slots = []
+    while time < end:
+        day = datetime(time.year, time.month, time.day)
+        slots.append((day, int((time - day) / step)))
+        time += step
+    return slots
+
+
+# 예약이 차지하는 슬롯 키 목록 (예: ["2025-05-14T15:00", "2025-05-14T16:00"])
+# use 컬렉션의 (laundry_id, slots) 유니크 인덱스로 같은 슬롯 중복 예약을 막는 데 사용
+def slot_keys(start, end, slot_minutes=SLOT_MINUTES):
+    step = timedelta(minutes=slot_minutes)
+    return [(day + slot * step).strftime("%Y-%m-%dT%H:%M")
+            for day, slot in covered_slots(start, end, slot_minutes)]
+
+
+# 조회 구간 [window_start, window_end)와 겹치는 예약 조회 조건 (filter, projection) - 정렬은 start_time 오름차순
+# (campus_id, laundry_id) 조건이 인덱스/샤드 키 앞부분과 같아서 한 캠퍼스 데이터만 읽음
+def reservations_query(campus_id, laundry_id, window_start, window_end):
+    return (
+        {
+            "campus_id": campus_id,
+            "laundry_id": laundry_id,
+            "start_time": {"$lt": window_end},
+            "end_time": {"$gt": window_start},
+        },
+        {"_id": 0, "start_time": 1, "end_time": 1},
+    )
+
+
+# 조회 구간과 겹치는 예약을 한 번의 범위 쿼리로 가져오기
+def load_reservations(db, campus_id, laundry_id, window_start, window_end):
+    query, projection = reservations_query(campus_id, laundry_id, window_start, window_end)
+    return [(r["start_time"], r["end_time"]) for r in db.use.find(query, projection).sort("start_time", 1)]
+
+
+# 겹치거나 맞닿은 예약 구간을 하나로 합쳐 시작/종료 모두 정렬된 구간 목록으로 만들기
+def merge_intervals(intervals):
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return merged
+
+
+# 조회 구간 계산: 첫날 0시부터 마지막 날 다음 0시 + 사용 시간까지
+def availability_window(now, duration, days=AVAILABILITY_DAYS):
+    first_day = datetime(now.year, now.month, now.day)
+    return first_day, first_day + timedelta(days=days) + duration
+
+
+# 메모리 상에서 구간 스윕으로 예약 가능한 시작 시간 계산
+# 반환값: {"YYYY-MM-DD": ["HH:MM", ...]} - 날짜 키는 예약 가능 시간이 없어도 항상 포함
+def compute_available_times(intervals, duration, now, days=AVAILABILITY_DAYS,
+                            slot_minutes=SLOT_MINUTES, blackout=BLACKOUT_HOURS):
+    busy = merge_intervals(intervals)
+    step = timedelta(minutes=slot_minutes)
+    earliest = now.replace(second=0, microsecond=0)
+    if earliest < now:
+        earliest += timedelta(minutes=1)
+
+    available_times = {}
+    first_day = datetime(now.year, now.month, now.day)
+    i = 0
+
+    for day_offset in range(days):
+        day_start = first_day + timedelta(days=day_offset)
+        date_str = day_start.strftime("%Y-%m-%d")
+        slots = available_times[date_str] = []
+
+        check_time = day_start
+        day_end = day_start + timedelta(days=1)
+        while check_time < day_end:
+            slot_end = check_time + duration
+
+            # 이미 지난 시간 또는 예약 불가 시간대는 제외
+            if check_time >= earliest and not in_blackout(check_time, blackout):
+                # 후보 시간이 오름차순이므로 이미 끝난 예약 구간은 다시 볼 필요가 없음
+                while i < len(busy) and busy[i][1] <= check_time:
+                    i += 1
+                if i == len(busy) or busy[i][0] >= slot_end:
+                    slots.append(check_time.strftime("%H:%M"))
+
+            check_time += step
+
+    return available_times
+
+
+# 기기 한 대의 7일간 예약 가능 시간 (Mongo 쿼리 1회)
+def get_available_times(db, laundry, now=None, days=AVAILABILITY_DAYS,
+                        slot_minutes=SLOT_MINUTES, blackout=BLACKOUT_HOURS):
+    now = now or datetime.now()
+    duration = slot_duration(laundry)
+    window_start, window_end = availability_window(now, duration, days)
+    intervals = load_reservations(db, laundry.get("campus_id"), laundry["_id"], window_start, window_end)
+    return compute_available_times(intervals, duration, now, days, slot_minutes, blackout)
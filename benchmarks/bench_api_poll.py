@@ -0,0 +1,90 @@
+"""대시보드 폴링 비용 비교 (/index HTML vs JSON API)
+
+같은 사용자가 상태를 반복해서 확인할 때 요청당 응답 크기와 서버 처리 시간을 비교합니다.
+
+- GET /index                        : 전체 페이지 다시 받기
+- GET /api/laundries                : JSON 상태 (매번 200)
+- GET /api/laundries + If-None-Match : 바뀐 것이 없으면 304 (서비스 워커의 재검증 요청)
+
+    python benchmarks/bench_api_poll.py --mock
+    python benchmarks/bench_api_poll.py --requests 2000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from loadtest import install_mocks, percentile, seed  # noqa: E402
+
+
+def measure(client, path, requests, headers=None):
+    samples = []
+    sizes = []
+    statuses = set()
+    cpu_started = time.process_time()
+    for _ in range(requests):
+        t0 = time.perf_counter()
+        response = client.get(path, headers=headers or {})
+        samples.append((time.perf_counter() - t0) * 1000)
+        sizes.append(len(response.get_data()))
+        statuses.add(response.status_code)
+    cpu_ms = (time.process_time() - cpu_started) * 1000 / requests
+
+    samples.sort()
+    return {
+        "status": sorted(statuses),
+        "bytes_per_request": round(sum(sizes) / requests, 1),
+        "cpu_ms_per_request": round(cpu_ms, 3),
+        "p50_ms": round(percentile(samples, 50), 3),
+        "p95_ms": round(percentile(samples, 95), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--machines", type=int, default=14)
+    parser.add_argument("--reservations", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--mock", action="store_true", help="mongomock + fakeredis 사용")
+    args = parser.parse_args()
+
+    if args.mock:
+        install_mocks()
+    os.environ.setdefault("MONGO_DB", "jungdry_bench")
+
+    import app as web
+    import catalog
+    import occupancy
+    from flask_jwt_extended import create_access_token
+
+    user_ids, _ = seed(web.db, args.users, args.machines, args.reservations)
+    catalog.drop_cache()
+    occupancy.rebuild_occupancy(web.db)
+    with web.app.app_context():
+        token = create_access_token(identity=str(user_ids[0]))
+
+    client = web.app.test_client()
+    client.set_cookie("access_token_cookie", token)
+    etag = client.get("/api/laundries").headers["ETag"]
+
+    result = {
+        "index_html": measure(client, "/index", args.requests),
+        "api_laundries": measure(client, "/api/laundries", args.requests),
+        "api_laundries_304": measure(client, "/api/laundries", args.requests, {"If-None-Match": etag}),
+    }
+    base = result["index_html"]
+    for name, r in result.items():
+        r["bytes_vs_index"] = round(r["bytes_per_request"] / base["bytes_per_request"], 4)
+        r["cpu_vs_index"] = round(r["cpu_ms_per_request"] / base["cpu_ms_per_request"], 4)
+    print(json.dumps(result, indent=2))
+    sys.stdout.flush()
+    os._exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""조회 서버 비교 벤치마크 (Flask/gunicorn 동기 처리 vs aiohttp 비동기 조회 서버)
+
+실행 중인 두 서버에 같은 수의 코어를 주고, 동시 폴링 클라이언트 1,000개가 같은 경로를 반복해서 요청할 때
+코어당 초당 처리량과 지연 시간을 비교합니다. 각 클라이언트는 응답을 받으면 --think-ms 만큼 쉬고 다시 요청합니다.
+경로의 {laundry}는 첫 번째 기기 ID로 바뀝니다. 부하 생성기는 서버와 다른 코어에서 실행하세요.
+
+    # 서버 (각각 코어 4개)
+    WEB_WORKERS=4 taskset -c 0-3 gunicorn -c gunicorn.conf.py app:app
+    taskset -c 4-7 python async_app.py --port 5002 --workers 4
+
+    python benchmarks/bench_async_read.py --cores 4
+    python benchmarks/bench_async_read.py --cores 4 --pollers 1000 --paths /api/laundries,/index
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import aiohttp
+
+
+def percentile(samples, p):
+    return samples[min(len(samples) - 1, int(len(samples) * p / 100))] if samples else None
+
+
+# 동기 서버 로그인 폼으로 액세스 토큰 발급 (두 서버가 같은 토큰을 검증)
+async def login(session, url, email, password):
+    async with session.get(f"{url}/login") as response:
+        page = await response.text()
+    marker = 'name="csrf_token" value="'
+    start = page.find(marker)
+    csrf_token = page[start + len(marker):page.find('"', start + len(marker))] if start >= 0 else ""
+    async with session.post(f"{url}/login", data={"email": email, "password": password, "csrf_token": csrf_token},
+                            allow_redirects=False) as response:
+        cookie = response.cookies.get("access_token_cookie")
+    return cookie.value if cookie else None
+
+
+async def first_laundry_id(session, url, token):
+    async with session.get(f"{url}/api/laundries", headers={"Authorization": f"Bearer {token}"}) as response:
+        laundries = (await response.json())["laundries"]
+    return laundries[0]["id"] if laundries else None
+
+
+# 폴링 클라이언트 pollers개를 seconds초 동안 실행
+async def run(url, paths, token, pollers, seconds, think_ms):
+    samples = []
+    statuses = {}
+    errors = [0]
+    connector = aiohttp.TCPConnector(limit=pollers, force_close=False)
+    async with aiohttp.ClientSession(connector=connector, headers={"Authorization": f"Bearer {token}"},
+                                     timeout=aiohttp.ClientTimeout(total=30)) as session:
+        deadline = time.monotonic() + seconds
+
+        async def poller(i):
+            n = i
+            while time.monotonic() < deadline:
+                path = paths[n % len(paths)]
+                n += 1
+                t0 = time.perf_counter()
+                try:
+                    async with session.get(f"{url}{path}", allow_redirects=False) as response:
+                        await response.read()
+                        statuses[response.status] = statuses.get(response.status, 0) + 1
+                except (aiohttp.ClientError, asyncio.TimeoutError):
+                    errors[0] += 1
+                    continue
+                samples.append((time.perf_counter() - t0) * 1000)
+                if think_ms:
+                    await asyncio.sleep(think_ms / 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(poller(i) for i in range(pollers)))
+        elapsed = time.perf_counter() - started
+
+    samples.sort()
+    return {
+        "requests": len(samples),
+        "errors": errors[0],
+        "status": statuses,
+        "rps": round(len(samples) / elapsed, 1),
+        "p50_ms": round(percentile(samples, 50), 2) if samples else None,
+        "p95_ms": round(percentile(samples, 95), 2) if samples else None,
+        "p99_ms": round(percentile(samples, 99), 2) if samples else None,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sync-url", default="http://127.0.0.1:5001")
+    parser.add_argument("--async-url", default="http://127.0.0.1:5002")
+    parser.add_argument("--paths", default="/api/laundries,/api/laundries/{laundry}/availability,/index")
+    parser.add_argument("--email", default="user1@example.com")
+    parser.add_argument("--password", default="password123")
+    parser.add_argument("--cores", type=int, required=True, help="각 서버에 준 코어 수 (코어당 처리량 계산용)")
+    parser.add_argument("--pollers", type=int, default=1000)
+    parser.add_argument("--seconds", type=float, default=30)
+    parser.add_argument("--think-ms", type=float, default=0)
+    args = parser.parse_args()
+
+    async with aiohttp.ClientSession(cookie_jar=aiohttp.CookieJar(unsafe=True)) as session:
+        token = await login(session, args.sync_url, args.email, args.password)
+        if not token:
+            raise SystemExit("로그인 실패: 테스트 계정을 확인하세요.")
+        laundry_id = await first_laundry_id(session, args.sync_url, token)
+    paths = [path.replace("{laundry}", laundry_id or "") for path in args.paths.split(",")]
+
+    result = {"pollers": args.pollers, "cores": args.cores, "paths": paths}
+    for label, url in (("sync", args.sync_url), ("async", args.async_url)):
+        # 연결/캐시 준비 (결과에서 제외)
+        await run(url, paths, token, min(args.pollers, 50), 2, 0)
+        result[label] = await run(url, paths, token, args.pollers, args.seconds, args.think_ms)
+        result[label]["rps_per_core"] = round(result[label]["rps"] / args.cores, 1)
+    result["speedup"] = round(result["async"]["rps"] / result["sync"]["rps"], 2) if result["sync"]["rps"] else None
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
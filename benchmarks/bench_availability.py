@@ -0,0 +1,124 @@
+"""예약 가능 시간 계산 벤치마크
+
+예약 개수에 따른 compute_available_times 지연 시간과,
+기존 방식(시간 슬롯마다 find_one)의 Mongo 쿼리 수를 비교합니다.
+--mock: mongomock에 예약을 넣고 예약 페이지 한 번의 시간표 계산을 기존 방식과 비교 (쿼리 실행 포함)
+
+    python benchmarks/bench_availability.py
+    python benchmarks/bench_availability.py --mock --reservations 2000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from availability import (  # noqa: E402
+    availability_window, compute_available_times, get_available_times, in_blackout, slot_duration, slot_keys,
+)
+from loadtest import install_mocks, percentile  # noqa: E402
+
+REPEAT = 200
+
+
+# 7일 구간 안에 겹치지 않는 임의의 예약 n개 생성
+def make_reservations(now, duration, n):
+    window_start, window_end = availability_window(now, duration)
+    hours = int((window_end - window_start).total_seconds() // 3600)
+    starts = random.sample(range(hours), min(n, hours))
+    return [(window_start + timedelta(hours=h), window_start + timedelta(hours=h) + duration)
+            for h in starts]
+
+
+# 기존 구현이 한 번의 페이지 조회에서 실행하던 find_one 횟수 (후보 시간 슬롯 수와 같음)
+def legacy_query_count(now, duration):
+    result = compute_available_times([], duration, now)
+    return sum(len(slots) for slots in result.values())
+
+
+# 기존 구현 (시간 슬롯마다 겹치는 예약을 find_one으로 확인)
+def legacy_available_times(db, laundry, now):
+    duration = slot_duration(laundry)
+    first_day = datetime(now.year, now.month, now.day)
+    available_times = {}
+    for day_offset in range(7):
+        day = first_day + timedelta(days=day_offset)
+        slots = available_times[day.strftime("%Y-%m-%d")] = []
+        for hour in range(24):
+            check_time = day + timedelta(hours=hour)
+            if check_time < now or in_blackout(check_time):
+                continue
+            if not db.use.find_one({"laundry_id": laundry["_id"],
+                                    "start_time": {"$lt": check_time + duration},
+                                    "end_time": {"$gt": check_time}}):
+                slots.append(check_time.strftime("%H:%M"))
+    return available_times
+
+
+# 기기 2대(세탁기/건조기)에 앞으로 7일 동안의 예약 reservations건 + 지난 예약을 넣고 페이지당 시간 비교
+def run_mock(reservations, repeat):
+    install_mocks()
+    import pymongo
+
+    db = pymongo.MongoClient()["jungdry_bench"]
+    campus_id = db.campus.insert_one({"email": "campus@example.com"}).inserted_id
+    now = datetime.now()
+    print(f"{'type':<7}{'reservations':>14}{'legacy p50(ms)':>16}{'new p50(ms)':>13}{'queries(new/old)':>20}")
+    for type_name in ("washer", "dryer"):
+        laundry = {"campus_id": campus_id, "type": type_name, "name": type_name}
+        laundry["_id"] = db.laundry.insert_one(dict(laundry)).inserted_id
+        duration = slot_duration(laundry)
+        upcoming = make_reservations(now, duration, 40)
+        past = [(now - timedelta(hours=(i + 1) * 2), now - timedelta(hours=(i + 1) * 2) + duration)
+                for i in range(reservations)]
+        db.use.insert_many([
+            {"campus_id": campus_id, "laundry_id": laundry["_id"], "start_time": start, "end_time": end,
+             "slots": slot_keys(start, end)}
+            for start, end in upcoming + past
+        ])
+        assert legacy_available_times(db, laundry, now) == get_available_times(db, laundry, now)
+
+        timings = {"legacy": [], "new": []}
+        for _ in range(repeat):
+            for name, fn in (("legacy", legacy_available_times), ("new", get_available_times)):
+                t0 = time.perf_counter()
+                fn(db, laundry, now)
+                timings[name].append((time.perf_counter() - t0) * 1000)
+        print(f"{type_name:<7}{len(upcoming) + len(past):>14}{percentile(sorted(timings['legacy']), 50):>16.2f}"
+              f"{percentile(sorted(timings['new']), 50):>13.2f}{'1/' + str(legacy_query_count(now, duration)):>20}")
+
+
+def main():
+    now = datetime.now()
+    print(f"{'type':<7}{'reservations':>14}{'mean(us)':>12}{'p95(us)':>12}{'queries(new/old)':>20}")
+    for type_name, hours in (("washer", 1), ("dryer", 2)):
+        duration = timedelta(hours=hours)
+        old_queries = legacy_query_count(now, duration)
+        for n in (0, 10, 50, 100, 200):
+            intervals = make_reservations(now, duration, n)
+            samples = []
+            for _ in range(REPEAT):
+                t0 = time.perf_counter()
+                compute_available_times(intervals, duration, now)
+                samples.append((time.perf_counter() - t0) * 1e6)
+            samples.sort()
+            mean = sum(samples) / len(samples)
+            p95 = samples[int(len(samples) * 0.95) - 1]
+            print(f"{type_name:<7}{len(intervals):>14}{mean:>12.1f}{p95:>12.1f}{'1/' + str(old_queries):>20}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mock", action="store_true", help="mongomock으로 쿼리 포함 비교")
+    parser.add_argument("--reservations", type=int, default=2000, help="기기당 지난 예약 수 (--mock)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    random.seed(0)
+    if args.mock:
+        run_mock(args.reservations, args.repeat)
+    else:
+        main()
@@ -0,0 +1,103 @@
+"""로그인 폭주 중 /index 지연 시간 벤치마크
+
+1단계에서는 /index 폴링만, 2단계에서는 같은 폴링에 잘못된 비밀번호 로그인 폭주를 더해
+/index 지연 시간이 유지되는지와 로그인 응답 분포(429/503)를 확인합니다.
+
+    python benchmarks/bench_login_storm.py --mock
+    python benchmarks/bench_login_storm.py --pollers 8 --attackers 64 --seconds 15
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from loadtest import install_mocks, percentile, seed  # noqa: E402
+
+
+def run_phase(web, tokens, users, pollers, attackers, seconds):
+    lock = threading.Lock()
+    index_ms = []
+    login_status = Counter()
+    deadline = time.monotonic() + seconds
+
+    def poll(worker_id):
+        client = web.app.test_client()
+        client.set_cookie("access_token_cookie", tokens[worker_id % len(tokens)])
+        while time.monotonic() < deadline:
+            t0 = time.perf_counter()
+            client.get("/index")
+            elapsed = (time.perf_counter() - t0) * 1000
+            with lock:
+                index_ms.append(elapsed)
+
+    def attack(worker_id):
+        client = web.app.test_client()
+        rng = random.Random(worker_id)
+        while time.monotonic() < deadline:
+            # 여러 IP에서 여러 계정으로 틀린 비밀번호 시도
+            response = client.post(
+                "/login",
+                data={"email": f"user{rng.randrange(users)}@example.com", "password": "wrong"},
+                environ_base={"REMOTE_ADDR": f"10.0.{worker_id % 256}.{rng.randrange(256)}"},
+            )
+            with lock:
+                login_status[response.status_code] += 1
+
+    with ThreadPoolExecutor(max_workers=pollers + attackers) as pool:
+        futures = [pool.submit(poll, i) for i in range(pollers)]
+        futures += [pool.submit(attack, i) for i in range(attackers)]
+        for future in futures:
+            future.result()
+
+    index_ms.sort()
+    return {
+        "index_requests": len(index_ms),
+        "index_p50_ms": round(percentile(index_ms, 50), 2),
+        "index_p95_ms": round(percentile(index_ms, 95), 2),
+        "index_p99_ms": round(percentile(index_ms, 99), 2),
+        "login_status": dict(login_status),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--pollers", type=int, default=8)
+    parser.add_argument("--attackers", type=int, default=64)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--mock", action="store_true", help="mongomock + fakeredis 사용")
+    args = parser.parse_args()
+
+    if args.mock:
+        install_mocks()
+    os.environ.setdefault("MONGO_DB", "jungdry_bench")
+
+    import app as web
+    import catalog
+    from flask_jwt_extended import create_access_token
+
+    web.app.config["WTF_CSRF_ENABLED"] = False
+    user_ids, _ = seed(web.db, args.users, 14, 0)
+    catalog.drop_cache()
+    with web.app.app_context():
+        tokens = [create_access_token(identity=str(user_id)) for user_id in user_ids]
+
+    result = {
+        "baseline": run_phase(web, tokens, args.users, args.pollers, 0, args.seconds),
+        "login_storm": run_phase(web, tokens, args.users, args.pollers, args.attackers, args.seconds),
+    }
+    print(json.dumps(result, indent=2))
+    sys.stdout.flush()
+    os._exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""리프레시 토큰 세션 처리량 벤치마크 (기기별 세션 + 토큰 교체)
+
+- store  : Redis 세션 저장소 직접 호출 (생성 / 교체 / 기기 하나 로그아웃 / 전체 로그아웃 초당 처리량)
+- app    : POST /api/refresh (JWT 검증 + 토큰 발급 + 세션 교체, 응답 쿠키로 다음 요청)
+
+    python benchmarks/bench_refresh.py --mock
+    python benchmarks/bench_refresh.py --users 5000 --devices 3 --requests 20000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from loadtest import install_mocks, percentile  # noqa: E402
+
+
+def timed_ops(fn, items):
+    samples = []
+    t0 = time.perf_counter()
+    for item in items:
+        s0 = time.perf_counter()
+        fn(item)
+        samples.append((time.perf_counter() - s0) * 1000)
+    elapsed = time.perf_counter() - t0
+    samples.sort()
+    return {
+        "ops": len(items),
+        "ops_per_sec": round(len(items) / elapsed) if elapsed else None,
+        "p50_ms": round(percentile(samples, 50), 3),
+        "p95_ms": round(percentile(samples, 95), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--devices", type=int, default=3, help="사용자당 로그인한 기기 수")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--mock", action="store_true", help="mongomock + fakeredis 사용")
+    args = parser.parse_args()
+
+    if args.mock:
+        install_mocks()
+    os.environ.setdefault("MONGO_DB", "jungdry_bench")
+
+    import app as web
+    from flask_jwt_extended import create_refresh_token
+    from redis_service import (create_session, redis_client, revoke_all_sessions, revoke_session,
+                               rotate_session)
+
+    web.app.config["WTF_CSRF_ENABLED"] = False
+    redis_client.flushdb()
+    rng = random.Random(0)
+    user_ids = [uuid.uuid4().hex[:24] for _ in range(args.users)]
+
+    # store: 토큰 문자열은 미리 만들어 두고 Redis 작업 시간만 측정
+    sessions = {}
+    creates = [(user_id, uuid.uuid4().hex, uuid.uuid4().hex * 4) for user_id in user_ids for _ in range(args.devices)]
+    result = {"users": args.users, "devices": args.devices, "store": {}}
+    result["store"]["create"] = timed_ops(lambda c: create_session(c[0], c[1], c[2], "bench"), creates)
+    for user_id, session_id, token in creates:
+        sessions[(user_id, session_id)] = token
+
+    keys = list(sessions)
+    rotations = [rng.choice(keys) for _ in range(args.requests)]
+
+    def rotate(key):
+        new_token = uuid.uuid4().hex * 4
+        rotate_session(key[0], key[1], sessions[key], new_token)
+        sessions[key] = new_token
+
+    result["store"]["rotate"] = timed_ops(rotate, rotations)
+    result["store"]["revoke_one"] = timed_ops(lambda key: revoke_session(*key), keys[::args.devices])
+    result["store"]["revoke_all"] = timed_ops(revoke_all_sessions, user_ids)
+
+    # app: 기기마다 테스트 클라이언트 하나, 응답의 새 리프레시 쿠키로 다음 요청
+    clients = []
+    with web.app.app_context():
+        for user_id in user_ids[:min(len(user_ids), 200)]:
+            session_id = uuid.uuid4().hex
+            token = create_refresh_token(identity=user_id, additional_claims={"sid": session_id})
+            create_session(user_id, session_id, token, "bench")
+            client = web.app.test_client()
+            client.set_cookie("refresh_token_cookie", token)
+            clients.append(client)
+
+    statuses = {}
+
+    def refresh(client):
+        response = client.post("/api/refresh")
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    result["app_refresh"] = timed_ops(refresh, [rng.choice(clients) for _ in range(args.requests)])
+    result["app_refresh"]["status"] = statuses
+    print(json.dumps(result, indent=2))
+    sys.stdout.flush()
+    os._exit(0)
+
+
+if __name__ == "__main__":
+    main()
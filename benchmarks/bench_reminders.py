@@ -0,0 +1,102 @@
+"""예약 알림 발송 처리량 벤치마크 (지연 큐 + 배치 발송)
+
+보낼 시각이 지난 알림 수만 건을 큐에 넣고, 배치 크기별로 큐가 빌 때까지 발송하는 데 걸린 시간을 비교합니다.
+발송은 FakeTransport (요청 한 번에 --latency-ms 만큼 대기, --failure-rate 비율로 일시 오류 → 재시도)
+
+    python benchmarks/bench_reminders.py --mock
+    python benchmarks/bench_reminders.py --mock --reminders 100000 --batch-sizes 1,100,500 --latency-ms 30
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from loadtest import install_mocks, seed  # noqa: E402
+
+
+# 이미 끝난 예약 reminders/2건 → 알림 reminders건 (시작 + 종료), 모두 보낼 시각이 지난 상태
+def enqueue(user_ids, laundries, count):
+    from bson.objectid import ObjectId
+
+    from notifications import schedule_reminders
+
+    base = datetime.now() - timedelta(days=1)
+    items = []
+    for i in range(count // 2):
+        laundry = laundries[i % len(laundries)]
+        start = base + timedelta(minutes=i % 600)
+        items.append(({"_id": ObjectId(), "user_id": user_ids[i % len(user_ids)],
+                       "start_time": start, "end_time": start + timedelta(hours=1)}, laundry))
+
+    t0 = time.perf_counter()
+    for offset in range(0, len(items), 1000):
+        schedule_reminders(items[offset:offset + 1000], now=base - timedelta(hours=1))
+    return time.perf_counter() - t0
+
+
+def drain(db, transport, batch_size):
+    from notifications import REMINDER_QUEUE_KEY, dispatch_due
+    from redis_service import redis_client
+
+    totals = {"batches": 0, "sent": 0, "retried": 0, "dropped": 0}
+    now = time.time()
+    t0 = time.perf_counter()
+    while redis_client.zcard(REMINDER_QUEUE_KEY):
+        stats = dispatch_due(db, transport, now=now, batch_size=batch_size)
+        if not stats["claimed"]:
+            # 남은 것은 재시도 대기 중인 알림: 가상 시각을 앞당겨서 바로 다시 꺼냄
+            now += 60
+            continue
+        totals["batches"] += 1
+        for key in ("sent", "retried", "dropped"):
+            totals[key] += stats[key]
+    totals["seconds"] = round(time.perf_counter() - t0, 2)
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--reminders", type=int, default=50000)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--devices", type=int, default=2, help="사용자당 기기 토큰 수")
+    parser.add_argument("--batch-sizes", default="1,100,500")
+    parser.add_argument("--latency-ms", type=float, default=20, help="발송 요청 한 번의 왕복 시간")
+    parser.add_argument("--failure-rate", type=float, default=0.01)
+    parser.add_argument("--mock", action="store_true", help="mongomock + fakeredis 사용")
+    args = parser.parse_args()
+
+    if args.mock:
+        install_mocks()
+    from pymongo import MongoClient
+
+    from notifications import FakeTransport
+    from redis_service import redis_client
+
+    client = MongoClient(os.getenv("MONGO_URI", "mongodb://localhost:27017/"))
+    db = client[os.getenv("MONGO_DB", "jungdry_bench")]
+    user_ids, laundries = seed(db, args.users, 14, 0)
+    for user_id in user_ids:
+        db.user.update_one({"_id": user_id},
+                           {"$set": {"push_tokens": [f"token-{user_id}-{d}" for d in range(args.devices)]}})
+
+    result = {"reminders": args.reminders, "latency_ms": args.latency_ms, "runs": {}}
+    for batch_size in [int(size) for size in args.batch_sizes.split(",")]:
+        redis_client.flushdb()
+        enqueue_seconds = enqueue(user_ids, laundries, args.reminders)
+        transport = FakeTransport(latency_ms=args.latency_ms, failure_rate=args.failure_rate, seed=0)
+        run = drain(db, transport, batch_size)
+        run["enqueue_per_sec"] = round(args.reminders / enqueue_seconds)
+        run["dispatch_per_sec"] = round(args.reminders / run["seconds"]) if run["seconds"] else None
+        run["transport_requests"] = transport.requests
+        run["delivered_tokens"] = transport.delivered
+        result["runs"][str(batch_size)] = run
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""서버 모드 비교 벤치마크 (개발 서버 vs gunicorn)
+
+실행 중인 서버에 HTTP로 /index 요청을 동시에 보내 처리량과 지연 시간을 측정합니다.
+
+    # 1) 개발 서버
+    python app.py
+    python benchmarks/bench_server.py --url http://127.0.0.1:5001 --label dev
+
+    # 2) 운영 서버
+    gunicorn -c gunicorn.conf.py app:app
+    python benchmarks/bench_server.py --url http://127.0.0.1:5001 --label gunicorn
+"""
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+def percentile(samples, p):
+    return samples[min(len(samples) - 1, int(len(samples) * p / 100))] if samples else None
+
+
+def login(url, email, password):
+    session = requests.Session()
+    # 로그인 폼의 CSRF 토큰 추출
+    page = session.get(f"{url}/login").text
+    marker = 'name="csrf_token" value="'
+    start = page.find(marker)
+    csrf_token = page[start + len(marker):page.find('"', start + len(marker))] if start >= 0 else ""
+    session.post(f"{url}/login", data={"email": email, "password": password, "csrf_token": csrf_token},
+                 allow_redirects=False)
+    return session.cookies.get("access_token_cookie")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:5001")
+    parser.add_argument("--path", default="/index")
+    parser.add_argument("--email", default="user1@example.com")
+    parser.add_argument("--password", default="password123")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--label", default="server")
+    args = parser.parse_args()
+
+    token = login(args.url, args.email, args.password)
+    if not token:
+        raise SystemExit("로그인 실패: 테스트 계정을 확인하세요.")
+
+    lock = threading.Lock()
+    samples = []
+    errors = [0]
+    deadline = time.monotonic() + args.seconds
+
+    def worker(_):
+        session = requests.Session()
+        session.cookies.set("access_token_cookie", token)
+        while time.monotonic() < deadline:
+            t0 = time.perf_counter()
+            try:
+                ok = session.get(f"{args.url}{args.path}", allow_redirects=False).status_code == 200
+            except requests.RequestException:
+                ok = False
+            elapsed = (time.perf_counter() - t0) * 1000
+            with lock:
+                samples.append(elapsed)
+                if not ok:
+                    errors[0] += 1
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(worker, range(args.concurrency)))
+    elapsed = time.monotonic() - started
+
+    samples.sort()
+    result = {
+        "label": args.label,
+        "path": args.path,
+        "concurrency": args.concurrency,
+        "requests": len(samples),
+        "errors": errors[0],
+        "rps": round(len(samples) / elapsed, 1),
+        "p50_ms": round(percentile(samples, 50), 2),
+        "p95_ms": round(percentile(samples, 95), 2),
+        "p99_ms": round(percentile(samples, 99), 2),
+    }
+    print(json.dumps(result, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""사용률 히트맵 조회 벤치마크 (집계 컬렉션 vs 예약 전체 조회)
+
+지난 예약을 채운 뒤 요일 × 시간 히트맵을 두 가지 방법으로 계산해 시간을 비교합니다.
+
+- rollup : usage_daily 집계 문서만 읽기 (/api/stats)
+- scan   : 기간 안의 예약을 모두 읽어서 계산
+
+    python benchmarks/bench_stats.py --mock
+    python benchmarks/bench_stats.py --machines 100 --reservations 500000 --days 180
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from loadtest import install_mocks, percentile, seed  # noqa: E402
+
+
+# 비교 기준: 예약을 모두 읽어서 요일 × 시간 점유 슬롯 수 계산
+def scan_heatmap(db, campus_id, start, end):
+    from availability import covered_slots
+
+    rows = defaultdict(lambda: [0] * 24)
+    for r in db.use.find({"campus_id": campus_id, "start_time": {"$gte": start, "$lt": end}},
+                         {"_id": 0, "start_time": 1, "end_time": 1}):
+        for day, slot in covered_slots(r["start_time"], r["end_time"]):
+            rows[day.weekday()][slot] += 1
+    return rows
+
+
+def timed_runs(fn, runs):
+    samples = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    return {"p50_ms": round(percentile(samples, 50), 2), "p95_ms": round(percentile(samples, 95), 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--machines", type=int, default=14)
+    parser.add_argument("--reservations", type=int, default=20000)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--mock", action="store_true", help="mongomock + fakeredis 사용")
+    args = parser.parse_args()
+
+    if args.mock:
+        install_mocks()
+    from pymongo import MongoClient
+
+    from schema import ensure_indexes
+    from usage_stats import rebuild_usage, usage_heatmap
+
+    client = MongoClient(os.getenv("MONGO_URI", "mongodb://localhost:27017/"))
+    db = client[os.getenv("MONGO_DB", "jungdry_bench")]
+    _, laundries = seed(db, 10, args.machines, args.reservations)
+    ensure_indexes(db)
+
+    t0 = time.perf_counter()
+    documents = rebuild_usage(db)
+    rebuild_ms = (time.perf_counter() - t0) * 1000
+
+    campus_id = laundries[0]["campus_id"]
+    laundry_ids = [laundry["_id"] for laundry in laundries]
+    end = datetime.combine(datetime.now().date(), datetime.min.time()) + timedelta(days=1)
+    start = end - timedelta(days=args.days)
+
+    result = {
+        "reservations": args.reservations,
+        "usage_documents": documents,
+        "rebuild_ms": round(rebuild_ms, 1),
+        "rollup": timed_runs(lambda: usage_heatmap(db, campus_id, start, end, laundry_ids), args.runs),
+        "scan": timed_runs(lambda: scan_heatmap(db, campus_id, start, end), args.runs),
+    }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
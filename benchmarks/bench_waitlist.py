@@ -0,0 +1,134 @@
+"""인기 시간대 재시도 비용 비교 (계속 다시 예약하기 vs 대기 등록)
+
+이미 예약된 시간 하나를 여러 사용자가 원하고, 예약한 사람이 중간에 취소하는 상황을
+가상 시간으로 재현해서 요청 수와 재예약까지 걸린 시간을 비교합니다.
+
+- polling  : 각 사용자가 --poll-interval 초마다 POST /reserve 를 다시 보냄 (성공하거나 시간이 끝날 때까지)
+- waitlist : 실패 후 대기 등록 한 번, 이후 --status-interval 초마다 GET /api/me/waitlist 로 순번만 확인
+             (취소 요청 안에서 맨 앞 대기자가 바로 예약됨)
+
+    python benchmarks/bench_waitlist.py --mock
+    python benchmarks/bench_waitlist.py --users 200 --duration 1800 --poll-interval 5
+"""
+import argparse
+import json
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from loadtest import install_mocks, seed  # noqa: E402
+
+
+def run(web, clients, holder, laundry_id, start, args, mode):
+    web.db.use.delete_many({"laundry_id": laundry_id, "start_time": start})
+    web.redis_client.flushdb()
+    form = {"reserve_date": start.strftime("%Y-%m-%d"), "reserve_time": start.strftime("%H:%M")}
+    holder.post(f"/reserve/{laundry_id}", data=form)
+    holder_reservation = web.db.use.find_one({"laundry_id": laundry_id, "start_time": start})
+
+    rng = random.Random(args.seed)
+    cancel_at = rng.uniform(args.duration * 0.2, args.duration * 0.8)
+    requests = {"reserve": 0, "waitlist": 0, "status": 0, "cancel": 0}
+    next_at = [rng.uniform(0, args.poll_interval) for _ in clients]
+    done = [False] * len(clients)
+    rebooked_at = None
+
+    # 처음 한 번은 모두 예약을 시도해서 실패함 (waitlist 모드는 바로 대기 등록)
+    for client in clients:
+        client.post(f"/reserve/{laundry_id}", data=form)
+        requests["reserve"] += 1
+        if mode == "waitlist":
+            client.post(f"/waitlist/{laundry_id}", data=form)
+            requests["waitlist"] += 1
+
+    interval = args.poll_interval if mode == "polling" else args.status_interval
+    t = 0.0
+    cancelled = False
+    while t < args.duration:
+        if not cancelled and t >= cancel_at:
+            holder.get(f"/cancel_reservation/{holder_reservation['_id']}")
+            requests["cancel"] += 1
+            cancelled = True
+            if mode == "waitlist" and web.db.use.find_one({"laundry_id": laundry_id, "start_time": start}):
+                rebooked_at = t
+
+        for i, client in enumerate(clients):
+            if done[i] or next_at[i] > t:
+                continue
+            next_at[i] = t + interval
+            if mode == "polling":
+                response = client.post(f"/reserve/{laundry_id}", data=form)
+                requests["reserve"] += 1
+                if response.status_code == 302:
+                    done[i] = True
+                    rebooked_at = rebooked_at if rebooked_at is not None else t
+            else:
+                response = client.get("/api/me/waitlist")
+                requests["status"] += 1
+                if not response.get_json()["waitlist"]:
+                    done[i] = True
+        t += 1.0
+
+    winners = web.db.use.count_documents({"laundry_id": laundry_id, "start_time": start,
+                                          "user_id": {"$ne": holder_reservation["user_id"]}})
+    return {
+        "requests": requests,
+        "total_requests": sum(requests.values()),
+        "rebooked": winners,
+        "cancel_at_s": round(cancel_at, 1),
+        "rebook_delay_s": None if rebooked_at is None else round(rebooked_at - cancel_at, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=50, help="같은 시간을 원하는 사용자 수")
+    parser.add_argument("--machines", type=int, default=14)
+    parser.add_argument("--duration", type=int, default=600, help="가상 시간 (초)")
+    parser.add_argument("--poll-interval", type=float, default=10, help="polling 모드 재시도 간격 (초)")
+    parser.add_argument("--status-interval", type=float, default=60, help="waitlist 모드 순번 확인 간격 (초)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--mock", action="store_true", help="mongomock + fakeredis 사용")
+    args = parser.parse_args()
+
+    if args.mock:
+        install_mocks()
+    os.environ.setdefault("MONGO_DB", "jungdry_bench")
+
+    import app as web
+    import catalog
+    from flask_jwt_extended import create_access_token
+
+    web.app.config["WTF_CSRF_ENABLED"] = False
+    user_ids, laundries = seed(web.db, args.users + 1, args.machines, 0)
+    catalog.drop_cache()
+    laundry_id = next(laundry["_id"] for laundry in laundries if laundry["type"] == "washer")
+    start = datetime.now().replace(hour=20, minute=0, second=0, microsecond=0) + timedelta(days=1)
+
+    def client_for(user_id):
+        client = web.app.test_client()
+        with web.app.app_context():
+            client.set_cookie("access_token_cookie", create_access_token(identity=str(user_id)))
+        return client
+
+    holder = client_for(user_ids[0])
+    clients = [client_for(user_id) for user_id in user_ids[1:]]
+
+    result = {
+        "users": args.users,
+        "polling": run(web, clients, holder, laundry_id, start, args, "polling"),
+        "waitlist": run(web, clients, holder, laundry_id, start, args, "waitlist"),
+    }
+    result["request_reduction"] = round(
+        1 - result["waitlist"]["total_requests"] / result["polling"]["total_requests"], 4)
+    print(json.dumps(result, indent=2))
+    sys.stdout.flush()
+    os._exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+"""예약 흐름 부하 테스트
+
+실제 Flask 라우트(app.py)에 기숙사 트래픽을 흉내 낸 요청을 보내고
+엔드포인트별 처리량, p50/p95/p99 지연 시간, 요청당 Mongo/Redis 왕복 횟수를 JSON으로 저장합니다.
+
+    # 로컬 mongod/redis (MONGO_URI, REDIS_URL) - MONGO_DB 데이터베이스를 새로 채움 (이름이 _bench로 끝나야 함)
+    python benchmarks/loadtest.py --users 500 --machines 14 --reservations 20000 --seconds 30
+
+    # mongomock + fakeredis (Mongo 왕복 횟수는 측정되지 않음)
+    python benchmarks/loadtest.py --mock
+
+    # 이전 결과와 비교
+    python benchmarks/loadtest.py --out after.json --compare before.json
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+# 요청별 왕복 횟수 집계 (요청을 처리하는 스레드 기준, 백그라운드 스레드는 제외)
+_local = threading.local()
+
+
+def _count(kind):
+    counts = getattr(_local, "counts", None)
+    if counts is not None:
+        counts[kind] += 1
+
+
+def install_counters():
+    from pymongo import monitoring
+    import redis.client
+
+    class MongoCounter(monitoring.CommandListener):
+        def started(self, event):
+            _count("mongo")
+
+        def succeeded(self, event):
+            pass
+
+        def failed(self, event):
+            pass
+
+    monitoring.register(MongoCounter())
+
+    execute_command = redis.client.Redis.execute_command
+    pipeline_execute = redis.client.Pipeline.execute
+
+    def counted_execute_command(self, *args, **kwargs):
+        _count("redis")
+        return execute_command(self, *args, **kwargs)
+
+    def counted_pipeline_execute(self, *args, **kwargs):
+        _count("redis")
+        return pipeline_execute(self, *args, **kwargs)
+
+    redis.client.Redis.execute_command = counted_execute_command
+    redis.client.Pipeline.execute = counted_pipeline_execute
+
+
+def install_mocks():
+    import mongomock
+    import fakeredis
+    import pymongo
+    import redis
+    from mongomock.store import ServerStore
+
+    # 모든 클라이언트가 같은 데이터를 보도록 저장소 공유 (gunicorn 워커가 fork 후 클라이언트를 새로 만들어도 유지)
+    store = ServerStore()
+    server = fakeredis.FakeServer()
+    pymongo.MongoClient = lambda *args, **kwargs: mongomock.MongoClient(*args, _store=store, **kwargs)
+    redis.Redis.from_url = classmethod(lambda cls, url, **kwargs: fakeredis.FakeRedis(server=server))
+
+
+# seed()가 기존 데이터를 지우므로 이름이 이렇게 끝나는 데이터베이스만 허용 (MONGO_DB=jungdry 같은 운영 DB 보호)
+BENCH_DB_SUFFIX = "_bench"
+
+
+# 사용자/기기/과거 예약 생성 (insert_many 배치)
+def seed(db, users, machines, reservations, batch_size=5000):
+    import bcrypt
+    from availability import slot_keys
+
+    if not db.name.endswith(BENCH_DB_SUFFIX):
+        raise SystemExit(f"벤치마크 전용 데이터베이스가 아닙니다: {db.name} "
+                         f"(MONGO_DB를 {BENCH_DB_SUFFIX}로 끝나는 이름으로 지정하세요)")
+    for name in ("user", "campus", "laundry", "use"):
+        db[name].delete_many({})
+    campus_id = db.campus.insert_one({"email": "campus@example.com", "status": "active"}).inserted_id
+
+    # 모든 사용자가 같은 비밀번호를 쓰므로 해시는 한 번만 계산
+    hashed_pw = bcrypt.hashpw(b"password123", bcrypt.gensalt())
+    for offset in range(0, users, batch_size):
+        db.user.insert_many([
+            {"email": f"user{i}@example.com", "pw": hashed_pw, "phone": "01012341234"}
+            for i in range(offset, min(users, offset + batch_size))
+        ])
+    user_ids = [u["_id"] for u in db.user.find({}, {"_id": 1})]
+
+    db.laundry.insert_many([
+        {"campus_id": campus_id, "id": i // 2 + 1, "type": "washer" if i % 2 == 0 else "dryer",
+         "name": f"{'세탁기' if i % 2 == 0 else '건조기'} {i // 2 + 1}"}
+        for i in range(machines)
+    ])
+    laundries = list(db.laundry.find())
+
+    # 기기별로 현재 시각 이전 시간대를 거슬러 올라가며 겹치지 않게 배치
+    now = datetime.now().replace(minute=0, second=0, microsecond=0)
+    docs = []
+    for k in range(reservations):
+        laundry = laundries[k % len(laundries)]
+        hours = 2 if laundry["type"] == "dryer" else 1
+        start = now - timedelta(hours=(k // len(laundries) + 1) * hours)
+        end = start + timedelta(hours=hours)
+        docs.append({
+            "campus_id": campus_id, "laundry_id": laundry["_id"], "user_id": random.choice(user_ids),
+            "status": "finished", "start_time": start, "end_time": end,
+            "slots": slot_keys(start, end), "created_at": start,
+        })
+        if len(docs) >= batch_size:
+            db.use.insert_many(docs, ordered=False)
+            docs = []
+    if docs:
+        db.use.insert_many(docs, ordered=False)
+    return user_ids, laundries
+
+
+def percentile(samples, p):
+    if not samples:
+        return None
+    return round(samples[min(len(samples) - 1, int(len(samples) * p / 100))], 3)
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.trips = defaultdict(lambda: defaultdict(int))
+
+    def call(self, name, fn):
+        _local.counts = defaultdict(int)
+        t0 = time.perf_counter()
+        try:
+            response = fn()
+            ok = response.status_code < 400
+        except Exception:
+            ok = False
+        elapsed = (time.perf_counter() - t0) * 1000
+        counts, _local.counts = _local.counts, None
+        with self.lock:
+            self.samples[name].append(elapsed)
+            if not ok:
+                self.errors[name] += 1
+            for kind, n in counts.items():
+                self.trips[name][kind] += n
+
+    def report(self, seconds, mongo_measured):
+        endpoints = {}
+        for name, samples in sorted(self.samples.items()):
+            samples.sort()
+            count = len(samples)
+            endpoints[name] = {
+                "requests": count,
+                "errors": self.errors[name],
+                "throughput_rps": round(count / seconds, 2),
+                "p50_ms": percentile(samples, 50),
+                "p95_ms": percentile(samples, 95),
+                "p99_ms": percentile(samples, 99),
+                "mongo_per_request": round(self.trips[name]["mongo"] / count, 2) if mongo_measured else None,
+                "redis_per_request": round(self.trips[name]["redis"] / count, 2),
+            }
+        total = sum(len(s) for s in self.samples.values())
+        return {"endpoints": endpoints, "total_requests": total, "total_rps": round(total / seconds, 2)}
+
+
+# 시나리오별 요청 (가중치: 대시보드 새로고침이 가장 많음)
+SCENARIOS = [
+    ("GET /index", 50),
+    ("GET /reserve", 20),
+    ("GET /my_reservations", 15),
+    ("POST /login", 5),
+    ("POST /reserve (burst)", 10),
+]
+
+
+def run(args):
+    if args.mock:
+        install_mocks()
+    install_counters()
+    os.environ.setdefault("MONGO_DB", "jungdry_bench")
+    # 모든 요청이 같은 IP에서 오므로 IP별 로그인 제한은 사실상 끔
+    os.environ.setdefault("LOGIN_IP_BURST", "1000000")
+    os.environ.setdefault("LOGIN_IP_PER_SEC", "1000000")
+
+    import app as web
+    import catalog
+    import occupancy
+    from flask_jwt_extended import create_access_token
+
+    web.app.config["WTF_CSRF_ENABLED"] = False
+    web.app.config["TESTING"] = True
+
+    random.seed(args.seed)
+    user_ids, laundries = seed(web.db, args.users, args.machines, args.reservations)
+    catalog.drop_cache()
+    occupancy.rebuild_occupancy(web.db)
+
+    with web.app.app_context():
+        tokens = [create_access_token(identity=str(user_id)) for user_id in user_ids]
+
+    # 몰리는 예약: 모든 사용자가 내일 저녁 같은 기기/같은 시간을 노림
+    burst_laundry = laundries[0]
+    burst_date = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
+    burst_hours = iter(range(10 ** 9))
+    burst_lock = threading.Lock()
+
+    def next_burst_time():
+        # 요청 20개마다 다음 시간대로 이동 (같은 시간대에 여러 명이 동시에 몰림)
+        with burst_lock:
+            n = next(burst_hours)
+        return f"{6 + (n // 20) % 18:02d}:00"
+
+    recorder = Recorder()
+    deadline = time.monotonic() + args.seconds
+
+    def worker(worker_id):
+        client = web.app.test_client()
+        rng = random.Random(args.seed + worker_id)
+        names = [name for name, _ in SCENARIOS]
+        weights = [weight for _, weight in SCENARIOS]
+        while time.monotonic() < deadline:
+            i = rng.randrange(len(user_ids))
+            client.set_cookie("access_token_cookie", tokens[i])
+            name = rng.choices(names, weights)[0]
+            if name == "GET /index":
+                recorder.call(name, lambda: client.get("/index"))
+            elif name == "GET /reserve":
+                laundry = rng.choice(laundries)
+                recorder.call(name, lambda: client.get(f"/reserve/{laundry['_id']}"))
+            elif name == "GET /my_reservations":
+                recorder.call(name, lambda: client.get("/my_reservations"))
+            elif name == "POST /login":
+                recorder.call(name, lambda: client.post("/login", data={
+                    "email": f"user{i}@example.com", "password": "password123"}))
+            else:
+                data = {"reserve_date": burst_date, "reserve_time": next_burst_time()}
+                recorder.call(name, lambda: client.post(f"/reserve/{burst_laundry['_id']}", data=data))
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(worker, range(args.concurrency)))
+    elapsed = time.monotonic() - started
+
+    result = {
+        "config": {
+            "users": args.users, "machines": args.machines, "reservations": args.reservations,
+            "concurrency": args.concurrency, "seconds": round(elapsed, 2), "mock": args.mock,
+            "started_at": datetime.now().isoformat(),
+        },
+        **recorder.report(elapsed, mongo_measured=not args.mock),
+    }
+    return result
+
+
+def print_result(result, baseline=None):
+    print(f"{'endpoint':<24}{'req':>8}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'mongo':>7}{'redis':>7}")
+    for name, e in result["endpoints"].items():
+        line = (f"{name:<24}{e['requests']:>8}{e['throughput_rps']:>9}{e['p50_ms']:>9}"
+                f"{e['p95_ms']:>9}{e['p99_ms']:>9}{str(e['mongo_per_request']):>7}{e['redis_per_request']:>7}")
+        old = (baseline or {}).get("endpoints", {}).get(name)
+        if old and old["p95_ms"]:
+            line += f"   p95 x{e['p95_ms'] / old['p95_ms']:.2f} vs baseline"
+        print(line)
+    print(f"total: {result['total_requests']} requests, {result['total_rps']} req/s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--machines", type=int, default=14)
+    parser.add_argument("--reservations", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--mock", action="store_true", help="mongomock + fakeredis 사용")
+    parser.add_argument("--out", default="loadtest_result.json")
+    parser.add_argument("--compare", help="비교할 이전 결과 JSON")
+    args = parser.parse_args()
+
+    result = run(args)
+    with open(args.out, "w") as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_result(result, baseline)
+    print(f"결과 저장: {args.out}")
+    # 백그라운드 스레드(pub/sub 구독 등)를 기다리지 않고 종료
+    sys.stdout.flush()
+    os._exit(0)
+
+
+if __name__ == "__main__":
+    main()
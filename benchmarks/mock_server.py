@@ -0,0 +1,69 @@
+"""mongomock + fakeredis로 앱 서버 실행 (로컬 mongod/redis 없이 bench_server.py 비교용)
+
+개발 서버(python app.py와 같은 debug 모드)나 gunicorn(gunicorn.conf.py 설정)으로 실행합니다.
+gunicorn 워커는 fork 시점의 데이터를 복사해서 쓰므로 Redis 캐시/요청 제한은 워커마다 따로입니다.
+
+    python benchmarks/mock_server.py dev
+    python benchmarks/bench_server.py --url http://127.0.0.1:5001 --label dev
+
+    python benchmarks/mock_server.py gunicorn
+    python benchmarks/bench_server.py --url http://127.0.0.1:5001 --label gunicorn
+"""
+import argparse
+import os
+import runpy
+import sys
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from loadtest import install_mocks, seed  # noqa: E402
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def run_gunicorn(app, port):
+    from gunicorn.app.base import BaseApplication
+
+    class MockServer(BaseApplication):
+        def load_config(self):
+            for name, value in runpy.run_path(os.path.join(ROOT, "gunicorn.conf.py")).items():
+                if name in self.cfg.settings and value is not None:
+                    self.cfg.set(name, value)
+            self.cfg.set("bind", f"127.0.0.1:{port}")
+
+        def load(self):
+            return app
+
+    MockServer().run()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("mode", choices=["dev", "gunicorn"])
+    parser.add_argument("--port", type=int, default=5001)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--machines", type=int, default=14)
+    parser.add_argument("--reservations", type=int, default=600)
+    args = parser.parse_args()
+
+    os.environ.setdefault("MONGO_DB", "jungdry_bench")
+    os.chdir(ROOT)
+    install_mocks()
+    import app as web
+    import catalog
+    import occupancy
+
+    seed(web.db, args.users, args.machines, args.reservations)
+    catalog.drop_cache()
+    occupancy.rebuild_occupancy(web.db)
+
+    if args.mode == "dev":
+        # python app.py와 같은 설정 (리로더는 프로세스를 다시 시작해서 가짜 DB를 잃으므로 끔)
+        web.app.run(host="127.0.0.1", port=args.port, debug=True, use_reloader=False)
+    else:
+        run_gunicorn(web.app, args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""예약 동시성 스트레스 테스트
+
+같은 기기의 겹치는 시간대에 수백 건의 예약을 동시에 요청하고,
+정확히 한 건만 성공하는지와 응답 시간 분포를 확인합니다.
+로컬 mongod가 필요합니다 (MONGO_URI, 기본 mongodb://localhost:27017/).
+
+    python benchmarks/stress_reservation.py --requests 500 --workers 100
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bson.objectid import ObjectId  # noqa: E402
+from pymongo import MongoClient  # noqa: E402
+
+from reservations import create_reservation  # noqa: E402
+from schema import ensure_indexes  # noqa: E402
+
+
+def percentile(samples, p):
+    return samples[min(len(samples) - 1, int(len(samples) * p / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=100)
+    parser.add_argument("--db", default="jungdry_stress")
+    args = parser.parse_args()
+
+    client = MongoClient(os.getenv("MONGO_URI", "mongodb://localhost:27017/"), maxPoolSize=args.workers)
+    db = client[args.db]
+    db.use.drop()
+    ensure_indexes(db)
+
+    # 건조기(2시간) 예약: 20시 시작과 21시 시작이 섞여 있어 모든 요청이 서로 겹침
+    campus_id = ObjectId()
+    laundry_id = ObjectId()
+    base = datetime.now().replace(hour=20, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    starts = [base + timedelta(hours=i % 2) for i in range(args.requests)]
+
+    def book(start):
+        t0 = time.perf_counter()
+        reservation = create_reservation(db, campus_id, laundry_id, ObjectId(), start, start + timedelta(hours=2))
+        return reservation is not None, (time.perf_counter() - t0) * 1000
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        results = list(pool.map(book, starts))
+    elapsed = time.perf_counter() - t0
+
+    winners = sum(1 for ok, _ in results if ok)
+    latencies = sorted(ms for _, ms in results)
+    stored = db.use.count_documents({"laundry_id": laundry_id})
+
+    print(f"requests={args.requests} workers={args.workers} elapsed={elapsed:.2f}s")
+    print(f"winners={winners} stored={stored}")
+    print(f"latency ms: p50={percentile(latencies, 50):.2f} p95={percentile(latencies, 95):.2f} "
+          f"p99={percentile(latencies, 99):.2f} max={latencies[-1]:.2f}")
+
+    client.drop_database(args.db)
+    if winners != 1 or stored != 1:
+        print("FAIL: 예약이 정확히 한 건이어야 합니다.")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+import os
+import threading
+import time
+
+from redis.exceptions import RedisError
+
+from redis_service import redis_client
+
+# 캠퍼스 / 세탁기·건조기 목록 프로세스 내 캐시 (캠퍼스별로 따로 보관)
+# - 대시보드는 자기 캠퍼스 기기만 읽으므로 전체 기기 수와 상관없이 비용이 같음
+# - TTL이 지나면 다시 조회
+# - 관리자가 기기를 변경하면 invalidate_catalog()가 버전을 올리고 Redis pub/sub으로 모든 워커에 알림
+CATALOG_TTL_SECONDS = int(os.getenv("CATALOG_TTL_SECONDS", 300))
+VERSION_KEY = "laundry_catalog:version"
+INVALIDATE_CHANNEL = "laundry_catalog:invalidate"
+# 캠퍼스를 고르지 않은 사용자에게 보여줄 캠퍼스 (없으면 가장 먼저 만든 캠퍼스)
+DEFAULT_CAMPUS_ID = os.getenv("DEFAULT_CAMPUS_ID")
+# 마지막으로 고른 캠퍼스를 기억하는 쿠키
+CAMPUS_COOKIE = "campus_id"
+CAMPUS_COOKIE_MAX_AGE = 60 * 60 * 24 * 365
+
+_lock = threading.Lock()
+_cache = {
+    "campuses": None,      # {ObjectId: 캠퍼스 문서} (생성 순서)
+    "laundries": {},       # {campus_id: {ObjectId: 기기 문서}} (조회 순서 유지)
+    "loaded_at": {},       # {"campuses" 또는 campus_id: 불러온 시각}
+    "laundry_campus": {},  # 기기 ID → 캠퍼스 ID (기기 ID만으로 조회할 때 사용)
+    "version": None,       # 캐시를 채울 때의 버전
+}
+_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+_listener = None
+
+
+def _current_version():
+    try:
+        return int(redis_client.get(VERSION_KEY) or 0)
+    except RedisError:
+        return None
+
+
+def _fresh(key):
+    loaded_at = _cache["loaded_at"].get(key)
+    return loaded_at is not None and time.monotonic() - loaded_at < CATALOG_TTL_SECONDS
+
+
+# version: 비동기 조회 경로처럼 버전을 미리 읽어 온 경우 (없으면 여기서 Redis 조회)
+def _mark_loaded(key, version=None):
+    if _cache["version"] is None:
+        _cache["version"] = version if version is not None else _current_version()
+    _cache["loaded_at"][key] = time.monotonic()
+
+
+# 캐시된 캠퍼스 목록 (비었거나 만료되었으면 None) - 동기/비동기 조회 경로 공용
+def cached_campuses():
+    with _lock:
+        if _cache["campuses"] is not None and _fresh("campuses"):
+            _stats["hits"] += 1
+            return _cache["campuses"]
+        return None
+
+
+# 조회한 캠퍼스 문서 저장 (생성 순서로 정렬된 목록)
+def store_campuses(campuses, version=None):
+    with _lock:
+        _stats["misses"] += 1
+        _cache["campuses"] = {campus["_id"]: campus for campus in campuses}
+        _mark_loaded("campuses", version)
+        return _cache["campuses"]
+
+
+# 캐시된 캠퍼스 기기 목록 (비었거나 만료되었으면 None)
+def cached_laundries(campus_id):
+    with _lock:
+        laundries = _cache["laundries"].get(campus_id)
+        if laundries is not None and _fresh(campus_id):
+            _stats["hits"] += 1
+            return laundries
+        return None
+
+
+# 조회한 캠퍼스 기기 문서 저장
+def store_laundries(campus_id, laundries, version=None):
+    with _lock:
+        _stats["misses"] += 1
+        laundries = {laundry["_id"]: laundry for laundry in laundries}
+        _cache["laundries"][campus_id] = laundries
+        _cache["laundry_campus"].update((laundry_id, campus_id) for laundry_id in laundries)
+        _mark_loaded(campus_id, version)
+        return laundries
+
+
+# 기기 ID → 캠퍼스 ID (아직 불러오지 않은 기기면 None)
+def cached_laundry_campus(laundry_id):
+    with _lock:
+        return _cache["laundry_campus"].get(laundry_id)
+
+
+# 캠퍼스 목록 (비었거나 만료되었으면 다시 조회)
+def _load_campuses(db):
+    campuses = cached_campuses()
+    if campuses is None:
+        campuses = store_campuses(db.campus.find().sort("_id", 1))
+    return campuses
+
+
+# 캠퍼스 하나의 기기 목록 (캠퍼스 단위로 캐시)
+def _load(db, campus_id):
+    laundries = cached_laundries(campus_id)
+    if laundries is None:
+        laundries = store_laundries(campus_id, db.laundry.find({"campus_id": campus_id}))
+    return laundries
+
+
+# 전체 캠퍼스 목록 (복사본)
+def get_campuses(db):
+    return [dict(campus) for campus in _load_campuses(db).values()]
+
+
+# 캠퍼스 ID가 있는지 확인
+def campus_exists(db, campus_id):
+    return campus_id in _load_campuses(db)
+
+
+# 기본 캠퍼스 ID (캠퍼스가 하나도 없으면 None)
+def default_campus_id(db):
+    return pick_default_campus(_load_campuses(db))
+
+
+# 캠퍼스 {ID: 문서} 중 기본 캠퍼스 ID
+def pick_default_campus(campuses):
+    if DEFAULT_CAMPUS_ID:
+        for campus_id in campuses:
+            if str(campus_id) == DEFAULT_CAMPUS_ID:
+                return campus_id
+    return next(iter(campuses), None)
+
+
+# 캠퍼스의 기기 목록 (호출하는 쪽에서 수정할 수 있도록 복사본 반환)
+def get_laundries(db, campus_id):
+    return [dict(laundry) for laundry in _load(db, campus_id).values()]
+
+
+# 기기 하나 조회 (없으면 None) - 처음 보는 기기 ID면 캠퍼스만 찾아서 그 캠퍼스 목록을 불러옴
+def get_laundry(db, laundry_id):
+    campus_id = cached_laundry_campus(laundry_id)
+    if campus_id is None:
+        found = db.laundry.find_one({"_id": laundry_id}, {"campus_id": 1})
+        if found is None:
+            return None
+        campus_id = found.get("campus_id")
+    laundry = _load(db, campus_id).get(laundry_id)
+    return dict(laundry) if laundry else None
+
+
+# 이 프로세스의 캐시 비우기
+def drop_cache(version=None):
+    with _lock:
+        if version is not None and _cache["version"] is not None and version <= _cache["version"]:
+            return
+        _cache.update(campuses=None, laundries={}, loaded_at={}, laundry_campus={}, version=None)
+        _stats["invalidations"] += 1
+
+
+# 기기 정보 변경 후 호출: 버전을 올리고 모든 워커에 캐시 무효화 알림
+def invalidate_catalog():
+    drop_cache()
+    version = redis_client.incr(VERSION_KEY)
+    redis_client.publish(INVALIDATE_CHANNEL, version)
+    return version
+
+
+# 캐시 적중률
+def catalog_stats():
+    with _lock:
+        total = _stats["hits"] + _stats["misses"]
+        return dict(_stats, hit_rate=_stats["hits"] / total if total else 0.0)
+
+
+# 무효화 메시지 수신 루프 (연결이 끊기면 놓친 메시지가 있을 수 있으므로 캐시를 비우고 재연결)
+def _listen():
+    while True:
+        try:
+            pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(INVALIDATE_CHANNEL)
+            while True:
+                # 소켓 타임아웃에 걸리지 않도록 짧은 대기로 반복
+                message = pubsub.get_message(timeout=1.0)
+                if message is None:
+                    continue
+                try:
+                    drop_cache(int(message["data"]))
+                except (TypeError, ValueError):
+                    drop_cache()
+        except RedisError:
+            drop_cache()
+            time.sleep(1)
+
+
+# 워커 프로세스마다 한 번 실행
+def start_invalidation_listener():
+    global _listener
+    if _listener is None or not _listener.is_alive():
+        _listener = threading.Thread(target=_listen, name="catalog-invalidation", daemon=True)
+        _listener.start()
+    return _listener
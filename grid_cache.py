@@ -0,0 +1,142 @@
+import hashlib
+import os
+import time
+from datetime import datetime
+
+from jinja2.utils import htmlsafe_json_dumps
+from markupsafe import Markup
+from redis.exceptions import RedisError
+
+from catalog import VERSION_KEY as CATALOG_VERSION_KEY
+from redis_service import redis_client
+
+# 예약 페이지 시간표 캐시 (Redis)
+# - 기기별 버전 카운터: 예약 / 취소 때 INCR (bump_version)
+# - 시간표 조각: (기기, 버전, 현재 시각의 시) 키에 렌더링된 JSON 저장
+#   슬롯 간격이 1시간이므로 같은 시간 안에서는 예약/취소가 없으면 결과가 같음
+# - 동시에 캐시가 비면 잠금을 잡은 요청 하나만 계산하고 나머지는 결과를 기다림
+GRID_CACHE_TTL_SECONDS = int(os.getenv("GRID_CACHE_TTL_SECONDS", 3900))
+GRID_LOCK_MS = int(os.getenv("GRID_LOCK_MS", 5000))
+GRID_WAIT_SECONDS = float(os.getenv("GRID_WAIT_SECONDS", 2))
+GRID_POLL_SECONDS = 0.05
+
+_stats = {"hits": 0, "misses": 0, "waits": 0}
+
+# 버전 조회 + 해당 버전의 조각 조회를 한 번의 왕복으로 처리
+# KEYS: 버전 키 / ARGV: 조각 키 앞부분, 조각 키 뒷부분 / 반환: {버전, 조각 또는 nil}
+# (비동기 조회 서버도 같은 스크립트를 redis.asyncio 클라이언트에 등록해서 사용)
+LOOKUP_LUA = """
+local version = redis.call('GET', KEYS[1]) or '0'
+return {version, redis.call('GET', ARGV[1] .. version .. ARGV[2])}
+"""
+_LOOKUP_SCRIPT = redis_client.register_script(LOOKUP_LUA)
+
+
+def version_key(laundry_id):
+    return f"grid:version:{laundry_id}"
+
+
+def fragment_key(laundry_id, version, hour):
+    return f"grid:{laundry_id}:{version}:{hour}"
+
+
+# 조회 스크립트 ARGV (조각 키 앞부분, 뒷부분)
+def lookup_args(laundry_id, hour):
+    return [f"grid:{laundry_id}:", f":{hour}"]
+
+
+# 예약 / 취소 후 기기의 시간표 버전 올리기 (이전 버전 조각은 TTL로 사라짐)
+def bump_version(laundry_id):
+    try:
+        return redis_client.incr(version_key(laundry_id))
+    except RedisError as e:
+        print(f"시간표 캐시 버전 갱신 실패 ({laundry_id}): {e}")
+        return None
+
+
+# 다른 요청이 계산 중인 조각을 잠시 기다림 (시간 안에 안 채워지면 None)
+def _wait_for(key):
+    _stats["waits"] += 1
+    deadline = time.monotonic() + GRID_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        time.sleep(GRID_POLL_SECONDS)
+        fragment = redis_client.get(key)
+        if fragment is not None:
+            return fragment
+    return None
+
+
+# 예약 가능 시간 조각 조회 - (ETag용 버전 문자열, 템플릿에 넣을 JSON)
+# compute(): 캐시가 없을 때 예약 가능 시간 dict를 계산하는 함수
+# Redis를 쓸 수 없으면 캐시 없이 계산 (버전 None)
+def get_available_times_fragment(laundry, compute, now=None):
+    now = now or datetime.now()
+    laundry_id = str(laundry["_id"])
+    hour = now.strftime("%Y%m%d%H")
+
+    try:
+        version, fragment = _LOOKUP_SCRIPT(keys=[version_key(laundry_id)], args=lookup_args(laundry_id, hour))
+    except RedisError:
+        return None, htmlsafe_json_dumps(compute())
+
+    version = version.decode() if isinstance(version, bytes) else str(version)
+    tag = f"{laundry_id}:{version}:{hour}"
+    if fragment is not None:
+        _stats["hits"] += 1
+        return tag, Markup(fragment.decode())
+
+    _stats["misses"] += 1
+    key = fragment_key(laundry_id, version, hour)
+    lock_key = f"{key}:lock"
+    try:
+        leader = redis_client.set(lock_key, 1, nx=True, px=GRID_LOCK_MS)
+        if not leader:
+            fragment = _wait_for(key)
+            if fragment is not None:
+                return tag, Markup(fragment.decode())
+    except RedisError:
+        leader = False
+
+    fragment = htmlsafe_json_dumps(compute())
+    try:
+        pipe = redis_client.pipeline()
+        pipe.set(key, str(fragment), ex=GRID_CACHE_TTL_SECONDS)
+        if leader:
+            pipe.delete(lock_key)
+        pipe.execute()
+    except RedisError:
+        pass
+    return tag, fragment
+
+
+# 브라우저 캐시 검증용 약한 ETag (시간표 버전 + 사용자 + CSRF 세션 토큰)
+# 페이지에 사용자 메뉴와 CSRF 토큰이 들어가므로 사용자/세션마다 다른 값
+def page_etag(tag, *parts):
+    return hashlib.sha256("|".join([tag, *map(str, parts)]).encode("utf-8")).hexdigest()[:32]
+
+
+# JSON API 검증값 (기기 상태 / 예약 가능 시간): 기기 목록 버전 + 기기별 시간표 버전 + 현재 시각의 시
+# 응답은 예약/취소(버전 INCR), 기기 변경(목록 버전), 시간 경과(슬롯이 시 단위)로만 바뀌므로
+# 본문을 만들기 전에 버전만 읽어서(MGET 1회) 비교하고, 같으면 MongoDB 조회 없이 304 (Flask/비동기 서버 공용)
+def api_version_keys(laundry_ids):
+    return [CATALOG_VERSION_KEY, *(version_key(laundry_id) for laundry_id in laundry_ids)]
+
+
+def api_etag(tag, versions, now, *parts):
+    versions = [version.decode() if isinstance(version, bytes) else str(version or 0) for version in versions]
+    return page_etag(tag, now.strftime("%Y%m%d%H"), *parts, *versions)
+
+
+# Flask 서버용: 버전을 읽어서 검증값 계산 (Redis 오류면 None - 호출하는 쪽에서 본문 해시로 대체)
+def versions_etag(tag, laundry_ids, *parts, now=None):
+    now = now or datetime.now()
+    try:
+        versions = redis_client.mget(api_version_keys(laundry_ids))
+    except RedisError:
+        return None
+    return api_etag(tag, versions, now, *parts)
+
+
+def grid_cache_stats():
+    total = _stats["hits"] + _stats["misses"]
+    return {**_stats, "hit_rate": _stats["hits"] / total if total else 0.0}
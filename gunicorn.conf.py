@@ -0,0 +1,41 @@
+import multiprocessing
+import os
+
+# 운영 서버 설정: gunicorn -c gunicorn.conf.py app:app
+bind = os.getenv("BIND", "0.0.0.0:5001")
+
+# 워커 프로세스 x 스레드 (SSE 연결도 스레드를 하나씩 사용하므로 스레드를 넉넉히)
+workers = int(os.getenv("WEB_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+worker_class = "gthread"
+threads = int(os.getenv("WEB_THREADS", 8))
+
+# 앱을 마스터에서 한 번만 import (인덱스 생성, 비트맵 재구성을 한 번만 실행)
+# fork 이후 post_fork 에서 MongoDB 클라이언트/Redis 연결 풀/백그라운드 스레드를 워커마다 새로 만듦
+preload_app = os.getenv("PRELOAD_APP", "true").lower() == "true"
+
+# 요청 처리 시간 제한과 종료 시 대기 시간 (진행 중인 요청을 끝낼 시간)
+timeout = int(os.getenv("WEB_TIMEOUT", 30))
+graceful_timeout = int(os.getenv("WEB_GRACEFUL_TIMEOUT", 20))
+keepalive = int(os.getenv("WEB_KEEPALIVE", 5))
+
+# 메모리 누수 대비 워커 주기적 재시작 (워커마다 시점을 다르게)
+max_requests = int(os.getenv("WEB_MAX_REQUESTS", 5000))
+max_requests_jitter = int(os.getenv("WEB_MAX_REQUESTS_JITTER", 500))
+
+accesslog = os.getenv("ACCESS_LOG", "-")
+
+
+def post_fork(server, worker):
+    if server.cfg.preload_app:
+        import app
+        app.init_worker()
+
+    # SIGTERM 수신 시 먼저 readiness를 실패로 바꾸고 SSE 연결을 닫은 뒤 기존 종료 절차 진행
+    handle_exit = worker.handle_exit
+
+    def draining_exit(sig, frame):
+        import app
+        app.start_draining()
+        handle_exit(sig, frame)
+
+    worker.handle_exit = draining_exit
@@ -1,65 +1,217 @@
-from pymongo import MongoClient
+"""시드 데이터 생성 (여러 번 실행해도 안전, 기존 데이터는 지우지 않음)
+
+    # 기본 데이터: 캠퍼스 1개, 사용자 29명, 세탁기 7대 + 건조기 7대
+    python init_db.py
+
+    # 운영 규모 데이터: 캠퍼스 20개, 캠퍼스당 세탁기/건조기 50대씩, 사용자 2만 명, 지난 180일 예약 300만 건
+    python init_db.py --campuses 20 --washers 50 --dryers 50 --users 20000 --reservations 3000000 --history-days 180
+
+    # 모든 데이터를 지우고 다시 생성 (명시적으로 지정할 때만)
+    python init_db.py --reset
+"""
+import argparse
+import hashlib
+import os
+import random
+import time
 from datetime import datetime, timedelta
+
+import bcrypt
 from bson.objectid import ObjectId
-import os
 from dotenv import load_dotenv
-import bcrypt
+from pymongo import MongoClient, UpdateOne
+
+from availability import DURATION_HOURS, in_blackout, slot_keys
+from catalog import invalidate_catalog
+from schema import ensure_indexes, insert_many_ignoring_duplicates
+from usage_stats import rebuild_usage
+from tiering import ARCHIVE_AFTER_DAYS, ensure_history_indexes, history_collection_name, history_collections
+
+FIXTURE_PASSWORD = "password123"
+
+# 시간대별 예약 비율 (기숙사 이용 패턴: 평일은 아침 / 저녁, 주말은 낮 시간대에 몰림)
+WEEKDAY_HOUR_WEIGHTS = {6: 2, 7: 5, 8: 6, 9: 3, 10: 2, 11: 2, 12: 3, 13: 3, 14: 2, 15: 2,
+                        16: 3, 17: 4, 18: 6, 19: 9, 20: 10, 21: 10, 22: 8, 23: 5}
+WEEKEND_HOUR_WEIGHTS = {6: 1, 7: 2, 8: 4, 9: 6, 10: 8, 11: 9, 12: 9, 13: 9, 14: 8, 15: 8,
+                        16: 7, 17: 6, 18: 6, 19: 7, 20: 7, 21: 6, 22: 5, 23: 3}
+
+
+def campus_email(n):
+    return "campus@example.com" if n == 1 else f"campus{n}@example.com"
+
+
+# 캠퍼스 (이메일 기준 upsert) - 캠퍼스 _id 목록
+def seed_campuses(db, campuses):
+    db.campus.bulk_write([
+        UpdateOne({"email": campus_email(n)},
+                  {"$setOnInsert": {"entry_date": datetime.now(), "status": "active"}}, upsert=True)
+        for n in range(1, campuses + 1)
+    ])
+    emails = [campus_email(n) for n in range(1, campuses + 1)]
+    ids = {c["email"]: c["_id"] for c in db.campus.find({"email": {"$in": emails}}, {"email": 1})}
+    return [ids[email] for email in emails]
+
+
+# 사용자 (이메일 유니크 인덱스로 이미 있는 사용자는 건너뜀) - 새로 추가한 수
+# 모든 테스트 사용자가 같은 비밀번호를 쓰므로 bcrypt 해시는 한 번만 계산
+def seed_users(db, users, batch_size):
+    hashed_pw = bcrypt.hashpw(FIXTURE_PASSWORD.encode("utf-8"), bcrypt.gensalt())
+    inserted = 0
+    for offset in range(1, users + 1, batch_size):
+        inserted += insert_many_ignoring_duplicates(db.user, [
+            {"email": f"user{i}@example.com", "pw": hashed_pw, "phone": "01012341234"}
+            for i in range(offset, min(users + 1, offset + batch_size))
+        ])
+    return inserted
+
+
+# 캠퍼스별 세탁기/건조기 ((캠퍼스, 종류, 번호) 기준 upsert) - 기기 문서 목록
+def seed_laundries(db, campus_ids, washers, dryers, batch_size):
+    names = {"washer": "세탁기", "dryer": "건조기"}
+    requests = [
+        UpdateOne({"campus_id": campus_id, "type": laundry_type, "id": i},
+                  {"$setOnInsert": {"name": f"{names[laundry_type]} {i}"}}, upsert=True)
+        for campus_id in campus_ids
+        for laundry_type, count in (("washer", washers), ("dryer", dryers))
+        for i in range(1, count + 1)
+    ]
+    for offset in range(0, len(requests), batch_size):
+        db.laundry.bulk_write(requests[offset:offset + batch_size], ordered=False)
+    return list(db.laundry.find({"campus_id": {"$in": campus_ids}}))
+
+
+# 예약 _id를 (기기, 시작 시간)으로 정해서 다시 실행해도 같은 예약이 두 번 들어가지 않게 함
+def reservation_id(laundry_id, start_time):
+    return ObjectId(hashlib.md5(f"{laundry_id}:{start_time:%Y%m%d%H%M}".encode()).digest()[:12])
+
+
+# 기기 하루치 예약 시작 시간 (시간대 비율에 따라 뽑고 겹치는 시간은 제외)
+def day_start_times(rng, day, hours, count):
+    weights = WEEKEND_HOUR_WEIGHTS if day.weekday() >= 5 else WEEKDAY_HOUR_WEIGHTS
+    candidates = [h for h in weights if not in_blackout(day.replace(hour=h)) and h + hours <= 24]
+    taken = set()
+    starts = []
+    while len(starts) < count:
+        free = [h for h in candidates if not any(x in taken for x in range(h, h + hours))]
+        if not free:
+            break
+        hour = rng.choices(free, [weights[h] for h in free])[0]
+        taken.update(range(hour, hour + hours))
+        starts.append(day.replace(hour=hour))
+    return starts
+
+
+# 지난 예약 생성 (기기 × 날짜마다 평균 개수를 맞춰 시간대 비율대로 배치)
+def generate_reservations(rng, laundries, user_ids, total, days, now):
+    if not total or not days or not laundries:
+        return
+    per_machine_day = total / (len(laundries) * days)
+    today = datetime(now.year, now.month, now.day)
+    generated = 0
+    for day_offset in range(days, 0, -1):
+        day = today - timedelta(days=day_offset)
+        for laundry in laundries:
+            hours = DURATION_HOURS.get(laundry["type"], 1)
+            # 평균 개수 근처에서 하루마다 조금씩 다르게
+            count = int(per_machine_day + rng.random())
+            for start_time in day_start_times(rng, day, hours, count):
+                end_time = start_time + timedelta(hours=hours)
+                yield {
+                    "_id": reservation_id(laundry["_id"], start_time),
+                    "campus_id": laundry["campus_id"],
+                    "laundry_id": laundry["_id"],
+                    "user_id": rng.choice(user_ids),
+                    "status": "finished",
+                    "start_time": start_time,
+                    "end_time": end_time,
+                    "created_at": start_time - timedelta(minutes=rng.randrange(10, 60 * 48)),
+                }
+                generated += 1
+                if generated >= total:
+                    return
+
+
+# 지난 예약 저장: 보관 기간이 지난 예약은 바로 월별 기록 컬렉션에, 최근 예약은 db.use에 (slots 포함)
+def seed_reservations(db, reservations, batch_size, now):
+    cutoff = now - timedelta(days=ARCHIVE_AFTER_DAYS)
+    batches = {}
+    inserted = 0
+
+    def flush(name):
+        nonlocal inserted
+        documents = batches.pop(name)
+        if name != "use":
+            ensure_history_indexes(db, name)
+        inserted += insert_many_ignoring_duplicates(db[name], documents)
+
+    for reservation in reservations:
+        if reservation["end_time"] < cutoff:
+            name = history_collection_name(reservation["start_time"])
+        else:
+            name = "use"
+            reservation["slots"] = slot_keys(reservation["start_time"], reservation["end_time"])
+        batches.setdefault(name, []).append(reservation)
+        if len(batches[name]) >= batch_size:
+            flush(name)
+    for name in list(batches):
+        flush(name)
+    return inserted
+
+
+# --reset: 시드 대상 컬렉션 모두 삭제
+def reset(db):
+    for name in ["user", "campus", "laundry", "use", "reservation_locks", *history_collections(db)]:
+        db[name].drop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Jungdry 시드 데이터 생성")
+    parser.add_argument("--campuses", type=int, default=1)
+    parser.add_argument("--users", type=int, default=29)
+    parser.add_argument("--washers", type=int, default=7, help="캠퍼스당 세탁기 수")
+    parser.add_argument("--dryers", type=int, default=7, help="캠퍼스당 건조기 수")
+    parser.add_argument("--reservations", type=int, default=0, help="지난 예약 수 (전체)")
+    parser.add_argument("--history-days", type=int, default=90, help="지난 예약을 배치할 기간 (일)")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0, help="난수 시드 (예약 배치)")
+    parser.add_argument("--reset", action="store_true", help="기존 데이터를 모두 지우고 생성")
+    args = parser.parse_args()
+
+    load_dotenv()
+    client = MongoClient(os.getenv("MONGO_URI", "mongodb://localhost:27017/"))
+    db = client[os.getenv("MONGO_DB", "jungdry")]
+    started = time.monotonic()
+
+    if args.reset:
+        reset(db)
+
+    # 유니크 인덱스를 먼저 만들어야 중복 데이터를 건너뛸 수 있음
+    if ensure_indexes(db):
+        raise SystemExit("중복 데이터 때문에 유니크 인덱스를 만들지 못했습니다. 중복을 정리한 뒤 다시 실행하세요.")
+
+    campus_ids = seed_campuses(db, args.campuses)
+    new_users = seed_users(db, args.users, args.batch_size)
+    laundries = seed_laundries(db, campus_ids, args.washers, args.dryers, args.batch_size)
+
+    new_reservations = 0
+    if args.reservations:
+        emails = [f"user{i}@example.com" for i in range(1, args.users + 1)]
+        user_ids = [u["_id"] for u in db.user.find({"email": {"$in": emails}}, {"_id": 1})]
+        rng = random.Random(args.seed)
+        now = datetime.now()
+        reservations = generate_reservations(rng, laundries, user_ids, args.reservations, args.history_days, now)
+        new_reservations = seed_reservations(db, reservations, args.batch_size, now)
+        # 시드 예약은 사용률 집계를 거치지 않고 저장했으므로 다시 계산
+        if new_reservations:
+            rebuild_usage(db, args.batch_size)
+
+    # 실행 중인 워커의 기기 목록 캐시 무효화
+    invalidate_catalog()
+
+    print("데이터베이스 초기화 완료!")
+    print(f"캠퍼스: {len(campus_ids)}개, 기기: {len(laundries)}대")
+    print(f"새 사용자: {new_users}명, 새 예약: {new_reservations}건 ({time.monotonic() - started:.1f}초)")
+
 
-# 환경 변수 로드
-load_dotenv()
-
-# MongoDB 연결
-client = MongoClient(os.getenv("MONGO_URI", "mongodb://localhost:27017/"))
-db = client["jungdry"]
-
-# 컬렉션 초기화
-db.user.drop()
-db.campus.drop()
-db.laundry.drop()
-db.use.drop()
-
-# 캠퍼스 데이터 추가
-campus_id = db.campus.insert_one({
-    "email": "campus@example.com",
-    "entry_date": datetime.now(),
-    "status": "active"
-}).inserted_id
-
-# 사용자 데이터 추가
-for i in range(1, 30):
-    # 비밀번호 해싱
-    password = "password123"
-    hashed_pw = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
-
-    user_id = db.user.insert_one({
-        "email": f"user{i}@example.com",
-        "pw": hashed_pw,  # 해싱된 비밀번호 저장
-        "phone": "01012341234",
-    }).inserted_id
-
-
-# 세탁기 데이터 추가 (7대)
-laundry_ids = []
-for i in range(7):
-    laundry_id = db.laundry.insert_one({
-        "id": i + 1,          # 세탁기 번호
-        "type": "washer",     # 세탁기 타입
-        "name": f"세탁기 {i+1}"  # 세탁기 이름
-    }).inserted_id
-    laundry_ids.append(laundry_id)
-
-# 건조기 데이터 추가 (7대)
-dryer_ids = []
-for i in range(7):
-    dryer_id = db.laundry.insert_one({
-        "id": i + 1,          # 건조기 번호
-        "type": "dryer",      # 건조기 타입
-        "name": f"건조기 {i+1}"  # 건조기 이름
-    }).inserted_id
-    dryer_ids.append(dryer_id)
-
-print("데이터베이스 초기화 완료!")
-print(f"캠퍼스 ID: {campus_id}")
-print(f"사용자 ID: {user_id}")
-print("세탁기 IDs:", laundry_ids)
-print("건조기 IDs:", dryer_ids)
\ No newline at end of file
+if __name__ == "__main__":
+    main()
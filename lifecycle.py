@@ -0,0 +1,135 @@
+import os
+import signal
+import socket
+import time
+import uuid
+from datetime import datetime
+
+from dotenv import load_dotenv
+from pymongo import MongoClient
+
+import occupancy
+from grid_cache import bump_version
+from redis_service import acquire_lease, release_lease
+from reservations import STATUS_RESERVED, STATUS_USING, STATUS_FINISHED, sweep_pending_batches
+from tiering import archive_finished
+
+# 예약 상태 스케줄러 (별도 프로세스: python lifecycle.py)
+# 시작/종료 시간이 지난 예약을 update_many 한 번으로 reserved → using → finished 로 변경
+# ARCHIVE_INTERVAL_SECONDS 마다 오래된 예약을 월별 기록 컬렉션으로 이동
+# 매번 저장 도중 멈춰 확정되지 않은 여러 건 예약(pending)을 삭제
+# 매번 예약 점유 비트맵 준비 표시를 확인해서 없으면 재구성 (웹 워커가 Redis 쓰기에 실패하면 표시를 지움)
+# OCCUPANCY_CHECK_INTERVAL_SECONDS 마다 MongoDB와 비교해서 다르면 재구성
+# 여러 인스턴스를 띄워도 Redis 리스를 가진 하나만 실행
+# 단계 사이와 기록 이동 배치마다 리스를 연장하고, 연장에 실패하면 (만료 후 다른 인스턴스가 가져감) 남은 단계는 건너뜀
+# LIFECYCLE_LEASE_SECONDS는 가장 긴 단계 하나(비트맵 재구성 / 기록 이동 배치 1개)보다 길게 설정
+TICK_SECONDS = float(os.getenv("LIFECYCLE_TICK_SECONDS", 15))
+ARCHIVE_INTERVAL_SECONDS = float(os.getenv("ARCHIVE_INTERVAL_SECONDS", 3600))
+OCCUPANCY_CHECK_INTERVAL_SECONDS = float(os.getenv("OCCUPANCY_CHECK_INTERVAL_SECONDS", 300))
+LEASE_NAME = "reservation_lifecycle"
+LEASE_SECONDS = float(os.getenv("LIFECYCLE_LEASE_SECONDS", TICK_SECONDS * 3))
+
+
+# 상태 변경 한 번 실행 (몇 번을 실행해도 결과가 같음) - 변경된 문서 수 반환
+def run_tick(db, now=None):
+    now = now or datetime.now()
+    result = db.use.update_many(
+        {"$or": [
+            {"status": STATUS_RESERVED, "start_time": {"$lte": now}},
+            {"status": STATUS_USING, "end_time": {"$lt": now}},
+        ]},
+        [{"$set": {"status": {"$cond": [
+            {"$lt": ["$end_time", now]}, STATUS_FINISHED, STATUS_USING,
+        ]}}}],
+    )
+    return result.modified_count
+
+
+# 리스를 가진 동안 실행할 작업 (상태 변경 → 미확정 예약 정리 → 비트맵 확인 → 기록 이동)
+# 단계마다 renew()로 리스를 연장하고, 실패하면 남은 단계를 건너뛰고 False 반환
+def run_phases(db, renew, started, last_run):
+    try:
+        changed = run_tick(db)
+        if changed:
+            print(f"예약 상태 변경: {changed}건")
+    except Exception as e:
+        print(f"예약 상태 변경 실패: {e}")
+    if not renew():
+        return False
+
+    try:
+        swept = sweep_pending_batches(db)
+        for reservation in swept:
+            occupancy.clear_reservation(reservation["laundry_id"], reservation["start_time"],
+                                        reservation["end_time"])
+            bump_version(reservation["laundry_id"])
+        if swept:
+            print(f"확정되지 않은 여러 건 예약 삭제: {len(swept)}건")
+    except Exception as e:
+        print(f"확정되지 않은 예약 정리 실패: {e}")
+    if not renew():
+        return False
+
+    try:
+        if occupancy.rebuild_if_missing(db):
+            print("예약 점유 비트맵 재구성 (준비 표시 없음)")
+        elif last_run["occupancy_check"] is None or \
+                started - last_run["occupancy_check"] >= OCCUPANCY_CHECK_INTERVAL_SECONDS:
+            last_run["occupancy_check"] = started
+            if occupancy.repair_if_drifted(db):
+                print("예약 점유 비트맵 재구성 (MongoDB와 다름)")
+    except Exception as e:
+        print(f"예약 점유 비트맵 확인 실패: {e}")
+    if not renew():
+        return False
+
+    if last_run["archive"] is None or started - last_run["archive"] >= ARCHIVE_INTERVAL_SECONDS:
+        last_run["archive"] = started
+        try:
+            moved = archive_finished(db, keep_going=renew)
+            if moved:
+                print(f"예약 기록 이동: {moved}건")
+        except Exception as e:
+            print(f"예약 기록 이동 실패: {e}")
+        return renew()
+    return True
+
+
+def main():
+    load_dotenv()
+    client = MongoClient(os.getenv("MONGO_URI", "mongodb://localhost:27017/"))
+    db = client[os.getenv("MONGO_DB", "jungdry")]
+    owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    running = True
+
+    def stop(signum, frame):
+        nonlocal running
+        running = False
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    # 이미 가진 리스면 만료 시간만 연장
+    def renew():
+        return acquire_lease(LEASE_NAME, owner, LEASE_SECONDS)
+
+    # 마지막 실행 시각 (리스를 가진 인스턴스만 갱신)
+    last_run = {"archive": None, "occupancy_check": None}
+
+    print(f"예약 상태 스케줄러 시작: {owner}")
+    while running:
+        started = time.monotonic()
+        if renew():
+            if not run_phases(db, renew, started, last_run):
+                print("리스를 잃어서 남은 작업을 건너뜀")
+        # 다음 실행까지 대기 (종료 신호를 빨리 받도록 짧게 나눠서)
+        while running and time.monotonic() - started < TICK_SECONDS:
+            time.sleep(min(1, TICK_SECONDS))
+
+    release_lease(LEASE_NAME, owner)
+    print("예약 상태 스케줄러 종료")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+
+from availability import AVAILABILITY_DAYS, merge_intervals, slot_duration
+
+
+# 한 캠퍼스 기기들의 현재/예정 예약 조회 조건 (filter, projection) - 정렬은 start_time 오름차순
+def upcoming_reservations_query(campus_id, laundry_ids, now, horizon_days=AVAILABILITY_DAYS):
+    return (
+        {
+            "campus_id": campus_id,
+            "laundry_id": {"$in": list(laundry_ids)},
+            "end_time": {"$gte": now},
+            "start_time": {"$lt": now + timedelta(days=horizon_days)},
+        },
+        {"_id": 0, "laundry_id": 1, "start_time": 1, "end_time": 1},
+    )
+
+
+# 예약 문서를 기기별 (시작, 종료) 구간으로 묶기
+def group_by_laundry(laundry_ids, reservations):
+    by_laundry = {laundry_id: [] for laundry_id in laundry_ids}
+    for r in reservations:
+        by_laundry.setdefault(r["laundry_id"], []).append((r["start_time"], r["end_time"]))
+    return by_laundry
+
+
+# 한 캠퍼스 기기들의 현재/예정 예약을 한 번의 $in 쿼리로 가져와 기기별로 묶기
+def load_upcoming_reservations(db, campus_id, laundry_ids, now, horizon_days=AVAILABILITY_DAYS):
+    if not laundry_ids:
+        return {}
+    query, projection = upcoming_reservations_query(campus_id, laundry_ids, now, horizon_days)
+    return group_by_laundry(laundry_ids, db.use.find(query, projection).sort("start_time", 1))
+
+
+# 기기 한 대의 상태 계산
+# status: 0=사용 가능, 1=사용 중 (지금 사용 중이거나 사용 시간 이내에 시작하는 예약이 있음)
+# busy_until: 사용 중이면 연속된 예약이 끝나는 시간
+# free_until: 사용 가능하면 다음 예약이 시작하는 시간 (없으면 None)
+def compute_status(intervals, duration, now):
+    check_end = now + duration
+    for start, end in merge_intervals(intervals):
+        if end < now:
+            continue
+        if start <= now or start < check_end:
+            return {"status": 1, "busy_until": end, "free_until": None}
+        return {"status": 0, "busy_until": None, "free_until": start}
+    return {"status": 0, "busy_until": None, "free_until": None}
+
+
+# 캠퍼스 기기 상태를 쿼리 2회(기기 목록 + 예약 $in)로 계산 (다른 캠퍼스 기기 수와 상관없음)
+def get_machine_statuses(db, campus_id, laundries=None, now=None):
+    now = now or datetime.now()
+    if laundries is None:
+        laundries = list(db.laundry.find({"campus_id": campus_id}))
+
+    reservations = load_upcoming_reservations(db, campus_id, [laundry["_id"] for laundry in laundries], now)
+    for laundry in laundries:
+        laundry.update(compute_status(reservations.get(laundry["_id"], []), slot_duration(laundry), now))
+    return laundries
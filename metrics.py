@@ -0,0 +1,225 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from flask import request
+from flask.signals import before_render_template, template_rendered
+from pymongo import monitoring
+
+# 요청별 계측 (Mongo 명령, Redis 호출, 템플릿 렌더링, bcrypt/JWT 등 구간 시간)
+# /metrics 는 Prometheus 텍스트 형식 (워커 프로세스별 값)
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", 0))   # 0이면 느린 요청 로그 끔
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+logger = logging.getLogger("jungdry.slow_request")
+_local = threading.local()
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.lock = threading.Lock()
+        self.series = {}      # 라벨 값 → [버킷별 개수..., 합계, 개수]
+
+    def observe(self, value, *label_values):
+        with self.lock:
+            series = self.series.get(label_values)
+            if series is None:
+                series = self.series[label_values] = [0] * (len(BUCKETS) + 2)
+            for i, bound in enumerate(BUCKETS):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            items = sorted(self.series.items())
+        for label_values, series in items:
+            labels = ",".join(f'{k}="{v}"' for k, v in zip(self.labels, label_values))
+            for bound, count in zip(BUCKETS, series):
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {series[-1]}')
+            lines.append(f"{self.name}_sum{{{labels}}} {series[-2]:.6f}")
+            lines.append(f"{self.name}_count{{{labels}}} {series[-1]}")
+        return lines
+
+
+REQUEST_SECONDS = Histogram("jungdry_request_duration_seconds", "요청 처리 시간", ("route", "method", "status"))
+MONGO_SECONDS = Histogram("jungdry_mongo_command_duration_seconds", "MongoDB 명령 시간", ("route", "command"))
+REDIS_SECONDS = Histogram("jungdry_redis_command_duration_seconds", "Redis 호출 시간", ("route", "command"))
+TEMPLATE_SECONDS = Histogram("jungdry_template_render_duration_seconds", "템플릿 렌더링 시간", ("route", "template"))
+SECTION_SECONDS = Histogram("jungdry_section_duration_seconds", "bcrypt/JWT 등 구간 시간", ("route", "section"))
+HISTOGRAMS = [REQUEST_SECONDS, MONGO_SECONDS, REDIS_SECONDS, TEMPLATE_SECONDS, SECTION_SECONDS]
+
+# 다른 모듈이 /metrics 에 값을 추가할 때 사용: 이름 → (help, 값을 반환하는 함수)
+_gauges = {}
+
+
+def register_gauge(name, help_text, fn):
+    _gauges[name] = (help_text, fn)
+
+
+# 현재 요청의 계측 기록 (요청 밖, 예: 백그라운드 스레드에서는 None)
+def _record():
+    return getattr(_local, "record", None)
+
+
+def _route():
+    record = _record()
+    return record["route"] if record else "background"
+
+
+def _add(kind, name, seconds):
+    record = _record()
+    if record is not None:
+        record[kind].append((name, seconds))
+
+
+# 임의 구간 시간 측정 (예: with timed("bcrypt"): ...)
+@contextmanager
+def timed(section):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - t0
+        SECTION_SECONDS.observe(seconds, _route(), section)
+        _add("sections", section, seconds)
+
+
+# MongoClient(event_listeners=[MongoCommandTimer()]) 로 등록
+class MongoCommandTimer(monitoring.CommandListener):
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._observe(event)
+
+    def failed(self, event):
+        self._observe(event)
+
+    def _observe(self, event):
+        seconds = event.duration_micros / 1e6
+        MONGO_SECONDS.observe(seconds, _route(), event.command_name)
+        _add("mongo", event.command_name, seconds)
+
+
+# Redis 클라이언트의 명령/파이프라인 실행 시간 측정
+def instrument_redis(client):
+    execute_command = client.execute_command
+    make_pipeline = client.pipeline
+
+    def timed_execute_command(*args, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            return execute_command(*args, **kwargs)
+        finally:
+            seconds = time.perf_counter() - t0
+            name = str(args[0]).lower() if args else "unknown"
+            REDIS_SECONDS.observe(seconds, _route(), name)
+            _add("redis", name, seconds)
+
+    def timed_pipeline(*args, **kwargs):
+        pipe = make_pipeline(*args, **kwargs)
+        execute = pipe.execute
+
+        def timed_execute(*a, **kw):
+            t0 = time.perf_counter()
+            try:
+                return execute(*a, **kw)
+            finally:
+                seconds = time.perf_counter() - t0
+                REDIS_SECONDS.observe(seconds, _route(), "pipeline")
+                _add("redis", "pipeline", seconds)
+
+        pipe.execute = timed_execute
+        return pipe
+
+    client.execute_command = timed_execute_command
+    client.pipeline = timed_pipeline
+    return client
+
+
+def _before_request():
+    _local.record = {
+        "route": request.endpoint or "unknown",
+        "start": time.perf_counter(),
+        "mongo": [], "redis": [], "templates": [], "sections": [],
+    }
+
+
+def _after_request(response):
+    record = _record()
+    if record is None:
+        return response
+    seconds = time.perf_counter() - record["start"]
+    REQUEST_SECONDS.observe(seconds, record["route"], request.method, response.status_code)
+    if SLOW_REQUEST_MS and seconds * 1000 >= SLOW_REQUEST_MS:
+        logger.warning("slow request %s", json.dumps(_breakdown(record, seconds, response.status_code)))
+    return response
+
+
+def _teardown_request(exc):
+    _local.record = None
+
+
+# 느린 요청 로그: 구간별 횟수와 시간 합계
+def _breakdown(record, seconds, status):
+    summary = {
+        "route": record["route"],
+        "path": request.path,
+        "method": request.method,
+        "status": status,
+        "total_ms": round(seconds * 1000, 2),
+    }
+    for kind in ("mongo", "redis", "templates", "sections"):
+        by_name = defaultdict(lambda: [0, 0.0])
+        for name, elapsed in record[kind]:
+            by_name[name][0] += 1
+            by_name[name][1] += elapsed * 1000
+        summary[kind] = {name: {"count": count, "ms": round(ms, 2)} for name, (count, ms) in by_name.items()}
+    return summary
+
+
+def _on_before_render(sender, template, context, **extra):
+    record = _record()
+    if record is not None:
+        record.setdefault("render_start", []).append(time.perf_counter())
+
+
+def _on_rendered(sender, template, context, **extra):
+    record = _record()
+    if record is None or not record.get("render_start"):
+        return
+    seconds = time.perf_counter() - record["render_start"].pop()
+    TEMPLATE_SECONDS.observe(seconds, record["route"], template.name)
+    record["templates"].append((template.name, seconds))
+
+
+# Prometheus 텍스트 형식
+def render_metrics():
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render())
+    for name, (help_text, fn) in sorted(_gauges.items()):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {fn()}")
+    return "\n".join(lines) + "\n"
+
+
+# Flask 앱에 계측 등록 (before_request 중 가장 먼저 실행되도록 다른 훅보다 먼저 호출)
+def init_app(app):
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    before_render_template.connect(_on_before_render, app)
+    template_rendered.connect(_on_rendered, app)
@@ -0,0 +1,338 @@
+"""예약 알림 발송 워커 (별도 프로세스)
+
+    python notifications.py            # FCM으로 발송 (FCM_CREDENTIALS: 서비스 계정 JSON 경로)
+    python notifications.py --fake     # 실제로 보내지 않고 로그만 남김 (로컬 개발용)
+"""
+import argparse
+import json
+import os
+import random
+import signal
+import time
+from datetime import datetime, timedelta
+
+from bson.errors import InvalidId
+from bson.objectid import ObjectId
+from dotenv import load_dotenv
+from pymongo import MongoClient, UpdateOne
+
+from redis_service import redis_client
+
+# 예약 알림 (Redis 지연 큐)
+# - reminders:queue   : 정렬 집합, 멤버는 알림 id("{예약 _id}:{종류}"), 점수는 보낼 시각(초)
+# - reminders:payload : 해시, 알림 id → JSON (사용자, 제목, 내용)
+# - 예약할 때 넣고 취소할 때 지움, 워커는 보낼 시각이 된 알림을 배치로 꺼내서 한 번에 발송
+# - 꺼낸 알림은 REMINDER_VISIBILITY_SECONDS 뒤로 미뤄두므로 워커가 죽어도 다시 발송됨
+#   보낸 알림은 reminders:sent:{id} 로 표시해서 다시 꺼내도 중복 발송하지 않음
+REMINDER_QUEUE_KEY = "reminders:queue"
+REMINDER_PAYLOAD_KEY = "reminders:payload"
+REMINDER_ATTEMPTS_KEY = "reminders:attempts"
+REMINDER_SENT_PREFIX = "reminders:sent:"
+REMINDER_BEFORE_START_MINUTES = int(os.getenv("REMINDER_BEFORE_START_MINUTES", 10))
+REMINDER_BATCH_SIZE = int(os.getenv("REMINDER_BATCH_SIZE", 500))
+REMINDER_VISIBILITY_SECONDS = int(os.getenv("REMINDER_VISIBILITY_SECONDS", 60))
+REMINDER_MAX_ATTEMPTS = int(os.getenv("REMINDER_MAX_ATTEMPTS", 5))
+REMINDER_RETRY_SECONDS = float(os.getenv("REMINDER_RETRY_SECONDS", 5))
+REMINDER_SENT_TTL_SECONDS = 2 * 86400
+REMINDER_POLL_SECONDS = float(os.getenv("REMINDER_POLL_SECONDS", 1))
+MAX_DEVICE_TOKENS = 10
+
+# 발송 결과
+SENT = "sent"
+RETRY = "retry"
+FAILED = "failed"
+
+# 보낼 시각이 된 알림 limit개 꺼내기 (꺼낸 알림은 lease_until 까지 미뤄둠)
+# 이미 보낸 알림이나 내용이 없는 알림은 큐에서 지움
+# KEYS: 큐, 내용 해시 / ARGV: 현재 시각, 개수, 미뤄둘 시각, 보낸 표시 키 앞부분 / 반환: {id, 내용, id, 내용, ...}
+_CLAIM_SCRIPT = redis_client.register_script("""
+local ids = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[2]))
+local claimed = {}
+for _, id in ipairs(ids) do
+    local payload = redis.call('HGET', KEYS[2], id)
+    if payload and redis.call('EXISTS', ARGV[4] .. id) == 0 then
+        redis.call('ZADD', KEYS[1], ARGV[3], id)
+        claimed[#claimed + 1] = id
+        claimed[#claimed + 1] = payload
+    else
+        redis.call('ZREM', KEYS[1], id)
+        redis.call('HDEL', KEYS[2], id)
+    end
+end
+return claimed
+""")
+
+
+def reminder_id(reservation, kind):
+    return f"{reservation['_id']}:{kind}"
+
+
+def laundry_name(laundry):
+    if not laundry:
+        return "세탁실"
+    return laundry.get("name") or f"{'건조기' if laundry.get('type') == 'dryer' else '세탁기'} {laundry.get('id')}"
+
+
+# 예약 하나의 알림 (시작 REMINDER_BEFORE_START_MINUTES 분 전, 종료 시각) - [(id, 보낼 시각, 내용)]
+# 시작 알림 시각이 이미 지났으면 바로 보냄 (시작 직전에 예약한 경우)
+def build_reminders(reservation, laundry, now=None):
+    now = now or datetime.now()
+    name = laundry_name(laundry)
+    period = f"{reservation['start_time']:%H:%M} ~ {reservation['end_time']:%H:%M}"
+    user_id = str(reservation["user_id"])
+    reminders = []
+    if reservation["start_time"] > now:
+        fire_at = max(now, reservation["start_time"] - timedelta(minutes=REMINDER_BEFORE_START_MINUTES))
+        reminders.append((reminder_id(reservation, "start"), fire_at, {
+            "user_id": user_id, "kind": "start",
+            "title": f"{name} 예약 시간이 다가옵니다", "body": f"{period} 예약이 곧 시작됩니다.",
+        }))
+    if reservation["end_time"] > now:
+        reminders.append((reminder_id(reservation, "done"), reservation["end_time"], {
+            "user_id": user_id, "kind": "done",
+            "title": f"{name} 이용 시간이 끝났습니다", "body": "세탁물을 찾아가주세요.",
+        }))
+    return reminders
+
+
+# 예약 알림 등록 (파이프라인 1회) - items: [(예약, 기기)]
+def schedule_reminders(items, now=None):
+    pipe = redis_client.pipeline(transaction=False)
+    for reservation, laundry in items:
+        for rid, fire_at, payload in build_reminders(reservation, laundry, now):
+            pipe.hset(REMINDER_PAYLOAD_KEY, rid, json.dumps(payload, ensure_ascii=False))
+            pipe.zadd(REMINDER_QUEUE_KEY, {rid: fire_at.timestamp()})
+    pipe.execute()
+
+
+# 취소된 예약의 알림 삭제 (파이프라인 1회)
+def cancel_reminders(reservations):
+    ids = [reminder_id(reservation, kind) for reservation in reservations for kind in ("start", "done")]
+    if not ids:
+        return
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.zrem(REMINDER_QUEUE_KEY, *ids)
+    pipe.hdel(REMINDER_PAYLOAD_KEY, *ids)
+    pipe.execute()
+
+
+# 사용자 기기 토큰 등록 (최근 MAX_DEVICE_TOKENS개만 유지, 같은 토큰은 맨 뒤로)
+def register_device_token(db, user_id, token):
+    db.user.update_one({"_id": user_id}, {"$pull": {"push_tokens": token}})
+    db.user.update_one({"_id": user_id},
+                       {"$push": {"push_tokens": {"$each": [token], "$slice": -MAX_DEVICE_TOKENS}}})
+
+
+def unregister_device_token(db, user_id, token):
+    db.user.update_one({"_id": user_id}, {"$pull": {"push_tokens": token}})
+
+
+def reminder_queue_stats(now=None):
+    now = now or datetime.now()
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.zcard(REMINDER_QUEUE_KEY)
+    pipe.zcount(REMINDER_QUEUE_KEY, "-inf", now.timestamp())
+    queued, due = pipe.execute()
+    return {"queued": queued, "due": due}
+
+
+# 발송 방식 - send(messages)는 메시지마다 (결과, 무효 토큰 목록)을 순서대로 반환
+# 메시지: {"id", "user_id", "tokens": [...], "title", "body", "data": {...}}
+
+# 로컬 개발 / 벤치마크용: 실제로 보내지 않음
+# latency_ms: 발송 요청 한 번의 왕복 시간, max_batch: 요청 한 번에 보낼 수 있는 토큰 수, failure_rate: 일시 오류 비율
+class FakeTransport:
+    def __init__(self, latency_ms=0, max_batch=500, failure_rate=0.0, verbose=False, seed=None):
+        self.latency_ms = latency_ms
+        self.max_batch = max_batch
+        self.failure_rate = failure_rate
+        self.verbose = verbose
+        self.rng = random.Random(seed)
+        self.requests = 0
+        self.delivered = 0
+
+    def send(self, messages):
+        tokens = sum(len(message["tokens"]) for message in messages)
+        calls = max(1, -(-tokens // self.max_batch))
+        self.requests += calls
+        if self.latency_ms:
+            time.sleep(calls * self.latency_ms / 1000)
+
+        results = []
+        for message in messages:
+            if self.rng.random() < self.failure_rate:
+                results.append((RETRY, []))
+                continue
+            self.delivered += len(message["tokens"])
+            if self.verbose:
+                print(f"[알림] {message['id']} → {len(message['tokens'])}대: {message['title']} / {message['body']}")
+            results.append((SENT, []))
+        return results
+
+
+# Firebase Cloud Messaging: 토큰 FCM_BATCH_LIMIT개씩 send_each 한 번으로 발송
+# 한 기기라도 받으면 성공, 모두 일시 오류면 재시도, 등록 해제된 토큰은 무효 토큰으로 반환
+class FcmTransport:
+    FCM_BATCH_LIMIT = 500
+
+    def __init__(self, credentials_path=None):
+        import firebase_admin
+        from firebase_admin import credentials, exceptions, messaging
+
+        if not firebase_admin._apps:
+            firebase_admin.initialize_app(credentials.Certificate(credentials_path) if credentials_path else None)
+        self.messaging = messaging
+        self.errors = exceptions
+        self.invalid_errors = (messaging.UnregisteredError, messaging.SenderIdMismatchError)
+
+    def send(self, messages):
+        targets = [(i, token) for i, message in enumerate(messages) for token in message["tokens"]]
+        outcomes = [[] for _ in messages]
+        for offset in range(0, len(targets), self.FCM_BATCH_LIMIT):
+            chunk = targets[offset:offset + self.FCM_BATCH_LIMIT]
+            batch = [self.messaging.Message(
+                token=token,
+                notification=self.messaging.Notification(title=messages[i]["title"], body=messages[i]["body"]),
+                data=messages[i]["data"],
+            ) for i, token in chunk]
+            try:
+                responses = self.messaging.send_each(batch).responses
+            except self.errors.FirebaseError as e:
+                print(f"FCM 발송 실패: {e}")
+                responses = [None] * len(chunk)
+            for (i, token), response in zip(chunk, responses):
+                outcomes[i].append((token, response))
+
+        results = []
+        for outcome in outcomes:
+            invalid = [token for token, r in outcome
+                       if r is not None and not r.success and isinstance(r.exception, self.invalid_errors)]
+            if any(r is not None and r.success for _, r in outcome):
+                results.append((SENT, invalid))
+            elif len(invalid) < len(outcome):
+                results.append((RETRY, invalid))
+            else:
+                results.append((FAILED, invalid))
+        return results
+
+
+# 보낼 시각이 된 알림 한 배치 발송 - {"claimed", "sent", "retried", "dropped"}
+# Redis 왕복: 꺼내기 1회 + 결과 반영 1~2회, MongoDB: 사용자 기기 토큰 조회 1회 (+ 무효 토큰 정리)
+def dispatch_due(db, transport, now=None, batch_size=REMINDER_BATCH_SIZE):
+    now = time.time() if now is None else now
+    claimed = _CLAIM_SCRIPT(keys=[REMINDER_QUEUE_KEY, REMINDER_PAYLOAD_KEY],
+                            args=[now, batch_size, now + REMINDER_VISIBILITY_SECONDS, REMINDER_SENT_PREFIX])
+    stats = {"claimed": len(claimed) // 2, "sent": 0, "retried": 0, "dropped": 0}
+    if not claimed:
+        return stats
+
+    reminders = [(claimed[i].decode(), json.loads(claimed[i + 1])) for i in range(0, len(claimed), 2)]
+    user_ids = set()
+    for _, payload in reminders:
+        try:
+            user_ids.add(ObjectId(payload["user_id"]))
+        except InvalidId:
+            pass
+    tokens = {str(u["_id"]): u.get("push_tokens", [])
+              for u in db.user.find({"_id": {"$in": list(user_ids)}}, {"push_tokens": 1})}
+
+    # 같은 사용자에게 같은 기기 토큰이 중복되면 한 번만 보냄
+    # 알림을 받을 기기가 없는 사용자의 알림은 보내지 못한 것(dropped)으로 큐에서 지움
+    messages = []
+    done = []
+    dropped = []
+    for rid, payload in reminders:
+        device_tokens = list(dict.fromkeys(tokens.get(payload["user_id"], [])))
+        if not device_tokens:
+            dropped.append(rid)
+            stats["dropped"] += 1
+            continue
+        messages.append({"id": rid, "user_id": payload["user_id"], "tokens": device_tokens, "title": payload["title"], "body": payload["body"],
+                         "data": {"reminder_id": rid, "kind": payload["kind"]}})
+
+    retry = []
+    invalid_tokens = {}
+    for message, (result, invalid) in zip(messages, transport.send(messages) if messages else []):
+        if result == RETRY:
+            retry.append(message["id"])
+        elif result == SENT:
+            done.append(message["id"])
+            stats["sent"] += 1
+        else:
+            dropped.append(message["id"])
+            stats["dropped"] += 1
+        if invalid:
+            invalid_tokens.setdefault(message["user_id"], set()).update(invalid)
+
+    # 보낸 알림만 보낸 표시를 남김 (다시 꺼내도 중복 발송하지 않도록)
+    pipe = redis_client.pipeline(transaction=False)
+    if done or dropped:
+        pipe.zrem(REMINDER_QUEUE_KEY, *done, *dropped)
+        pipe.hdel(REMINDER_PAYLOAD_KEY, *done, *dropped)
+        pipe.hdel(REMINDER_ATTEMPTS_KEY, *done, *dropped)
+        for rid in done:
+            pipe.set(f"{REMINDER_SENT_PREFIX}{rid}", 1, ex=REMINDER_SENT_TTL_SECONDS)
+    for rid in retry:
+        pipe.hincrby(REMINDER_ATTEMPTS_KEY, rid, 1)
+    results = pipe.execute()
+
+    # 재시도: 횟수에 따라 간격을 늘려서 다시 큐에 넣음, 최대 횟수를 넘으면 버림
+    if retry:
+        attempts = results[-len(retry):]
+        pipe = redis_client.pipeline(transaction=False)
+        for rid, attempt in zip(retry, attempts):
+            if attempt >= REMINDER_MAX_ATTEMPTS:
+                pipe.zrem(REMINDER_QUEUE_KEY, rid)
+                pipe.hdel(REMINDER_PAYLOAD_KEY, rid)
+                pipe.hdel(REMINDER_ATTEMPTS_KEY, rid)
+                stats["dropped"] += 1
+            else:
+                pipe.zadd(REMINDER_QUEUE_KEY, {rid: now + REMINDER_RETRY_SECONDS * 2 ** (attempt - 1)})
+                stats["retried"] += 1
+        pipe.execute()
+
+    if invalid_tokens:
+        db.user.bulk_write([
+            UpdateOne({"_id": ObjectId(user_id)}, {"$pull": {"push_tokens": {"$in": list(stale)}}})
+            for user_id, stale in invalid_tokens.items()
+        ], ordered=False)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="예약 알림 발송 워커")
+    parser.add_argument("--fake", action="store_true", help="실제로 보내지 않고 로그만 남김")
+    args = parser.parse_args()
+
+    load_dotenv()
+    client = MongoClient(os.getenv("MONGO_URI", "mongodb://localhost:27017/"))
+    db = client[os.getenv("MONGO_DB", "jungdry")]
+    transport = FakeTransport(verbose=True) if args.fake else FcmTransport(os.getenv("FCM_CREDENTIALS"))
+
+    running = True
+
+    def stop(signum, frame):
+        nonlocal running
+        running = False
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    # 여러 워커를 띄워도 꺼내기가 원자적이라 같은 알림을 나눠 가지지 않음
+    print("예약 알림 워커 시작")
+    while running:
+        try:
+            stats = dispatch_due(db, transport)
+        except Exception as e:
+            print(f"알림 발송 실패: {e}")
+            stats = {"claimed": 0}
+        if stats["claimed"]:
+            print(f"알림 발송: {stats}")
+        # 배치가 가득 찼으면 바로 다음 배치, 아니면 잠시 대기
+        if stats["claimed"] < REMINDER_BATCH_SIZE:
+            time.sleep(REMINDER_POLL_SECONDS)
+    print("예약 알림 워커 종료")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+from datetime import datetime, timedelta
+
+from redis.exceptions import RedisError
+
+from redis_service import redis_client
+from availability import (
+    AVAILABILITY_DAYS, SLOT_MINUTES, BLACKOUT_HOURS,
+    availability_window, compute_available_times, covered_slots, slot_duration,
+)
+from machine_status import compute_status
+
+# Redis 예약 점유 비트맵: 기기별/날짜별 키 1개, 시간 슬롯 1개당 비트 1개
+# MongoDB가 원본 데이터이고 비트맵은 조회용 인덱스
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+READY_KEY = "occupancy:ready"          # 재구성이 끝났는지 표시 (Redis 초기화 시 사라짐)
+KEEP_DAYS = 1                          # 지난 날짜 비트맵 보관 기간
+
+
+def _key(laundry_id, day):
+    return f"occupancy:{laundry_id}:{day.strftime('%Y%m%d')}"
+
+
+def _day_start(time):
+    return datetime(time.year, time.month, time.day)
+
+
+# 키 만료 시간: 해당 날짜가 끝난 뒤 KEEP_DAYS 일
+def _expire_at(day):
+    return int((_day_start(day) + timedelta(days=1 + KEEP_DAYS)).timestamp())
+
+
+# 비트맵 바이트에서 켜진 슬롯을 연속 구간 목록으로 변환
+def bitmap_intervals(day, bitmap):
+    step = timedelta(minutes=SLOT_MINUTES)
+    intervals = []
+    run_start = None
+    for slot in range(SLOTS_PER_DAY + 1):
+        byte = slot // 8
+        is_set = (slot < SLOTS_PER_DAY and byte < len(bitmap)
+                  and bitmap[byte] & (0x80 >> (slot % 8)))
+        if is_set and run_start is None:
+            run_start = slot
+        elif not is_set and run_start is not None:
+            intervals.append((day + run_start * step, day + slot * step))
+            run_start = None
+    return intervals
+
+
+# 예약 구간의 비트를 켜거나 끄는 명령을 파이프라인에 추가
+def _set_bits(pipe, laundry_id, start, end, value):
+    days = set()
+    for day, slot in covered_slots(start, end):
+        key = _key(laundry_id, day)
+        pipe.setbit(key, slot, value)
+        if day not in days:
+            days.add(day)
+            pipe.expireat(key, _expire_at(day))
+
+
+# 예약 생성/취소 시 비트맵 반영 (왕복 1회)
+# Redis 오류 시 비트맵을 더 이상 신뢰할 수 없으므로 준비 표시를 지워 MongoDB 조회로 전환
+def _apply(laundry_id, start, end, value):
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        _set_bits(pipe, laundry_id, start, end, value)
+        pipe.execute()
+        return True
+    except RedisError:
+        try:
+            redis_client.delete(READY_KEY)
+        except RedisError:
+            pass
+        return False
+
+
+def mark_reservation(laundry_id, start, end):
+    return _apply(laundry_id, start, end, 1)
+
+
+def clear_reservation(laundry_id, start, end):
+    return _apply(laundry_id, start, end, 0)
+
+
+# MongoDB 예약을 기준으로 기대되는 비트맵 {키: bytearray} 계산
+# 조회 기간(어제 ~ AVAILABILITY_DAYS 뒤)은 빈 날짜도 포함하고, 그 뒤는 예약이 있는 날짜만 포함
+# (반복 예약은 RECURRENCE_MAX_WEEKS 뒤까지 잡히므로 끝 날짜를 제한하지 않음)
+def expected_bitmaps(db, laundry_ids, now=None, days=AVAILABILITY_DAYS):
+    now = now or datetime.now()
+    window_start = _day_start(now) - timedelta(days=KEEP_DAYS)
+    window_end = _day_start(now) + timedelta(days=days + 1)
+
+    bitmaps = {}
+    for laundry_id in laundry_ids:
+        for offset in range((window_end - window_start).days):
+            bitmaps[_key(laundry_id, window_start + timedelta(days=offset))] = bytearray((SLOTS_PER_DAY + 7) // 8)
+
+    cursor = db.use.find(
+        {
+            "laundry_id": {"$in": list(laundry_ids)},
+            "end_time": {"$gt": window_start},
+        },
+        {"_id": 0, "laundry_id": 1, "start_time": 1, "end_time": 1},
+    )
+    for r in cursor:
+        for day, slot in covered_slots(r["start_time"], r["end_time"]):
+            if day < window_start:
+                continue
+            bitmap = bitmaps.setdefault(_key(r["laundry_id"], day), bytearray((SLOTS_PER_DAY + 7) // 8))
+            bitmap[slot // 8] |= 0x80 >> (slot % 8)
+    return bitmaps
+
+
+# MongoDB 기준으로 비트맵 전체 재구성 (앱 시작 시 / 불일치 감지 시)
+def rebuild_occupancy(db, laundry_ids=None, now=None):
+    if laundry_ids is None:
+        laundry_ids = [laundry["_id"] for laundry in db.laundry.find({}, {"_id": 1})]
+    bitmaps = expected_bitmaps(db, laundry_ids, now)
+
+    pipe = redis_client.pipeline(transaction=True)
+    for key, bitmap in bitmaps.items():
+        day = datetime.strptime(key.rsplit(":", 1)[1], "%Y%m%d")
+        pipe.set(key, bytes(bitmap))
+        pipe.expireat(key, _expire_at(day))
+    pipe.set(READY_KEY, 1)
+    pipe.execute()
+
+
+# 준비 표시가 없으면 (Redis 초기화, 쓰기 실패 후) 재구성 - 재구성 여부 반환
+def rebuild_if_missing(db, now=None):
+    if redis_client.exists(READY_KEY):
+        return False
+    rebuild_occupancy(db, now=now)
+    return True
+
+
+# Redis 비트맵과 MongoDB 기준 비트맵을 비교해 다른 키 목록 반환
+def detect_drift(db, laundry_ids, now=None):
+    bitmaps = expected_bitmaps(db, laundry_ids, now)
+    keys = list(bitmaps)
+    pipe = redis_client.pipeline(transaction=False)
+    for key in keys:
+        pipe.get(key)
+    actual = pipe.execute()
+
+    drifted = []
+    for key, value in zip(keys, actual):
+        value = (value or b"").ljust(len(bitmaps[key]), b"\x00")
+        if value[:len(bitmaps[key])] != bytes(bitmaps[key]):
+            drifted.append(key)
+    return drifted
+
+
+# 불일치가 있으면 재구성 (재구성 여부 반환)
+def repair_if_drifted(db, laundry_ids=None, now=None):
+    if laundry_ids is None:
+        laundry_ids = [laundry["_id"] for laundry in db.laundry.find({}, {"_id": 1})]
+    if detect_drift(db, laundry_ids, now):
+        rebuild_occupancy(db, laundry_ids, now)
+        return True
+    return False
+
+
+# 여러 기기의 날짜별 비트맵 키 [(기기, 날짜, 키)]
+def bitmap_keys(laundry_ids, first_day, days):
+    return [(laundry_id, first_day + timedelta(days=offset), _key(laundry_id, first_day + timedelta(days=offset)))
+            for laundry_id in laundry_ids for offset in range(days)]
+
+
+# 읽어 온 비트맵 값을 기기별 예약 구간으로 변환 (비동기 조회 경로와 공용)
+def intervals_from_bitmaps(laundry_ids, keys, values):
+    intervals = {laundry_id: [] for laundry_id in laundry_ids}
+    for (laundry_id, day, _), value in zip(keys, values):
+        if value:
+            intervals[laundry_id].extend(bitmap_intervals(day, value))
+    return intervals
+
+
+# 여러 기기의 날짜별 비트맵을 파이프라인 1회로 읽어 예약 구간으로 변환
+# 비트맵이 준비되지 않았으면 None (호출하는 쪽에서 MongoDB로 대체)
+def load_intervals(laundry_ids, first_day, days):
+    keys = bitmap_keys(laundry_ids, first_day, days)
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.exists(READY_KEY)
+    for _, _, key in keys:
+        pipe.get(key)
+    try:
+        ready, *values = pipe.execute()
+    except RedisError:
+        return None
+    if not ready:
+        return None
+    return intervals_from_bitmaps(laundry_ids, keys, values)
+
+
+# 특정 시간에 기기를 사용할 수 있는지 (GETBIT 파이프라인 1회)
+# 비트맵이 준비되지 않았거나 Redis 오류면 None (호출하는 쪽에서 MongoDB로 확인)
+def is_slot_free(laundry_id, start, end):
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.exists(READY_KEY)
+    for day, slot in covered_slots(start, end):
+        pipe.getbit(_key(laundry_id, day), slot)
+    try:
+        ready, *bits = pipe.execute()
+    except RedisError:
+        return None
+    if not ready:
+        return None
+    return not any(bits)
+
+
+# 비트맵으로 예약 가능 시간 계산 (비트맵이 없으면 None)
+def get_available_times(laundry, now=None, days=AVAILABILITY_DAYS,
+                        slot_minutes=SLOT_MINUTES, blackout=BLACKOUT_HOURS):
+    now = now or datetime.now()
+    duration = slot_duration(laundry)
+    window_start, window_end = availability_window(now, duration, days)
+    intervals = load_intervals([laundry["_id"]], window_start, (window_end - window_start).days + 1)
+    if intervals is None:
+        return None
+    return compute_available_times(intervals[laundry["_id"]], duration, now, days, slot_minutes, blackout)
+
+
+# 비트맵으로 전체 기기 상태 계산 (비트맵이 없으면 None)
+def get_machine_statuses(laundries, now=None, days=AVAILABILITY_DAYS):
+    now = now or datetime.now()
+    intervals = load_intervals([laundry["_id"] for laundry in laundries], _day_start(now), days + 1)
+    if intervals is None:
+        return None
+    for laundry in laundries:
+        laundry.update(compute_status(intervals[laundry["_id"]], slot_duration(laundry), now))
+    return laundries
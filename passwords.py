@@ -0,0 +1,49 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import bcrypt
+
+from metrics import timed
+
+# bcrypt 전용 작업 풀
+# 해시 계산은 요청 하나당 수십 ms의 CPU를 쓰므로 동시에 처리하는 개수를 제한하고,
+# 대기 중인 작업이 너무 많으면 바로 거절해서 다른 라우트가 밀리지 않게 함
+BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", 2))
+BCRYPT_MAX_PENDING = int(os.getenv("BCRYPT_MAX_PENDING", 8))     # 실행 중 + 대기 중 최대 개수
+BCRYPT_TIMEOUT = float(os.getenv("BCRYPT_TIMEOUT", 2))           # 결과 대기 시간 (초)
+
+
+class PasswordHasherBusy(Exception):
+    pass
+
+
+_executor = ThreadPoolExecutor(max_workers=BCRYPT_WORKERS, thread_name_prefix="bcrypt")
+_slots = threading.BoundedSemaphore(BCRYPT_MAX_PENDING)
+
+
+def _run(fn, *args):
+    if not _slots.acquire(blocking=False):
+        raise PasswordHasherBusy()
+    try:
+        future = _executor.submit(fn, *args)
+    except RuntimeError:
+        _slots.release()
+        raise
+    future.add_done_callback(lambda _: _slots.release())
+    try:
+        with timed("bcrypt"):
+            return future.result(timeout=BCRYPT_TIMEOUT)
+    except FutureTimeoutError:
+        raise PasswordHasherBusy()
+
+
+# 비밀번호 해시 생성 (풀이 가득 차면 PasswordHasherBusy)
+def hash_password(password):
+    return _run(lambda pw: bcrypt.hashpw(pw.encode('utf-8'), bcrypt.gensalt()), password)
+
+
+# 비밀번호 확인 (풀이 가득 차면 PasswordHasherBusy)
+def check_password(password, hashed):
+    return _run(lambda pw, h: bcrypt.checkpw(pw.encode('utf-8'), h), password, hashed)
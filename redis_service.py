@@ -1,36 +1,257 @@
+import hashlib
 import os
+import time
 import redis
-from datetime import timedelta
-
-# Redis 연결
-redis_client = redis.Redis.from_url(os.getenv("REDIS_URL", "redis://redis:6379/0"))
-
-# 리프레시 토큰 Redis에 저장
-def save_refresh_token(user_id, token, expires_delta=None):
-    key = f"refresh_token:{user_id}"
-    if expires_delta:
-        redis_client.setex(key, expires_delta, token)
-    else:
-        # 기본 2주 만료
-        redis_client.setex(key, 1209600, token)
-
-# 사용자의 리프레시 토큰 조회
-def get_refresh_token(user_id):
-    key = f"refresh_token:{user_id}"
-    token = redis_client.get(key)
-    if token:
-        return token.decode('utf-8')
-    return None
-
-# 로그아웃 시 사용자의 리프레시 토큰 삭제
-def delete_refresh_token(user_id):
-    key = f"refresh_token:{user_id}"
-    redis_client.delete(key)
-
-# 특정 사용자의 모든 세션 토큰 삭제 (전체 로그아웃)
-def delete_all_refresh_tokens(user_id):
-    key = f"refresh_token:{user_id}"
-    redis_client.delete(key)
+
+# Redis 연결 풀 설정 (워커 스레드 수 + pub/sub 구독 연결 2개 이상이어야 함)
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", 32))
+REDIS_POOL_TIMEOUT = float(os.getenv("REDIS_POOL_TIMEOUT", 2))          # 풀이 가득 찼을 때 대기 시간 (초)
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", 2))
+REDIS_CONNECT_TIMEOUT = float(os.getenv("REDIS_CONNECT_TIMEOUT", 2))
+
+# Redis 연결 (fork 이후 연결 풀은 프로세스 ID를 확인해 자동으로 새로 만들어짐)
+redis_client = redis.Redis.from_url(
+    os.getenv("REDIS_URL", "redis://redis:6379/0"),
+    connection_pool_class=redis.BlockingConnectionPool,
+    max_connections=REDIS_MAX_CONNECTIONS,
+    timeout=REDIS_POOL_TIMEOUT,
+    socket_timeout=REDIS_SOCKET_TIMEOUT,
+    socket_connect_timeout=REDIS_CONNECT_TIMEOUT,
+    health_check_interval=30,
+)
+
+# 리프레시 토큰 세션 (기기마다 하나, 다른 기기에서 로그인해도 기존 세션 유지)
+# - sessions:{user_id}        : 해시, 세션 id → "현재 토큰 해시|직전 토큰 해시|로그인 시각|기기 정보|마지막 교체 시각"
+# - sessions:{user_id}:expiry : 정렬 집합, 세션 id → 만료 시각 (해시 필드는 만료 시간을 따로 가질 수 없으므로)
+# 생성 / 갱신 / 폐기는 각각 Redis 왕복 1회, 전체 로그아웃은 키 두 개 삭제 1회
+# 토큰 원문은 저장하지 않고 SHA-256 해시만 저장
+REFRESH_TOKEN_TTL = int(os.getenv("REFRESH_TOKEN_EXPIRES", 1209600))
+MAX_SESSIONS_PER_USER = int(os.getenv("MAX_SESSIONS_PER_USER", 10))
+# 교체 직후 이 시간 안에는 직전 토큰도 받아줌 (갱신 응답이 유실됐거나 다른 탭이 동시에 갱신한 경우)
+REFRESH_GRACE_SECONDS = int(os.getenv("REFRESH_GRACE_SECONDS", 30))
+
+# 세션 갱신 결과
+SESSION_ROTATED = 1
+SESSION_MISSING = 0        # 없거나 만료된 세션
+SESSION_REUSED = -1        # 이미 교체된 예전 토큰 재사용 (탈취로 보고 세션 폐기)
+
+# 세션 생성: 만료된 세션 정리 + 저장 + 기기 수 초과 시 가장 오래된 세션 제거 + 키 만료 시각 갱신
+# KEYS: 해시, 만료 정렬 집합 / ARGV: 세션 id, 값, 현재 시각, 만료 시각, 최대 세션 수
+_CREATE_SESSION_SCRIPT = redis_client.register_script("""
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[3])
+for _, sid in ipairs(expired) do
+    redis.call('HDEL', KEYS[1], sid)
+end
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', ARGV[3])
+redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+redis.call('ZADD', KEYS[2], ARGV[4], ARGV[1])
+local overflow = redis.call('ZCARD', KEYS[2]) - tonumber(ARGV[5])
+if overflow > 0 then
+    for _, sid in ipairs(redis.call('ZRANGE', KEYS[2], 0, overflow - 1)) do
+        redis.call('HDEL', KEYS[1], sid)
+    end
+    redis.call('ZREMRANGEBYRANK', KEYS[2], 0, overflow - 1)
+end
+local last = redis.call('ZRANGE', KEYS[2], -1, -1, 'WITHSCORES')[2]
+redis.call('EXPIREAT', KEYS[1], last)
+redis.call('EXPIREAT', KEYS[2], last)
+return 1
+""")
+
+# 세션 갱신: 현재 토큰이 맞으면 새 토큰 해시로 교체하고 만료 시각 연장
+# 직전 토큰은 마지막 교체 후 유예 시간 안에만 받아줌 (교체 시각은 그대로 두어 유예 시간이 늘어나지 않게 함)
+# 유예 시간이 지난 직전 토큰이나 그보다 오래된 토큰은 탈취로 보고 세션 폐기
+# KEYS: 해시, 만료 정렬 집합 / ARGV: 세션 id, 요청 토큰 해시, 새 토큰 해시, 현재 시각, 새 만료 시각, 유예 시간
+_ROTATE_SESSION_SCRIPT = redis_client.register_script("""
+local stored = redis.call('HGET', KEYS[1], ARGV[1])
+local expires = tonumber(redis.call('ZSCORE', KEYS[2], ARGV[1]))
+if not stored or not expires or expires <= tonumber(ARGV[4]) then
+    redis.call('HDEL', KEYS[1], ARGV[1])
+    redis.call('ZREM', KEYS[2], ARGV[1])
+    return 0
+end
+local current = string.sub(stored, 1, 64)
+local previous = string.sub(stored, 66, 129)
+local created, device, rotated = string.match(string.sub(stored, 131), '^([^|]*)|([^|]*)|?(%d*)$')
+if current ~= ARGV[2] then
+    rotated = tonumber(rotated)
+    if previous ~= ARGV[2] or previous == current or not rotated
+            or rotated + tonumber(ARGV[6]) < tonumber(ARGV[4]) then
+        redis.call('HDEL', KEYS[1], ARGV[1])
+        redis.call('ZREM', KEYS[2], ARGV[1])
+        return -1
+    end
+else
+    rotated = ARGV[4]
+end
+redis.call('HSET', KEYS[1], ARGV[1], ARGV[3] .. '|' .. current .. '|' .. created .. '|' .. device .. '|' .. rotated)
+redis.call('ZADD', KEYS[2], ARGV[5], ARGV[1])
+local last = redis.call('ZRANGE', KEYS[2], -1, -1, 'WITHSCORES')[2]
+redis.call('EXPIREAT', KEYS[1], last)
+redis.call('EXPIREAT', KEYS[2], last)
+return 1
+""")
+
+
+def session_keys(user_id):
+    return f"sessions:{user_id}", f"sessions:{user_id}:expiry"
+
+
+def token_hash(token):
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+# 로그인한 기기의 세션 저장 (왕복 1회)
+def create_session(user_id, session_id, token, device="", ttl=REFRESH_TOKEN_TTL):
+    now = int(time.time())
+    digest = token_hash(token)
+    value = f"{digest}|{digest}|{now}|{device.replace('|', ' ')[:120]}|{now}"
+    _CREATE_SESSION_SCRIPT(keys=list(session_keys(user_id)),
+                           args=[session_id, value, now, now + ttl, MAX_SESSIONS_PER_USER])
+
+
+# /api/refresh: 요청한 리프레시 토큰을 새 토큰으로 교체 (왕복 1회) - SESSION_* 결과
+def rotate_session(user_id, session_id, old_token, new_token, ttl=REFRESH_TOKEN_TTL):
+    now = int(time.time())
+    return _ROTATE_SESSION_SCRIPT(keys=list(session_keys(user_id)),
+                                  args=[session_id, token_hash(old_token), token_hash(new_token), now, now + ttl,
+                                        REFRESH_GRACE_SECONDS])
+
+
+# 세션 id(sid)가 없는 예전 리프레시 토큰: 사용자당 하나만 저장하던 refresh_token:{user_id} 값과 같으면 True
+# GETDEL로 한 번만 통과시킴 (통과하면 호출한 쪽이 새 세션을 만들어 옮김)
+def claim_legacy_refresh_token(user_id, token):
+    stored = redis_client.getdel(f"refresh_token:{user_id}")
+    return stored is not None and stored.decode("utf-8") == token
+
+
+# 기기 하나 로그아웃 (왕복 1회)
+def revoke_session(user_id, session_id):
+    hash_key, expiry_key = session_keys(user_id)
+    pipe = redis_client.pipeline()
+    pipe.hdel(hash_key, session_id)
+    pipe.zrem(expiry_key, session_id)
+    pipe.execute()
+
+
+# 모든 기기 로그아웃 (기기 수와 관계없이 왕복 1회)
+def revoke_all_sessions(user_id):
+    redis_client.delete(*session_keys(user_id))
+
+
+# 로그인된 기기 목록 [{id, created_at, device, expires_at}] (왕복 1회, 만료된 세션 제외)
+def list_sessions(user_id):
+    hash_key, expiry_key = session_keys(user_id)
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.hgetall(hash_key)
+    pipe.zrangebyscore(expiry_key, int(time.time()), "+inf", withscores=True)
+    values, expiries = pipe.execute()
+
+    sessions = []
+    for session_id, expires_at in expiries:
+        value = values.get(session_id)
+        if value is None:
+            continue
+        created_at, device = value.decode("utf-8").split("|")[2:4]
+        sessions.append({
+            "id": session_id.decode("utf-8"),
+            "created_at": int(created_at),
+            "device": device,
+            "expires_at": int(expires_at),
+        })
+    return sessions
+
+# 토큰 버킷 요청 제한
+# 키마다 (남은 토큰, 마지막 갱신 시각)을 해시로 저장하고, 모든 키에 토큰이 있을 때만 하나씩 차감 (원자적)
+# ARGV: now, 키별 (용량, 초당 충전량) 반복 / 반환: {허용 여부, 다시 시도할 수 있을 때까지 ms}
+_TOKEN_BUCKET_SCRIPT = redis_client.register_script("""
+local now = tonumber(ARGV[1])
+local tokens = {}
+local wait_ms = 0
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 2])
+    local rate = tonumber(ARGV[i * 2 + 1])
+    local bucket = redis.call('HMGET', key, 'tokens', 'ts')
+    local available = tonumber(bucket[1]) or capacity
+    local ts = tonumber(bucket[2]) or now
+    available = math.min(capacity, available + math.max(0, now - ts) * rate)
+    tokens[i] = available
+    if available < 1 then
+        wait_ms = math.max(wait_ms, math.ceil((1 - available) / rate * 1000))
+    end
+end
+local allowed = wait_ms == 0 and 1 or 0
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 2])
+    local rate = tonumber(ARGV[i * 2 + 1])
+    local available = tokens[i] - allowed
+    redis.call('HSET', key, 'tokens', available, 'ts', now)
+    redis.call('PEXPIRE', key, math.ceil((capacity - available) / rate * 1000) + 1000)
+end
+return {allowed, wait_ms}
+""")
+
+
+# 여러 버킷을 한 번에 확인 (왕복 1회): limits = [(키, 용량, 초당 충전량), ...]
+# 반환: (허용 여부, 다시 시도할 수 있을 때까지 초) - Redis 오류 시에는 허용
+def consume_rate_limits(limits):
+    keys = [f"rate_limit:{key}" for key, _, _ in limits]
+    args = [time.time()]
+    for _, capacity, rate in limits:
+        args.extend([capacity, rate])
+    try:
+        allowed, wait_ms = _TOKEN_BUCKET_SCRIPT(keys=keys, args=args)
+    except redis.RedisError:
+        return True, 0
+    return bool(allowed), int(wait_ms) / 1000
+
+
+# 버킷을 가득 찬 상태로 되돌림 (예: 로그인에 성공하면 그 이메일의 실패 시도 제한 초기화)
+def reset_rate_limit(key):
+    try:
+        redis_client.delete(f"rate_limit:{key}")
+    except redis.RedisError:
+        pass
+
+
+# 리스(lease): 여러 인스턴스 중 하나만 작업하도록 보장
+# 비어 있으면 가져오고, 이미 내 것이면 만료 시간만 연장 (원자적)
+_LEASE_SCRIPT = redis_client.register_script("""
+local owner = redis.call('GET', KEYS[1])
+if not owner then
+    redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[2])
+    return 1
+end
+if owner == ARGV[1] then
+    redis.call('PEXPIRE', KEYS[1], ARGV[2])
+    return 1
+end
+return 0
+""")
+
+_RELEASE_LEASE_SCRIPT = redis_client.register_script("""
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+""")
+
+
+# 리스 획득/연장 (성공 여부 반환, Redis 오류 시 실패로 처리)
+def acquire_lease(name, owner, ttl_seconds):
+    try:
+        return bool(_LEASE_SCRIPT(keys=[f"lease:{name}"], args=[owner, int(ttl_seconds * 1000)]))
+    except redis.RedisError:
+        return False
+
+
+# 내가 가진 리스만 해제
+def release_lease(name, owner):
+    try:
+        _RELEASE_LEASE_SCRIPT(keys=[f"lease:{name}"], args=[owner])
+    except redis.RedisError:
+        pass
+
 
 def test_redis_connection():
     try:
@@ -0,0 +1,277 @@
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+from bson.errors import InvalidId
+from bson.objectid import ObjectId
+from pymongo.errors import BulkWriteError, DuplicateKeyError, PyMongoError
+
+from availability import slot_duration, slot_keys
+from catalog import get_laundry
+from tiering import history_collection_name, history_collections
+
+# 예약 상태 (내 예약 목록 정렬 순서: 사용 중 → 예약 완료 → 이용 완료)
+STATUS_RESERVED = "reserved"
+STATUS_USING = "using"
+STATUS_FINISHED = "finished"
+STATUS_ORDER = {STATUS_USING: 0, STATUS_RESERVED: 1, STATUS_FINISHED: 2}
+
+
+# 시작/종료 시간으로 예약 상태 계산 (DB에 쓰지 않고 조회 시점에 계산)
+def derive_status(reservation, now):
+    if reservation["start_time"] <= now <= reservation["end_time"]:
+        return STATUS_USING
+    if reservation["end_time"] < now:
+        return STATUS_FINISHED
+    return STATUS_RESERVED
+
+
+# 지난 예약 목록 한 페이지 크기
+RESERVATION_PAGE_SIZE = int(os.getenv("RESERVATION_PAGE_SIZE", 20))
+
+
+# 페이지 커서: 마지막으로 보여준 예약의 (시작 시간, _id)
+def encode_cursor(reservation):
+    return f"{reservation['start_time']:%Y%m%d%H%M%S}-{reservation['_id']}"
+
+
+# 잘못된 커서는 None (첫 페이지)
+def decode_cursor(cursor):
+    try:
+        start, reservation_id = cursor.split("-", 1)
+        return datetime.strptime(start, "%Y%m%d%H%M%S"), ObjectId(reservation_id)
+    except (AttributeError, ValueError, InvalidId):
+        return None
+
+
+# 커서보다 오래된 예약 조건 (시작 시간 역순, 같은 시작 시간이면 _id 역순)
+def _before(cursor):
+    if cursor is None:
+        return {}
+    start_time, reservation_id = cursor
+    return {"$or": [
+        {"start_time": {"$lt": start_time}},
+        {"start_time": start_time, "_id": {"$lt": reservation_id}},
+    ]}
+
+
+# 지난 예약 limit개: db.use와 월별 기록 컬렉션에서 각각 최신순으로 가져와 합침
+# 기록 컬렉션은 커서가 있는 달부터 한 달씩 내려가며 limit개가 찰 때까지만 조회
+def _past_reservations(db, user_id, now, cursor, limit):
+    order = [("start_time", -1), ("_id", -1)]
+    query = {"user_id": user_id, **_before(cursor)}
+    found = list(db.use.find({**query, "end_time": {"$lt": now}}).sort(order).limit(limit))
+
+    archived = []
+    newest_month = history_collection_name(cursor[0]) if cursor else None
+    for name in history_collections(db):
+        if len(archived) >= limit:
+            break
+        if newest_month and name > newest_month:
+            continue
+        archived += db[name].find(query).sort(order).limit(limit - len(archived))
+
+    found += archived
+    found.sort(key=lambda r: (r["start_time"], r["_id"]), reverse=True)
+    return found[:limit]
+
+
+# 사용자의 예약 목록 한 페이지 조회 (읽기 전용, 기기 정보는 캐시에서 채움) - (예약 목록, 다음 페이지 커서)
+# 첫 페이지: 사용 중 / 예정된 예약 전체 + 지난 예약 최신순 page_size개
+# 다음 페이지(cursor): 커서 이전의 지난 예약 page_size개
+def get_user_reservations(db, user_id, now=None, cursor=None, page_size=RESERVATION_PAGE_SIZE):
+    now = now or datetime.now()
+
+    reservations = []
+    if cursor is None:
+        reservations = list(db.use.find({"user_id": user_id, "end_time": {"$gte": now},
+                                         "pending": {"$exists": False}}).sort("start_time", 1))
+    past = _past_reservations(db, user_id, now, cursor, page_size + 1)
+    next_cursor = encode_cursor(past[page_size - 1]) if len(past) > page_size else None
+    reservations += past[:page_size]
+
+    for reservation in reservations:
+        reservation["status"] = derive_status(reservation, now)
+        reservation["laundry_info"] = get_laundry(db, reservation["laundry_id"])
+
+    # 상태별 정렬 (같은 상태 안에서는 조회 순서 유지)
+    reservations.sort(key=lambda r: STATUS_ORDER[r["status"]])
+    return reservations, next_cursor
+
+
+# JSON API 형식 (시간은 ISO 문자열)
+def serialize_reservation(reservation):
+    laundry = reservation.get("laundry_info") or {}
+    return {
+        "id": str(reservation["_id"]),
+        "campus_id": str(reservation.get("campus_id")),
+        "laundry_id": str(reservation["laundry_id"]),
+        "type": laundry.get("type"),
+        "no": laundry.get("id"),
+        "start": reservation["start_time"].isoformat(),
+        "end": reservation["end_time"].isoformat(),
+        "status": reservation["status"],
+    }
+
+
+# 예약 생성: (campus_id, laundry_id, slots) 유니크 인덱스로 겹침을 막는 insert_one 한 번 (왕복 1회)
+# 이미 다른 예약이 슬롯을 하나라도 차지하고 있으면 None
+def create_reservation(db, campus_id, laundry_id, user_id, start_time, end_time):
+    new_reservation = {
+        "campus_id": campus_id,
+        "laundry_id": laundry_id,
+        "user_id": user_id,
+        "status": STATUS_RESERVED,
+        "start_time": start_time,
+        "end_time": end_time,
+        "slots": slot_keys(start_time, end_time),
+        "created_at": datetime.now()
+    }
+    try:
+        db.use.insert_one(new_reservation)
+    except DuplicateKeyError:
+        return None
+    return new_reservation
+
+
+# 한 번에 예약할 수 있는 최대 개수 (반복 예약을 펼친 뒤 기준)
+BATCH_MAX_RESERVATIONS = int(os.getenv("BATCH_MAX_RESERVATIONS", 20))
+RECURRENCE_MAX_WEEKS = int(os.getenv("RECURRENCE_MAX_WEEKS", 8))
+# 트랜잭션 없이 저장한 여러 건 예약이 이 시간 안에 확정되지 않으면 (저장 도중 프로세스 종료) 스케줄러가 삭제
+BATCH_PENDING_TIMEOUT_SECONDS = int(os.getenv("BATCH_PENDING_TIMEOUT_SECONDS", 60))
+# 여러 건 취소 표시가 이 시간보다 오래되면 (표시한 요청이 삭제 전에 실패) 다른 취소 요청이 다시 가져감
+CANCEL_CLAIM_TTL_SECONDS = int(os.getenv("CANCEL_CLAIM_TTL_SECONDS", 60))
+
+
+# 반복 규칙 펼치기: (기기, 시작 시간) 목록을 매주 같은 요일/시간으로 weeks번
+# 예) [(세탁기, 화 20:00), (건조기, 화 21:00)], weeks=4 → 4주 동안 화요일마다 2건씩 8건
+def expand_weekly(items, weeks):
+    return [(laundry, start_time + timedelta(weeks=week)) for week in range(weeks) for laundry, start_time in items]
+
+
+# 여러 예약을 한꺼번에 생성 (전부 성공하거나 전부 실패) - (예약 목록, 겹치는 (기기, 시작 시간) 목록)
+# 1. 요청 안에서 서로 겹치는지 확인
+# 2. 이미 있는 예약과 겹치는지 쿼리 1회로 확인 (기기별 슬롯 $in 조건을 $or로 묶음)
+# 3. 순서 있는 insert_many 1회로 저장, 그 사이 다른 예약이 끼어들어 유니크 인덱스에 걸리면 실패로 처리
+#    - 레플리카 셋 / 샤드 클러스터: 트랜잭션 안에서 저장 (실패하면 아무것도 남지 않고, 커밋 전에는 보이지 않음)
+#    - 단일 mongod: 배치 id와 pending 표시를 달아 저장한 뒤 표시를 지워 확정, 실패하면 배치 id로 삭제
+#      (확정 전 예약은 내 예약 목록에 나오지 않고, 저장 도중 죽어서 남은 예약은 스케줄러가 삭제)
+def create_reservations(db, user_id, items):
+    now = datetime.now()
+    documents = []
+    taken = {}
+    conflicts = []
+    for laundry, start_time in items:
+        end_time = start_time + slot_duration(laundry)
+        document = {
+            "_id": ObjectId(),
+            "campus_id": laundry["campus_id"],
+            "laundry_id": laundry["_id"],
+            "user_id": user_id,
+            "status": STATUS_RESERVED,
+            "start_time": start_time,
+            "end_time": end_time,
+            "slots": slot_keys(start_time, end_time),
+            "created_at": now,
+        }
+        keys = [(laundry["_id"], slot) for slot in document["slots"]]
+        if any(key in taken for key in keys):
+            conflicts.append((laundry["_id"], start_time))
+        taken.update(dict.fromkeys(keys, document))
+        documents.append(document)
+    if conflicts:
+        return None, conflicts
+
+    slots_by_laundry = defaultdict(list)
+    for document in documents:
+        slots_by_laundry[(document["campus_id"], document["laundry_id"])] += document["slots"]
+    existing = db.use.find({"$or": [
+        {"campus_id": campus_id, "laundry_id": laundry_id, "slots": {"$in": slots}}
+        for (campus_id, laundry_id), slots in slots_by_laundry.items()
+    ]}, {"laundry_id": 1, "slots": 1})
+    for reservation in existing:
+        for slot in reservation["slots"]:
+            document = taken.get((reservation["laundry_id"], slot))
+            if document is not None and (document["laundry_id"], document["start_time"]) not in conflicts:
+                conflicts.append((document["laundry_id"], document["start_time"]))
+    if conflicts:
+        return None, conflicts
+
+    try:
+        if supports_transactions(db.client):
+            _insert_in_transaction(db, documents)
+        else:
+            _insert_pending(db, documents)
+    except BulkWriteError as e:
+        if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+            raise
+        failed = documents[e.details.get("nInserted", 0)]
+        return None, [(failed["laundry_id"], failed["start_time"])]
+    return documents, []
+
+
+# 다중 문서 트랜잭션을 쓸 수 있는 배포인지 (단일 mongod는 불가)
+def supports_transactions(client):
+    description = getattr(client, "topology_description", None)
+    return description is not None and description.topology_type_name in ("ReplicaSetWithPrimary", "Sharded")
+
+
+def _insert_in_transaction(db, documents):
+    with db.client.start_session() as session:
+        session.with_transaction(lambda s: db.use.insert_many(documents, ordered=True, session=s))
+
+
+def _insert_pending(db, documents):
+    batch_id = ObjectId()
+    for document in documents:
+        document.update(batch_id=batch_id, pending=True)
+    try:
+        db.use.insert_many(documents, ordered=True)
+    except BulkWriteError:
+        db.use.delete_many({"batch_id": batch_id})
+        raise
+    db.use.update_many({"batch_id": batch_id}, {"$unset": {"batch_id": "", "pending": ""}})
+    for document in documents:
+        del document["batch_id"], document["pending"]
+
+
+# 확정되지 않고 남은 여러 건 예약 삭제 (스케줄러) - 삭제한 예약 목록
+def sweep_pending_batches(db, now=None):
+    now = now or datetime.now()
+    cutoff = now - timedelta(seconds=BATCH_PENDING_TIMEOUT_SECONDS)
+    stale = list(db.use.find({"pending": True, "created_at": {"$lt": cutoff}}))
+    if stale:
+        db.use.delete_many({"_id": {"$in": [reservation["_id"] for reservation in stale]}, "pending": True})
+    return stale
+
+
+# 취소 표시가 없거나 오래된 예약 조건 (cancel_token은 ObjectId라 만든 시각이 들어 있음)
+def unclaimed_filter():
+    stale = ObjectId.from_datetime(datetime.now(timezone.utc) - timedelta(seconds=CANCEL_CLAIM_TTL_SECONDS))
+    return {"$or": [{"cancel_token": {"$exists": False}}, {"cancel_token": {"$lt": stale}}]}
+
+
+# 여러 예약을 한꺼번에 취소 (본인 예약만) - 이 요청이 실제로 삭제한 예약 목록 (왕복 3회)
+# 취소할 예약에 이번 요청의 표시를 남기고, 표시가 남은 예약을 읽은 뒤 delete_many로 삭제
+# 표시가 있는 예약은 다른 취소 요청(단건 취소 포함)이 건드리지 않고, 이 요청이 표시한 문서만 반환하므로
+# 같은 예약을 동시에 취소해도 취소 후처리(점유 비트맵, 사용량, 대기자 예약)는 한 번만 실행됨
+# 삭제에 실패하면 표시를 지우고, 그것도 실패하면 CANCEL_CLAIM_TTL_SECONDS 뒤에 다시 취소할 수 있음
+def cancel_reservations(db, user_id, reservation_ids):
+    token = ObjectId()
+    claimed = db.use.update_many(
+        {"_id": {"$in": reservation_ids}, "user_id": user_id, **unclaimed_filter()},
+        {"$set": {"cancel_token": token}},
+    )
+    if not claimed.modified_count:
+        return []
+    mine = {"_id": {"$in": reservation_ids}, "cancel_token": token}
+    try:
+        cancelled = list(db.use.find(mine))
+        db.use.delete_many(mine)
+    except PyMongoError:
+        try:
+            db.use.update_many(mine, {"$unset": {"cancel_token": ""}})
+        except PyMongoError:
+            pass
+        raise
+    return cancelled
@@ -0,0 +1,262 @@
+import os
+import sys
+from datetime import datetime, timedelta
+
+from bson.objectid import ObjectId
+from dotenv import load_dotenv
+from pymongo import ASCENDING, MongoClient, UpdateMany, UpdateOne
+from pymongo.errors import BulkWriteError, OperationFailure
+
+from availability import slot_keys
+
+# 예약 잠금 문서 보관 시간 (TTL) - 예약 생성은 슬롯 유니크 인덱스를 사용하므로 남은 문서 정리용
+RESERVATION_LOCK_TTL_SECONDS = int(os.getenv("RESERVATION_LOCK_TTL_SECONDS", 600))
+
+# 컬렉션별 인덱스 정의: (컬렉션, 키, 옵션)
+INDEXES = [
+    # 캠퍼스 기기 목록
+    ("laundry", [("campus_id", ASCENDING), ("type", ASCENDING), ("id", ASCENDING)],
+     {"name": "campus_machine"}),
+    # 기기별 예약 겹침 확인 / 예약 가능 시간 / 대시보드 상태 조회
+    ("use", [("campus_id", ASCENDING), ("laundry_id", ASCENDING), ("start_time", ASCENDING), ("end_time", ASCENDING)],
+     {"name": "campus_laundry_time"}),
+    # 예약 슬롯 중복 방지 (한 슬롯에는 예약 하나만 - insert_one 한 번으로 겹침 확인)
+    # 샤딩했을 때 유니크 인덱스는 샤드 키로 시작해야 하므로 campus_id, laundry_id가 앞에 옴
+    ("use", [("campus_id", ASCENDING), ("laundry_id", ASCENDING), ("slots", ASCENDING)],
+     {"name": "campus_laundry_slots_unique", "unique": True,
+      "partialFilterExpression": {"slots": {"$exists": True}}}),
+    # 내 예약 목록 (사용자별, 시작 시간 순)
+    ("use", [("user_id", ASCENDING), ("start_time", ASCENDING)],
+     {"name": "user_start_time"}),
+    # 예약 상태 스케줄러 (status별 시작 시간이 지난 예약)
+    ("use", [("status", ASCENDING), ("start_time", ASCENDING)],
+     {"name": "status_start_time"}),
+    # 오래된 예약을 기록 컬렉션으로 옮기기 (종료 시간이 지난 순서)
+    ("use", [("end_time", ASCENDING)],
+     {"name": "end_time"}),
+    # 확정되지 않고 남은 여러 건 예약 정리 (트랜잭션 없는 단일 mongod, pending 문서만 색인)
+    ("use", [("created_at", ASCENDING)],
+     {"name": "pending_created_at", "partialFilterExpression": {"pending": True}}),
+    # 로그인 / 회원가입 이메일 조회
+    ("user", [("email", ASCENDING)],
+     {"name": "email_unique", "unique": True}),
+    # 사용률 히트맵 (캠퍼스별 날짜 범위)
+    ("usage_daily", [("campus_id", ASCENDING), ("day", ASCENDING)],
+     {"name": "campus_day"}),
+    # 오래된 예약 잠금 문서 자동 삭제
+    ("reservation_locks", [("timestamp", ASCENDING)],
+     {"name": "timestamp_ttl", "expireAfterSeconds": RESERVATION_LOCK_TTL_SECONDS}),
+]
+
+
+DUPLICATE_KEY_ERROR = 11000
+DUPLICATE_REPORT_LIMIT = 20            # 유니크 인덱스 생성 실패 시 출력할 중복 값 수
+
+# 캠퍼스 구분 전에 쓰던 인덱스 (새 인덱스를 만든 뒤 삭제)
+OBSOLETE_INDEXES = [
+    ("use", "laundry_time"),
+    ("use", "laundry_slots_unique"),
+]
+
+# 샤드 키: 캠퍼스 단위로 데이터가 나뉘고, 대시보드/예약 쿼리는 모두 campus_id를 포함하므로 샤드 하나만 읽음
+# (campus_laundry_time 인덱스가 샤드 키 인덱스 역할, laundry/user처럼 작은 컬렉션은 샤딩하지 않음)
+SHARD_KEYS = {
+    "use": {"campus_id": 1, "laundry_id": 1},
+}
+
+
+# 인덱스 생성 (이미 있으면 아무 일도 하지 않음) - 만들지 못한 유니크 인덱스 이름 목록 반환
+# 기존 데이터에 중복 값이 있어 유니크 인덱스를 만들 수 없으면 중복 값을 출력하고 나머지 인덱스는 계속 생성
+# (앱 시작 시에도 호출하므로 워커가 죽지 않게 함 - 중복을 정리한 뒤 python schema.py로 다시 생성)
+def ensure_indexes(db):
+    backfill_campus_ids(db)
+    backfill_reservation_slots(db)
+    failed = []
+    for collection, keys, options in INDEXES:
+        try:
+            db[collection].create_index(keys, **options)
+        except OperationFailure as e:
+            if e.code != DUPLICATE_KEY_ERROR:
+                raise
+            failed.append(options["name"])
+            duplicates = ", ".join(f"{key} ({count}건)" for key, count in duplicate_keys(db[collection], keys, options))
+            print(f"유니크 인덱스 생성 실패 {collection}.{options['name']} - 중복 값: {duplicates}")
+    if failed:
+        # 대신할 새 인덱스가 없으면 예전 인덱스는 남겨 둠
+        return failed
+    existing = {collection: set(db[collection].index_information()) for collection, _ in OBSOLETE_INDEXES}
+    for collection, name in OBSOLETE_INDEXES:
+        if name in existing[collection]:
+            db[collection].drop_index(name)
+    return failed
+
+
+# 유니크 인덱스 키가 같은 문서 그룹 [(키 값, 문서 수)] - 배열 필드(slots)는 원소별로 비교
+def duplicate_keys(collection, keys, options, limit=DUPLICATE_REPORT_LIMIT):
+    fields = [name for name, _ in keys]
+    pipeline = [{"$match": options.get("partialFilterExpression", {})}]
+    pipeline += [{"$unwind": {"path": f"${name}", "preserveNullAndEmptyArrays": True}} for name in fields]
+    pipeline += [
+        {"$group": {"_id": {name: f"${name}" for name in fields}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}},
+        {"$sort": {"count": -1}},
+        {"$limit": limit},
+    ]
+    return [(group["_id"], group["count"]) for group in collection.aggregate(pipeline, allowDiskUse=True)]
+
+
+# 컬렉션 하나의 인덱스만 생성 (다시 만든 집계 컬렉션 등)
+def ensure_collection_indexes(db, name):
+    for collection, keys, options in INDEXES:
+        if collection == name:
+            db[collection].create_index(keys, **options)
+
+
+# campus_id가 없는 예전 기기/예약 문서를 캠퍼스에 연결 (캠퍼스가 없으면 기본 캠퍼스 생성)
+def backfill_campus_ids(db):
+    if db.laundry.find_one({"campus_id": {"$exists": False}}, {"_id": 1}) is None and \
+            db.use.find_one({"campus_id": {"$exists": False}}, {"_id": 1}) is None:
+        return
+
+    campus = db.campus.find_one(sort=[("_id", ASCENDING)])
+    if campus is None:
+        campus = {"email": "campus@example.com", "entry_date": datetime.now(), "status": "active"}
+        campus["_id"] = db.campus.insert_one(campus).inserted_id
+    db.laundry.update_many({"campus_id": {"$exists": False}}, {"$set": {"campus_id": campus["_id"]}})
+
+    requests = [
+        UpdateMany({"laundry_id": laundry["_id"], "campus_id": {"$exists": False}},
+                   {"$set": {"campus_id": laundry["campus_id"]}})
+        for laundry in db.laundry.find({}, {"campus_id": 1})
+    ]
+    if requests:
+        db.use.bulk_write(requests, ordered=False)
+
+
+# 샤드 클러스터(mongos)에서 컬렉션 샤딩 설정 (python schema.py --shard)
+def shard_collections(client, db):
+    client.admin.command("enableSharding", db.name)
+    for collection, key in SHARD_KEYS.items():
+        client.admin.command("shardCollection", f"{db.name}.{collection}", key=key)
+
+
+# slots 필드가 없는 예전 예약 문서에 슬롯 키 채우기
+def backfill_reservation_slots(db):
+    requests = [
+        UpdateOne({"_id": r["_id"]}, {"$set": {"slots": slot_keys(r["start_time"], r["end_time"])}})
+        for r in db.use.find({"slots": {"$exists": False}}, {"start_time": 1, "end_time": 1})
+    ]
+    if requests:
+        db.use.bulk_write(requests, ordered=False)
+
+
+# 중복 키(_id, 유니크 인덱스) 문서는 건너뛰고 insert_many - 새로 저장된 문서 수 반환
+# 같은 작업(기록 이동, 시드 데이터)을 여러 번 실행해도 결과가 같게 만들 때 사용
+def insert_many_ignoring_duplicates(collection, documents):
+    if not documents:
+        return 0
+    try:
+        return len(collection.insert_many(documents, ordered=False).inserted_ids)
+    except BulkWriteError as e:
+        if any(error["code"] != 11000 for error in e.details.get("writeErrors", [])):
+            raise
+        return e.details.get("nInserted", 0)
+
+
+# 자주 실행되는 쿼리 목록: (이름, 실행 계획을 반환하는 함수)
+def hot_queries(db):
+    campus_id = ObjectId()
+    laundry_id = ObjectId()
+    user_id = ObjectId()
+    now = datetime.now()
+    later = now + timedelta(days=7)
+    return [
+        ("campus_laundries", lambda: db.laundry.find({
+            "campus_id": campus_id,
+        }).explain()),
+        ("availability", lambda: db.use.find({
+            "campus_id": campus_id,
+            "laundry_id": laundry_id,
+            "start_time": {"$lt": later},
+            "end_time": {"$gt": now},
+        }).sort("start_time", 1).explain()),
+        ("machine_status", lambda: db.use.find({
+            "campus_id": campus_id,
+            "laundry_id": {"$in": [laundry_id, ObjectId()]},
+            "end_time": {"$gte": now},
+            "start_time": {"$lt": later},
+        }).sort("start_time", 1).explain()),
+        ("reserve_slots", lambda: db.use.find({
+            "campus_id": campus_id,
+            "laundry_id": laundry_id,
+            "slots": {"$in": slot_keys(now, now + timedelta(hours=2))},
+        }).limit(1).explain()),
+        ("batch_conflicts", lambda: db.use.find({"$or": [
+            {"campus_id": campus_id, "laundry_id": laundry_id, "slots": {"$in": slot_keys(now, now + timedelta(hours=1))}},
+            {"campus_id": campus_id, "laundry_id": ObjectId(), "slots": {"$in": slot_keys(now, now + timedelta(hours=2))}},
+        ]}, {"laundry_id": 1, "slots": 1}).explain()),
+        ("my_reservations", lambda: db.use.find({
+            "user_id": user_id,
+            "end_time": {"$gte": now},
+        }).sort("start_time", 1).explain()),
+        ("my_reservations_past", lambda: db.use.find({
+            "user_id": user_id,
+            "end_time": {"$lt": now},
+        }).sort([("start_time", -1), ("_id", -1)]).limit(21).explain()),
+        ("archive", lambda: db.use.find({
+            "end_time": {"$lt": now - timedelta(days=30)},
+        }).sort("end_time", 1).limit(1000).explain()),
+        ("lifecycle", lambda: db.use.find({"$or": [
+            {"status": "reserved", "start_time": {"$lte": now}},
+            {"status": "using", "end_time": {"$lt": now}},
+        ]}).explain()),
+        ("usage_heatmap", lambda: db.usage_daily.find({
+            "campus_id": campus_id,
+            "day": {"$gte": now - timedelta(days=90), "$lt": now},
+        }).explain()),
+        ("user_email", lambda: db.user.find({
+            "email": "user1@example.com",
+        }).limit(1).explain()),
+    ]
+
+
+# 실행 계획 트리에 포함된 stage 이름 모두 찾기
+def plan_stages(plan):
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(plan_stages(value))
+    elif isinstance(plan, list):
+        for value in plan:
+            stages.extend(plan_stages(value))
+    return stages
+
+
+# 모든 핫 쿼리의 실행 계획을 확인해서 COLLSCAN을 사용하는 쿼리 이름 반환
+def find_collscans(db):
+    failures = []
+    for name, explain in hot_queries(db):
+        winning_plan = explain()["queryPlanner"]["winningPlan"]
+        if "COLLSCAN" in plan_stages(winning_plan):
+            failures.append(name)
+    return failures
+
+
+# python schema.py : 인덱스 생성 후 실행 계획 검사 (COLLSCAN이 있으면 종료 코드 1)
+# python schema.py --shard : mongos에 연결해서 샤딩 설정까지 실행
+if __name__ == "__main__":
+    load_dotenv()
+    client = MongoClient(os.getenv("MONGO_URI", "mongodb://localhost:27017/"))
+    db = client[os.getenv("MONGO_DB", "jungdry")]
+
+    if ensure_indexes(db):
+        sys.exit(1)
+    if "--shard" in sys.argv:
+        shard_collections(client, db)
+    failures = find_collscans(db)
+    if failures:
+        print("COLLSCAN 쿼리 발견:", ", ".join(failures))
+        sys.exit(1)
+    print("모든 쿼리가 인덱스를 사용합니다.")
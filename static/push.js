@@ -0,0 +1,70 @@
+// 예약 알림 받기 (Firebase Cloud Messaging 웹 푸시)
+// 등록된 서비스 워커로 FCM 토큰을 받아 /api/me/devices 에 저장 (알림 워커가 이 토큰으로 발송)
+// 알림 표시는 service-worker.js 의 push 이벤트가 처리
+const FIREBASE_SDK = 'https://www.gstatic.com/firebasejs/10.12.2';
+const PUSH_TOKEN_COOKIE = 'push_token';
+
+function loadScript(src) {
+  return new Promise((resolve, reject) => {
+    const script = document.createElement('script');
+    script.src = src;
+    script.onload = resolve;
+    script.onerror = reject;
+    document.head.appendChild(script);
+  });
+}
+
+async function getPushToken(config) {
+  if (!window.firebase) {
+    await loadScript(`${FIREBASE_SDK}/firebase-app-compat.js`);
+    await loadScript(`${FIREBASE_SDK}/firebase-messaging-compat.js`);
+  }
+  if (!firebase.apps.length) {
+    firebase.initializeApp(config.firebase);
+  }
+  const registration = await navigator.serviceWorker.ready;
+  return firebase.messaging().getToken({ vapidKey: config.vapidKey, serviceWorkerRegistration: registration });
+}
+
+// 토큰을 서버에 저장 (같은 토큰은 한 번만 저장됨), 로그아웃할 때 서버가 지울 수 있도록 쿠키에도 보관
+async function registerPushToken(config, csrfToken) {
+  const token = await getPushToken(config);
+  if (!token) return false;
+  const response = await fetch('/api/me/devices', {
+    method: 'POST',
+    credentials: 'same-origin',
+    headers: { 'Content-Type': 'application/json', 'X-CSRFToken': csrfToken },
+    body: JSON.stringify({ token }),
+  });
+  if (!response.ok) return false;
+  document.cookie = `${PUSH_TOKEN_COOKIE}=${encodeURIComponent(token)}; path=/; max-age=${60 * 60 * 24 * 365}; samesite=strict`;
+  return true;
+}
+
+// 알림 받기 버튼 연결: 이미 허용했으면 토큰만 다시 저장 (토큰이 바뀌었을 수 있음), 아니면 버튼 표시
+function setupPushButton(button, config, csrfToken) {
+  if (!('serviceWorker' in navigator) || !('Notification' in window) || !('PushManager' in window)) {
+    return;
+  }
+  if (Notification.permission === 'granted') {
+    registerPushToken(config, csrfToken).catch(error => console.error('알림 등록 오류:', error));
+    return;
+  }
+  if (Notification.permission === 'denied') {
+    return;
+  }
+  button.classList.remove('hidden');
+  button.addEventListener('click', async () => {
+    button.disabled = true;
+    try {
+      // 권한 요청은 사용자가 버튼을 눌렀을 때만 (브라우저가 자동 요청을 막음)
+      if (await Notification.requestPermission() === 'granted' && await registerPushToken(config, csrfToken)) {
+        button.textContent = '예약 알림을 받습니다';
+        return;
+      }
+    } catch (error) {
+      console.error('알림 등록 오류:', error);
+    }
+    button.disabled = false;
+  });
+}
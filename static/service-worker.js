@@ -1,4 +1,40 @@
-const CACHE_NAME = 'laundry-reservation-v1';
+const CACHE_NAME = 'laundry-reservation-v2';
+const API_CACHE_NAME = 'laundry-api-v1';
+
+// stale-while-revalidate로 처리하는 JSON API (캐시된 응답을 바로 보여주고 뒤에서 ETag로 갱신)
+const API_PATTERNS = [
+  /^\/api\/campuses$/,
+  /^\/api\/campuses\/[^/]+\/laundries$/,
+  /^\/api\/laundries$/,
+  /^\/api\/laundries\/[^/]+\/availability$/,
+  /^\/api\/me\/reservations$/
+];
+
+function isCachedApi(url) {
+  return url.origin === self.location.origin && API_PATTERNS.some(pattern => pattern.test(url.pathname));
+}
+
+function staleWhileRevalidate(event) {
+  return caches.open(API_CACHE_NAME).then(cache =>
+    cache.match(event.request).then(cached => {
+      // 서버에는 브라우저 HTTP 캐시를 거쳐 If-None-Match로 확인 (바뀌지 않았으면 304)
+      const network = fetch(event.request)
+        .then(response => {
+          if (response && response.status === 200) {
+            cache.put(event.request, response.clone());
+          }
+          return response;
+        })
+        .catch(() => cached);
+
+      if (cached) {
+        event.waitUntil(network);
+        return cached;
+      }
+      return network;
+    })
+  );
+}
 const urlsToCache = [
   '/',
   '/static/manifest.json',
@@ -19,6 +55,24 @@ self.addEventListener('install', event => {
 
 // 요청을 가로채서 캐시된 응답이 있으면 반환
 self.addEventListener('fetch', event => {
+  // 실시간 상태 스트림(SSE)은 캐시하지 않고 브라우저가 직접 처리
+  if (event.request.headers.get('Accept') === 'text/event-stream') {
+    return;
+  }
+
+  const url = new URL(event.request.url);
+
+  // 로그아웃하면 사용자별 API 캐시 삭제
+  if (url.pathname === '/logout') {
+    event.waitUntil(caches.delete(API_CACHE_NAME));
+    return;
+  }
+
+  if (event.request.method === 'GET' && isCachedApi(url)) {
+    event.respondWith(staleWhileRevalidate(event));
+    return;
+  }
+
   event.respondWith(
     caches.match(event.request)
       .then(response => {
@@ -35,6 +89,12 @@ self.addEventListener('fetch', event => {
               return response;
             }
 
+            // 매번 서버에 확인해야 하는 응답(예약 시간표 등, ETag로 304 처리)은 저장하지 않음
+            const cacheControl = response.headers.get('Cache-Control') || '';
+            if (cacheControl.includes('no-cache') || cacheControl.includes('no-store')) {
+              return response;
+            }
+
             // 응답을 복제해서 캐시에 저장 (스트림은 한 번만 사용 가능)
             const responseToCache = response.clone();
 
@@ -51,7 +111,7 @@ self.addEventListener('fetch', event => {
 
 // 오래된 캐시 삭제
 self.addEventListener('activate', event => {
-  const cacheWhitelist = [CACHE_NAME];
+  const cacheWhitelist = [CACHE_NAME, API_CACHE_NAME];
 
   event.waitUntil(
     caches.keys().then(cacheNames => {
@@ -64,4 +124,25 @@ self.addEventListener('activate', event => {
       );
     })
   );
-});
\ No newline at end of file
+});
+// 예약 알림 표시 (알림 워커가 보낸 푸시 메시지)
+self.addEventListener('push', event => {
+  if (!event.data) {
+    return;
+  }
+  const payload = event.data.json();
+  const notification = payload.notification || {};
+  event.waitUntil(
+    self.registration.showNotification(notification.title || '세탁실 알림', {
+      body: notification.body || '',
+      tag: (payload.data && payload.data.reminder_id) || undefined,
+      icon: '/static/icons/icon-192x192.png'
+    })
+  );
+});
+
+// 알림을 누르면 내 예약 목록 열기
+self.addEventListener('notificationclick', event => {
+  event.notification.close();
+  event.waitUntil(clients.openWindow('/my_reservations'));
+});
@@ -0,0 +1,237 @@
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+
+from redis.exceptions import RedisError
+
+from redis_service import redis_client
+from availability import slot_duration
+
+# 기기 상태 실시간 전송 (Server-Sent Events) - 캠퍼스별
+# - reserve()/cancel_reservation()이 캠퍼스 채널에 변경된 기기 ID를 발행
+# - 워커마다 구독 스레드 1개가 모든 캠퍼스 채널을 패턴으로 구독하고,
+#   연결이 있는 캠퍼스의 상태만 한 번 다시 계산해서 변경분을 그 캠퍼스 연결에 전달
+# - 예약 시작/종료 시간이 지나면 타이머로 다시 계산
+STATUS_CHANNEL = "machine_status:events"
+HEARTBEAT_SECONDS = int(os.getenv("STATUS_STREAM_HEARTBEAT", 15))
+MAX_WAIT_SECONDS = 60          # 변경이 없어도 이 간격마다 다시 계산
+CLIENT_QUEUE_SIZE = 32         # 연결별 대기 메시지 수 (넘치면 연결 종료 후 재접속 유도)
+# gthread 워커에서는 SSE 연결 하나가 스레드 하나를 계속 차지하므로 워커당 연결 수 제한
+# (기본: 스레드의 절반, 나머지는 예약/취소/로그인 요청용) - 넘으면 503, 페이지는 폴링으로 전환
+# 많은 연결은 비동기 조회 서버(async_app.py)가 받고, 이 경로는 프록시를 거치지 않는 경우의 대비용
+STREAM_MAX_PER_WORKER = int(os.getenv("STATUS_STREAM_MAX_PER_WORKER", max(1, int(os.getenv("WEB_THREADS", 8)) // 2)))
+STREAM_RETRY_MS = int(os.getenv("STATUS_STREAM_RETRY_MS", 30000))
+
+
+def status_channel(campus_id):
+    return f"{STATUS_CHANNEL}:{campus_id}"
+
+
+# 예약/취소로 기기 상태가 바뀌었음을 알림
+def publish_status_change(campus_id, laundry_id):
+    try:
+        redis_client.publish(status_channel(campus_id), str(laundry_id))
+    except RedisError:
+        pass
+
+
+def _isoformat(time):
+    return time.isoformat() if time else None
+
+
+# 템플릿/스트림에서 사용하는 상태 형식
+def serialize_status(laundry):
+    return {
+        "id": str(laundry["_id"]),
+        "status": laundry["status"],
+        "busy_until": _isoformat(laundry.get("busy_until")),
+        "free_until": _isoformat(laundry.get("free_until")),
+    }
+
+
+# 상태가 다음에 바뀔 수 있는 시간 (사용 종료 또는 다음 예약이 사용 시간 안으로 들어오는 시간)
+def next_transition(laundries, now):
+    candidates = [now + timedelta(seconds=MAX_WAIT_SECONDS)]
+    for laundry in laundries:
+        if laundry.get("busy_until"):
+            candidates.append(laundry["busy_until"])
+        if laundry.get("free_until"):
+            candidates.append(laundry["free_until"] - slot_duration(laundry))
+    return max(now, min(candidates))
+
+
+# 대기 중인 메시지를 버리고 종료 신호(None)를 넣어 스트림을 끝냄
+def _disconnect(client):
+    with client.mutex:
+        client.queue.clear()
+    client.put_nowait(None)
+
+
+class StatusBroadcaster:
+    def __init__(self, compute_statuses):
+        # compute_statuses(): 상태(status, busy_until, free_until)가 채워진 기기 목록 반환
+        self.compute_statuses = compute_statuses
+        self.clients = set()
+        self.snapshot = {}
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.threads = []
+
+    # 연결 하나 등록: (대기열, 현재 전체 상태)
+    def subscribe(self):
+        self.start()
+        client = queue.Queue(maxsize=CLIENT_QUEUE_SIZE)
+        with self.lock:
+            first = not self.clients
+            self.clients.add(client)
+            snapshot = list(self.snapshot.values())
+        # 연결이 없는 동안은 계산을 멈추므로 첫 연결이면 바로 다시 계산
+        if first:
+            self.wakeup.set()
+        return client, snapshot
+
+    def unsubscribe(self, client):
+        with self.lock:
+            self.clients.discard(client)
+
+    # 상태를 다시 계산해 바뀐 기기만 모든 연결에 전달
+    def refresh(self):
+        laundries = self.compute_statuses()
+        current = {str(laundry["_id"]): serialize_status(laundry) for laundry in laundries}
+        with self.lock:
+            changed = [status for key, status in current.items() if self.snapshot.get(key) != status]
+            self.snapshot = current
+            clients = list(self.clients)
+        if changed:
+            for client in clients:
+                try:
+                    client.put_nowait(changed)
+                except queue.Full:
+                    # 너무 느린 연결은 끊어서 다시 접속하게 함 (재접속 시 전체 상태를 받음)
+                    self.unsubscribe(client)
+                    _disconnect(client)
+        return laundries
+
+    # 타이머 루프: 이벤트가 오거나 다음 상태 전환 시간이 되면 다시 계산 (연결이 없으면 대기만)
+    def _run(self):
+        while True:
+            with self.lock:
+                has_clients = bool(self.clients)
+            if not has_clients:
+                self.wakeup.wait()
+                self.wakeup.clear()
+                continue
+            try:
+                laundries = self.refresh()
+                now = datetime.now()
+                timeout = (next_transition(laundries, now) - now).total_seconds()
+            except Exception as e:
+                print(f"기기 상태 계산 실패: {e}")
+                timeout = MAX_WAIT_SECONDS
+            self.wakeup.wait(timeout=max(timeout, 0.5))
+            self.wakeup.clear()
+
+    # 열린 연결 모두 종료 (워커 종료 시 SSE 연결이 종료를 막지 않도록)
+    def close(self):
+        with self.lock:
+            clients = list(self.clients)
+            self.clients.clear()
+        for client in clients:
+            _disconnect(client)
+
+    # 브로드캐스터마다 한 번 실행 (처음 연결될 때 자동 실행)
+    def start(self):
+        with self.lock:
+            if self.threads:
+                return
+            self.threads = [threading.Thread(target=self._run, name="status-broadcaster", daemon=True)]
+            for thread in self.threads:
+                thread.start()
+
+    # SSE 응답 본문: 처음에 전체 상태, 이후 변경분, 주기적으로 하트비트
+    def stream(self):
+        client, snapshot = self.subscribe()
+        try:
+            if snapshot:
+                yield f"event: snapshot\ndata: {json.dumps(snapshot)}\n\n"
+            while True:
+                try:
+                    changed = client.get(timeout=HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    yield ": heartbeat\n\n"
+                    continue
+                if changed is None:
+                    return
+                yield f"event: status\ndata: {json.dumps(changed)}\n\n"
+        finally:
+            self.unsubscribe(client)
+
+
+# 캠퍼스별 브로드캐스터 모음 (워커마다 하나)
+# 캠퍼스 채널 메시지는 구독 연결 1개로 받아서 해당 캠퍼스 브로드캐스터만 깨움
+class CampusStatusHub:
+    def __init__(self, compute_statuses):
+        # compute_statuses(campus_id): 캠퍼스 기기 목록 (상태 포함)
+        self.compute_statuses = compute_statuses
+        self.broadcasters = {}
+        self.lock = threading.Lock()
+        self.listener = None
+
+    # 캠퍼스 브로드캐스터 (처음 요청될 때 생성)
+    def get(self, campus_id):
+        key = str(campus_id)
+        with self.lock:
+            broadcaster = self.broadcasters.get(key)
+            if broadcaster is None:
+                broadcaster = StatusBroadcaster(lambda: self.compute_statuses(campus_id))
+                self.broadcasters[key] = broadcaster
+            if self.listener is None:
+                self.listener = threading.Thread(target=self._listen, name="status-listener", daemon=True)
+                self.listener.start()
+        return broadcaster
+
+    # Redis 채널 구독 루프 (machine_status:events:<campus_id> 패턴)
+    def _listen(self):
+        prefix = f"{STATUS_CHANNEL}:"
+        while True:
+            try:
+                pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(f"{prefix}*")
+                while True:
+                    # 소켓 타임아웃에 걸리지 않도록 짧은 대기로 반복
+                    message = pubsub.get_message(timeout=1.0)
+                    if message is None:
+                        continue
+                    channel = message["channel"]
+                    if isinstance(channel, bytes):
+                        channel = channel.decode()
+                    with self.lock:
+                        broadcaster = self.broadcasters.get(channel[len(prefix):])
+                    if broadcaster is not None:
+                        broadcaster.wakeup.set()
+            except RedisError:
+                time.sleep(1)
+
+    # 이 워커에 열려 있는 SSE 연결 수 (모든 캠퍼스)
+    def active_streams(self):
+        with self.lock:
+            broadcasters = list(self.broadcasters.values())
+        total = 0
+        for broadcaster in broadcasters:
+            with broadcaster.lock:
+                total += len(broadcaster.clients)
+        return total
+
+    # 새 연결을 받을 수 있는지 (연결 등록은 응답 본문을 보내기 시작할 때라서 동시에 몰리면 조금 넘을 수 있음)
+    def accepting(self):
+        return self.active_streams() < STREAM_MAX_PER_WORKER
+
+    # 모든 캠퍼스의 열린 연결 종료
+    def close(self):
+        with self.lock:
+            broadcasters = list(self.broadcasters.values())
+        for broadcaster in broadcasters:
+            broadcaster.close()
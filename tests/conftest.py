@@ -0,0 +1,68 @@
+# 테스트 공용 설정: mongomock + fakeredis (benchmarks/loadtest.py와 같은 가짜 서버)로 앱 모듈을 불러옴
+# seed()는 기존 데이터를 지우므로 벤치마크 전용 이름(_bench)의 데이터베이스만 사용
+import os
+import sys
+import time
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+os.environ["MONGO_DB"] = "jungdry_bench"
+
+from loadtest import install_mocks, seed  # noqa: E402
+
+install_mocks()
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def web():
+    import app
+    app.redis_client.flushall()
+    return app
+
+
+# 사용자 3명, 기기 4대 (세탁기/건조기 번갈아), 예약 없음
+@pytest.fixture
+def seeded(web):
+    import catalog
+    import occupancy
+
+    users, laundries = seed(web.db, 3, 4, 0)
+    catalog.drop_cache()
+    occupancy.rebuild_occupancy(web.db)
+    return users, laundries
+
+
+# redis_service의 time.time()을 지금 시각으로 고정 (clock.now를 바꿔 시간 경과 표현)
+# 키 만료(EXPIREAT)는 Redis 시계를 따르므로 시작 시각은 실제 현재 시각
+@pytest.fixture
+def clock(monkeypatch):
+    import redis_service
+
+    clock = Clock(time.time())
+    monkeypatch.setattr(redis_service, "time", clock)
+    return clock
+
+
+# 로그인한 테스트 클라이언트 (첫 번째 사용자, CSRF 확인 끔)
+@pytest.fixture
+def client(web, seeded):
+    from flask_jwt_extended import create_access_token
+
+    users, _ = seeded
+    web.app.config["WTF_CSRF_ENABLED"] = False
+    with web.app.app_context():
+        token = create_access_token(identity=str(users[0]))
+    client = web.app.test_client()
+    client.set_cookie("access_token_cookie", token)
+    return client
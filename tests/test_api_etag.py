@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta
+
+import app as web_app
+from grid_cache import bump_version
+
+
+def _fail(*args, **kwargs):
+    raise AssertionError("304 응답 전에 조회하면 안 됨")
+
+
+def test_laundries_304_without_computing(client, seeded, monkeypatch):
+    first = client.get("/api/laundries")
+    assert first.status_code == 200 and first.headers["ETag"]
+
+    monkeypatch.setattr(web_app, "compute_machine_statuses", _fail)
+    second = client.get("/api/laundries", headers={"If-None-Match": first.headers["ETag"]})
+    assert second.status_code == 304
+    assert second.headers["ETag"] == first.headers["ETag"]
+
+
+def test_laundries_etag_changes_after_reservation(client, seeded):
+    _, laundries = seeded
+    first = client.get("/api/laundries")
+    bump_version(laundries[0]["_id"])
+    second = client.get("/api/laundries", headers={"If-None-Match": first.headers["ETag"]})
+    assert second.status_code == 200
+    assert second.headers["ETag"] != first.headers["ETag"]
+
+
+def test_availability_304_without_computing(client, seeded, monkeypatch):
+    _, laundries = seeded
+    path = f"/api/laundries/{laundries[0]['_id']}/availability"
+    first = client.get(path)
+    assert first.status_code == 200
+
+    monkeypatch.setattr(web_app, "reserve_grid", _fail)
+    monkeypatch.setattr(web_app, "get_available_times", _fail)
+    assert client.get(path, headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
+
+    # 다른 기간은 다른 검증값
+    later = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
+    monkeypatch.undo()
+    other = client.get(f"{path}?from={later}", headers={"If-None-Match": first.headers["ETag"]})
+    assert other.status_code == 200
+
+
+def test_etag_falls_back_to_body_hash_without_redis(client, seeded, monkeypatch):
+    monkeypatch.setattr(web_app, "versions_etag", lambda *args, **kwargs: None)
+    first = client.get("/api/laundries")
+    second = client.get("/api/laundries", headers={"If-None-Match": first.headers["ETag"]})
+    assert second.status_code == 304
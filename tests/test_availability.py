@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+
+from availability import compute_available_times
+
+DAY = datetime(2025, 5, 14)
+WASHER = timedelta(hours=1)
+DRYER = timedelta(hours=2)
+
+
+def test_past_slots_are_excluded():
+    times = compute_available_times([], WASHER, DAY.replace(hour=10, minute=30), days=1)
+    assert times["2025-05-14"][0] == "11:00"
+
+
+def test_slot_starting_now_is_included():
+    times = compute_available_times([], WASHER, DAY.replace(hour=10), days=1)
+    assert times["2025-05-14"][0] == "10:00"
+
+
+def test_blackout_hours_are_excluded_every_day():
+    times = compute_available_times([], WASHER, DAY, days=2)
+    for day in ("2025-05-14", "2025-05-15"):
+        assert times[day][0] == "06:00"
+        assert times[day][-1] == "23:00"
+        assert len(times[day]) == 18
+
+
+def test_blackout_across_midnight():
+    times = compute_available_times([], WASHER, DAY, days=1, blackout=(22, 2))
+    assert "21:00" in times["2025-05-14"]
+    assert not {"00:00", "01:00", "22:00", "23:00"} & set(times["2025-05-14"])
+
+
+def test_reservation_edges_touching_are_free():
+    busy = [(DAY.replace(hour=12), DAY.replace(hour=13))]
+    times = compute_available_times(busy, WASHER, DAY, days=1)["2025-05-14"]
+    assert "11:00" in times and "13:00" in times
+    assert "12:00" not in times
+
+
+def test_slot_crossing_midnight_checks_next_day():
+    next_day = DAY + timedelta(days=1)
+    busy = [(next_day, next_day + timedelta(hours=1))]
+    dryer = compute_available_times(busy, DRYER, DAY, days=1)["2025-05-14"]
+    washer = compute_available_times(busy, WASHER, DAY, days=1)["2025-05-14"]
+    assert "22:00" in dryer and "23:00" not in dryer
+    assert "23:00" in washer
+
+
+def test_every_day_key_present_even_when_full():
+    busy = [(DAY, DAY + timedelta(days=1))]
+    times = compute_available_times(busy, WASHER, DAY, days=2)
+    assert times["2025-05-14"] == []
+    assert times["2025-05-15"][0] == "06:00"
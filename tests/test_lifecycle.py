@@ -0,0 +1,55 @@
+from datetime import datetime, timedelta
+
+import lifecycle
+from redis_service import acquire_lease
+from tiering import archive_finished
+
+
+def _old_reservations(web, laundry, count):
+    end = datetime.now() - timedelta(days=60)
+    web.db.use.insert_many([
+        {"campus_id": laundry["campus_id"], "laundry_id": laundry["_id"], "status": "finished",
+         "start_time": end - timedelta(hours=1, days=i), "end_time": end - timedelta(days=i)}
+        for i in range(count)
+    ])
+
+
+def _stale_pending(web, laundry):
+    start = datetime.now() + timedelta(days=1)
+    web.db.use.insert_one({"laundry_id": laundry["_id"], "pending": True, "start_time": start,
+                           "end_time": start + timedelta(hours=1), "created_at": datetime.now() - timedelta(hours=1)})
+
+
+def test_run_phases_with_lease(web, seeded):
+    _, laundries = seeded
+    _stale_pending(web, laundries[0])
+    _old_reservations(web, laundries[0], 3)
+    last_run = {"archive": None, "occupancy_check": None}
+    assert lifecycle.run_phases(web.db, lambda: True, 0, last_run)
+    assert web.db.use.count_documents({"pending": True}) == 0
+    assert web.db.use.count_documents({}) == 0
+    assert last_run["archive"] == 0
+
+
+# 첫 단계 뒤 리스 연장에 실패하면 (다른 인스턴스가 가져감) 남은 단계는 실행하지 않음
+def test_run_phases_stops_when_lease_lost(web, seeded):
+    _, laundries = seeded
+    _stale_pending(web, laundries[0])
+    last_run = {"archive": None, "occupancy_check": None}
+    assert not lifecycle.run_phases(web.db, lambda: False, 0, last_run)
+    assert web.db.use.count_documents({"pending": True}) == 1
+    assert last_run == {"archive": None, "occupancy_check": None}
+
+
+def test_archive_stops_between_batches(web, seeded):
+    _, laundries = seeded
+    _old_reservations(web, laundries[0], 5)
+    renewals = iter([True, False])
+    assert archive_finished(web.db, batch_size=2, keep_going=lambda: next(renewals)) == 2
+    assert web.db.use.count_documents({}) == 3
+
+
+def test_lease_renewal_only_for_owner(web):
+    assert acquire_lease(lifecycle.LEASE_NAME, "a", 30)
+    assert acquire_lease(lifecycle.LEASE_NAME, "a", 30)
+    assert not acquire_lease(lifecycle.LEASE_NAME, "b", 30)
@@ -0,0 +1,33 @@
+from app import LOGIN_EMAIL_BUCKET
+
+
+def _login(client, password, email="user0@example.com"):
+    return client.post("/login", data={"email": email, "password": password})
+
+
+# 성공한 로그인은 이메일별 제한에 세지 않음
+def test_successful_logins_are_not_limited(web, seeded):
+    web.app.config["WTF_CSRF_ENABLED"] = False
+    client = web.app.test_client()
+    for _ in range(LOGIN_EMAIL_BUCKET[0] + 2):
+        assert _login(client, "password123").status_code == 302
+
+
+def test_failed_logins_are_limited_per_email(web, seeded):
+    web.app.config["WTF_CSRF_ENABLED"] = False
+    client = web.app.test_client()
+    for _ in range(LOGIN_EMAIL_BUCKET[0]):
+        assert _login(client, "wrong").status_code == 302
+    assert _login(client, "password123").status_code == 429
+    assert _login(client, "wrong", "user1@example.com").status_code == 302
+
+
+def test_success_resets_failed_attempts(web, seeded):
+    web.app.config["WTF_CSRF_ENABLED"] = False
+    client = web.app.test_client()
+    for _ in range(LOGIN_EMAIL_BUCKET[0] - 1):
+        _login(client, "wrong")
+    assert _login(client, "password123").status_code == 302
+    for _ in range(LOGIN_EMAIL_BUCKET[0]):
+        assert _login(client, "wrong").status_code == 302
+    assert _login(client, "wrong").status_code == 429
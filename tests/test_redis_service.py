@@ -0,0 +1,73 @@
+from redis_service import (
+    REFRESH_GRACE_SECONDS, SESSION_MISSING, SESSION_REUSED, SESSION_ROTATED,
+    consume_rate_limits, create_session, list_sessions, rotate_session,
+)
+
+
+def test_refresh_rotation(web, clock):
+    create_session("u1", "s1", "a")
+    assert rotate_session("u1", "s1", "a", "b") == SESSION_ROTATED
+    assert rotate_session("u1", "s1", "b", "c") == SESSION_ROTATED
+    assert [s["id"] for s in list_sessions("u1")] == ["s1"]
+
+
+# 교체 직후에는 직전 토큰도 받아줌 (응답 유실 / 다른 탭의 동시 갱신)
+def test_refresh_previous_token_within_grace(web, clock):
+    create_session("u1", "s1", "a")
+    assert rotate_session("u1", "s1", "a", "b") == SESSION_ROTATED
+    clock.now += REFRESH_GRACE_SECONDS - 1
+    assert rotate_session("u1", "s1", "a", "b2") == SESSION_ROTATED
+    assert rotate_session("u1", "s1", "b2", "c") == SESSION_ROTATED
+
+
+# 유예 시간은 직전 토큰으로 다시 갱신해도 늘어나지 않음
+def test_refresh_grace_not_extended(web, clock):
+    create_session("u1", "s1", "a")
+    rotate_session("u1", "s1", "a", "b")
+    clock.now += REFRESH_GRACE_SECONDS - 1
+    assert rotate_session("u1", "s1", "a", "b2") == SESSION_ROTATED
+    clock.now += 2
+    assert rotate_session("u1", "s1", "b", "b3") == SESSION_REUSED
+
+
+def test_refresh_reuse_after_grace_revokes_session(web, clock):
+    create_session("u1", "s1", "a")
+    rotate_session("u1", "s1", "a", "b")
+    clock.now += REFRESH_GRACE_SECONDS + 1
+    assert rotate_session("u1", "s1", "a", "x") == SESSION_REUSED
+    assert list_sessions("u1") == []
+    assert rotate_session("u1", "s1", "b", "c") == SESSION_MISSING
+
+
+def test_refresh_older_token_is_reuse(web, clock):
+    create_session("u1", "s1", "a")
+    rotate_session("u1", "s1", "a", "b")
+    rotate_session("u1", "s1", "b", "c")
+    assert rotate_session("u1", "s1", "a", "x") == SESSION_REUSED
+
+
+def test_refresh_expired_session(web, clock):
+    create_session("u1", "s1", "a", ttl=60)
+    clock.now += 61
+    assert rotate_session("u1", "s1", "a", "b") == SESSION_MISSING
+
+
+def test_rate_limit_bucket_refills(web, clock):
+    limits = [("login:test", 2, 1)]
+    assert consume_rate_limits(limits) == (True, 0)
+    assert consume_rate_limits(limits) == (True, 0)
+    assert consume_rate_limits(limits) == (False, 1.0)
+    clock.now += 0.5
+    assert consume_rate_limits(limits) == (False, 0.5)
+    clock.now += 0.5
+    assert consume_rate_limits(limits)[0]
+
+
+# 여러 버킷 중 하나라도 비어 있으면 어느 버킷도 차감하지 않음
+def test_rate_limit_buckets_all_or_nothing(web, clock):
+    narrow, wide = ("email:a", 1, 0.1), ("ip:1", 3, 0.1)
+    assert consume_rate_limits([narrow, wide])[0]
+    assert not consume_rate_limits([narrow, wide])[0]
+    assert consume_rate_limits([wide])[0]
+    assert consume_rate_limits([wide])[0]
+    assert not consume_rate_limits([wide])[0]
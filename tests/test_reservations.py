@@ -0,0 +1,119 @@
+from datetime import datetime, timedelta, timezone
+
+import mongomock
+import pytest
+from bson.objectid import ObjectId
+from pymongo.errors import PyMongoError
+
+import reservations
+from reservations import cancel_reservations, create_reservation, create_reservations, sweep_pending_batches
+
+
+def _evening(days=1, hour=20):
+    return (datetime.now() + timedelta(days=days)).replace(hour=hour, minute=0, second=0, microsecond=0)
+
+
+def test_batch_create(web, seeded):
+    users, laundries = seeded
+    start = _evening()
+    documents, conflicts = create_reservations(web.db, users[0], [(laundries[0], start), (laundries[1], start)])
+    assert conflicts == [] and len(documents) == 2
+    assert web.db.use.count_documents({"user_id": users[0]}) == 2
+    assert web.db.use.count_documents({"pending": {"$exists": True}}) == 0
+
+
+def test_batch_conflict_with_existing_reservation(web, seeded):
+    users, laundries = seeded
+    start = _evening()
+    create_reservation(web.db, laundries[0]["campus_id"], laundries[0]["_id"], users[1], start, start + timedelta(hours=1))
+    documents, conflicts = create_reservations(
+        web.db, users[0], [(laundries[0], start - timedelta(hours=1)), (laundries[0], start)])
+    assert documents is None
+    assert conflicts == [(laundries[0]["_id"], start)]
+    assert web.db.use.count_documents({"user_id": users[0]}) == 0
+
+
+# 확인 쿼리와 저장 사이에 다른 예약이 끼어든 경우: 먼저 저장된 앞쪽 예약도 모두 되돌림
+def test_batch_conflict_during_insert_rolls_back(web, seeded, monkeypatch):
+    users, laundries = seeded
+    laundry = laundries[0]
+    start = _evening()
+    insert_pending = reservations._insert_pending
+
+    def racing_insert(db, documents):
+        create_reservation(db, laundry["campus_id"], laundry["_id"], users[1],
+                           start + timedelta(hours=2), start + timedelta(hours=3))
+        return insert_pending(db, documents)
+
+    monkeypatch.setattr(reservations, "_insert_pending", racing_insert)
+    documents, conflicts = create_reservations(web.db, users[0], [
+        (laundry, start), (laundry, start + timedelta(hours=1)), (laundry, start + timedelta(hours=2)),
+    ])
+    assert documents is None
+    assert conflicts == [(laundry["_id"], start + timedelta(hours=2))]
+    assert web.db.use.count_documents({"user_id": users[0]}) == 0
+    assert web.db.use.count_documents({"user_id": users[1]}) == 1
+
+
+def test_sweep_removes_only_stale_pending(web, seeded):
+    users, laundries = seeded
+    now = datetime.now()
+    start = _evening()
+    web.db.use.insert_many([
+        {"laundry_id": laundries[0]["_id"], "user_id": users[0], "pending": True,
+         "start_time": start, "end_time": start + timedelta(hours=1), "created_at": now - timedelta(minutes=5)},
+        {"laundry_id": laundries[1]["_id"], "user_id": users[0], "pending": True,
+         "start_time": start, "end_time": start + timedelta(hours=1), "created_at": now},
+    ])
+    swept = sweep_pending_batches(web.db, now)
+    assert [r["laundry_id"] for r in swept] == [laundries[0]["_id"]]
+    assert web.db.use.count_documents({"pending": True}) == 1
+
+
+def _reserve_two(web, users, laundries):
+    start = _evening()
+    documents, _ = create_reservations(web.db, users[0], [(laundries[0], start), (laundries[1], start)])
+    return [document["_id"] for document in documents]
+
+
+def test_cancel_only_once(web, seeded):
+    users, laundries = seeded
+    ids = _reserve_two(web, users, laundries)
+    assert len(cancel_reservations(web.db, users[0], ids)) == 2
+    assert cancel_reservations(web.db, users[0], ids) == []
+    assert web.db.use.count_documents({"user_id": users[0]}) == 0
+
+
+def test_cancel_other_users_reservations_ignored(web, seeded):
+    users, laundries = seeded
+    ids = _reserve_two(web, users, laundries)
+    assert cancel_reservations(web.db, users[1], ids) == []
+    assert web.db.use.count_documents({"user_id": users[0]}) == 2
+
+
+# 다른 요청이 방금 표시한 예약은 건드리지 않고, 오래된 표시(삭제 전에 실패한 요청)는 다시 가져감
+def test_concurrent_cancel_claim(web, seeded):
+    users, laundries = seeded
+    ids = _reserve_two(web, users, laundries)
+    web.db.use.update_one({"_id": ids[0]}, {"$set": {"cancel_token": ObjectId()}})
+    cancelled = cancel_reservations(web.db, users[0], ids)
+    assert [r["_id"] for r in cancelled] == [ids[1]]
+
+    stale = ObjectId.from_datetime(datetime.now(timezone.utc) - timedelta(minutes=5))
+    web.db.use.update_one({"_id": ids[0]}, {"$set": {"cancel_token": stale}})
+    assert [r["_id"] for r in cancel_reservations(web.db, users[0], ids)] == [ids[0]]
+
+
+def test_cancel_failure_releases_claim(web, seeded, monkeypatch):
+    users, laundries = seeded
+    ids = _reserve_two(web, users, laundries)
+
+    def failing_delete(self, *args, **kwargs):
+        raise PyMongoError("delete failed")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(mongomock.collection.Collection, "delete_many", failing_delete)
+        with pytest.raises(PyMongoError):
+            cancel_reservations(web.db, users[0], ids)
+    assert web.db.use.count_documents({"cancel_token": {"$exists": True}}) == 0
+    assert len(cancel_reservations(web.db, users[0], ids)) == 2
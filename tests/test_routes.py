@@ -0,0 +1,29 @@
+import pytest
+from bson.objectid import ObjectId
+
+FORM = {"reserve_date": "2030-01-01", "reserve_time": "20:00"}
+
+
+@pytest.mark.parametrize("laundry_id", ["notanid", str(ObjectId())])
+@pytest.mark.parametrize("method, path", [
+    ("get", "/reserve/{}"),
+    ("post", "/reserve/{}"),
+    ("post", "/waitlist/{}"),
+    ("post", "/waitlist/{}/leave"),
+])
+def test_unknown_laundry_is_404(client, method, path, laundry_id):
+    response = getattr(client, method)(path.format(laundry_id), data=FORM)
+    assert response.status_code == 404
+
+
+def test_api_unknown_laundry_is_json_404(client):
+    response = client.get("/api/laundries/notanid/availability")
+    assert response.status_code == 404
+    assert response.get_json() == {"msg": "기기를 찾을 수 없습니다."}
+
+
+def test_reserve_without_time_shows_error(client, seeded):
+    _, laundries = seeded
+    response = client.post(f"/reserve/{laundries[0]['_id']}", data={})
+    assert response.status_code == 200
+    assert "예약 날짜와 시간을 선택해주세요." in response.get_data(as_text=True)
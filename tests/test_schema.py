@@ -0,0 +1,26 @@
+import mongomock
+
+from schema import ensure_indexes
+
+
+def test_duplicate_emails_do_not_stop_other_indexes(web, capsys):
+    db = web.client["duplicates_bench"]
+    db.user.insert_many([{"email": "a@example.com"}, {"email": "a@example.com"}, {"email": "b@example.com"}])
+    assert ensure_indexes(db) == ["email_unique"]
+    assert "{'email': 'a@example.com'} (2건)" in capsys.readouterr().out
+    assert "end_time" in db.use.index_information()
+
+    db.user.delete_one({"email": "a@example.com"})
+    assert ensure_indexes(db) == []
+    assert "email_unique" in db.user.index_information()
+
+
+# 같은 이메일로 동시에 가입해서 둘 다 중복 확인을 통과한 경우
+def test_register_duplicate_insert_shows_error(web, seeded, monkeypatch):
+    web.app.config["WTF_CSRF_ENABLED"] = False
+    monkeypatch.setattr(mongomock.collection.Collection, "find_one", lambda self, *args, **kwargs: None)
+    response = web.app.test_client().post("/register", data={
+        "email": "user0@example.com", "password": "password123", "phone": "01012341234",
+    })
+    assert response.status_code == 200
+    assert "이미 등록된 이메일입니다." in response.get_data(as_text=True)
@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta
+
+import waitlist
+from reservations import create_reservation
+
+
+def _slot(laundry, user_id, web):
+    start = (datetime.now() + timedelta(days=1)).replace(hour=20, minute=0, second=0, microsecond=0)
+    end = start + waitlist.slot_duration(laundry)
+    reservation = create_reservation(web.db, laundry["campus_id"], laundry["_id"], user_id, start, end)
+    return reservation, start, end
+
+
+def _cancel(web, reservation):
+    web.db.use.delete_one({"_id": reservation["_id"]})
+
+
+def test_promotes_exactly_one_waiter(web, seeded):
+    users, laundries = seeded
+    laundry = laundries[0]
+    reservation, start, end = _slot(laundry, users[0], web)
+    assert waitlist.join_waitlist(laundry["_id"], start, users[1]) == 1
+    assert waitlist.join_waitlist(laundry["_id"], start, users[2]) == 2
+
+    _cancel(web, reservation)
+    promoted = waitlist.promote_waiters(web.db, laundry, start, end)
+    assert [r["user_id"] for r in promoted] == [users[1]]
+    assert web.db.use.count_documents({"laundry_id": laundry["_id"], "start_time": start}) == 1
+
+    # 같은 취소를 두 번 처리해도 (다른 워커가 동시에 처리) 두 번째 대기자는 순서를 유지한 채 남음
+    assert waitlist.promote_waiters(web.db, laundry, start, end) == []
+    assert [(e["position"], e["size"]) for e in waitlist.get_user_waitlist(users[2])] == [(1, 1)]
+    assert waitlist.get_user_waitlist(users[1]) == []
+
+
+def test_skips_waiter_who_already_holds_the_slot(web, seeded):
+    users, laundries = seeded
+    laundry = laundries[1]
+    reservation, start, end = _slot(laundry, users[0], web)
+    waitlist.join_waitlist(laundry["_id"], start, users[1])
+    waitlist.join_waitlist(laundry["_id"], start, users[2])
+
+    # 첫 번째 대기자가 빈 시간을 직접 예약한 뒤 (대기 등록은 남음) 대기자 처리가 실행된 경우
+    _cancel(web, reservation)
+    create_reservation(web.db, laundry["campus_id"], laundry["_id"], users[1], start, end)
+    assert waitlist.promote_waiters(web.db, laundry, start, end) == []
+    assert waitlist.get_user_waitlist(users[1]) == []
+    assert [(e["position"], e["size"]) for e in waitlist.get_user_waitlist(users[2])] == [(1, 1)]
+
+
+def test_cancelling_user_leaves_overlapping_waitlists(web, seeded):
+    users, laundries = seeded
+    laundry = laundries[0]
+    reservation, start, end = _slot(laundry, users[0], web)
+    waitlist.join_waitlist(laundry["_id"], start, users[0])
+    waitlist.join_waitlist(laundry["_id"], start, users[1])
+
+    waitlist.leave_overlapping(laundry, start, end, users[0])
+    _cancel(web, reservation)
+    promoted = waitlist.promote_waiters(web.db, laundry, start, end)
+    assert [r["user_id"] for r in promoted] == [users[1]]
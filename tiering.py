@@ -0,0 +1,80 @@
+import os
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from pymongo import ASCENDING, DESCENDING
+
+from schema import insert_many_ignoring_duplicates
+
+# 예약 데이터 보관 계층
+# - db.use: 진행 중 / 예정 / 최근에 끝난 예약만 (겹침 확인, 예약 가능 시간 조회 대상)
+# - use_history_YYYYMM: 끝난 지 ARCHIVE_AFTER_DAYS 일이 지난 예약 (시작 시간 기준 월별 컬렉션)
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", 30))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", 1000))
+# 기록 보관 기간 (0이면 계속 보관, 그 외에는 종료 시간 기준 TTL로 삭제)
+HISTORY_RETENTION_DAYS = int(os.getenv("HISTORY_RETENTION_DAYS", 0))
+HISTORY_PREFIX = "use_history_"
+# 기록 컬렉션 목록 캐시 시간 (내 예약 목록 요청마다 listCollections를 보내지 않도록)
+# 새 월 컬렉션은 보관 작업이 한 달에 한 번 만들므로, 다른 프로세스에는 이 시간만큼 늦게 보여도 됨
+HISTORY_COLLECTIONS_TTL_SECONDS = int(os.getenv("HISTORY_COLLECTIONS_TTL_SECONDS", 60))
+
+_indexed_collections = set()
+_history_cache = {}  # 데이터베이스 이름 → (조회 시각, 기록 컬렉션 이름 목록)
+
+
+def history_collection_name(start_time):
+    return f"{HISTORY_PREFIX}{start_time:%Y%m}"
+
+
+# 월별 기록 컬렉션 인덱스 (내 예약 목록 페이지 조회 + 선택적 TTL)
+def ensure_history_indexes(db, name):
+    if name in _indexed_collections:
+        return
+    db[name].create_index([("user_id", ASCENDING), ("start_time", DESCENDING)], name="user_start_time")
+    if HISTORY_RETENTION_DAYS > 0:
+        db[name].create_index([("end_time", ASCENDING)], name="end_time_ttl",
+                              expireAfterSeconds=HISTORY_RETENTION_DAYS * 86400)
+    _indexed_collections.add(name)
+    # 새로 만든 컬렉션일 수 있으므로 이 프로세스의 목록 캐시는 바로 비움
+    _history_cache.pop(db.name, None)
+
+
+# 존재하는 월별 기록 컬렉션 이름 (최신 월부터, HISTORY_COLLECTIONS_TTL_SECONDS 동안 캐시)
+def history_collections(db):
+    cached = _history_cache.get(db.name)
+    if cached is not None and time.monotonic() - cached[0] < HISTORY_COLLECTIONS_TTL_SECONDS:
+        return cached[1]
+    names = sorted((name for name in db.list_collection_names() if name.startswith(HISTORY_PREFIX)), reverse=True)
+    _history_cache[db.name] = (time.monotonic(), names)
+    return names
+
+
+# 오래된 예약을 월별 기록 컬렉션으로 옮기기 (배치마다 insert_many + delete_many) - 옮긴 문서 수 반환
+# 기록 컬렉션에 먼저 쓰고 나서 db.use에서 지우므로 중간에 멈춰도 데이터가 사라지지 않음
+# (이미 옮겨진 문서는 중복 _id로 건너뛰므로 중간에 실패한 배치를 다시 실행해도 안전)
+# keep_going: 배치마다 호출해서 False면 멈춤 (스케줄러가 리스를 연장하고, 잃었으면 중단)
+def archive_finished(db, now=None, after_days=ARCHIVE_AFTER_DAYS, batch_size=ARCHIVE_BATCH_SIZE, keep_going=None):
+    now = now or datetime.now()
+    cutoff = now - timedelta(days=after_days)
+    moved = 0
+    while True:
+        if keep_going is not None and not keep_going():
+            return moved
+        batch = list(db.use.find({"end_time": {"$lt": cutoff}}).sort("end_time", 1).limit(batch_size))
+        if not batch:
+            return moved
+
+        by_month = defaultdict(list)
+        for reservation in batch:
+            # 슬롯 유니크 인덱스는 db.use 전용이므로 기록에는 슬롯 키를 남기지 않음
+            reservation.pop("slots", None)
+            by_month[history_collection_name(reservation["start_time"])].append(reservation)
+        for name, documents in by_month.items():
+            ensure_history_indexes(db, name)
+            insert_many_ignoring_duplicates(db[name], documents)
+
+        db.use.delete_many({"_id": {"$in": [r["_id"] for r in batch]}})
+        moved += len(batch)
+        if len(batch) < batch_size:
+            return moved
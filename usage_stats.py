@@ -0,0 +1,153 @@
+import argparse
+import os
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+from pymongo import MongoClient, UpdateOne
+
+from availability import SLOT_MINUTES, covered_slots
+from schema import ensure_collection_indexes
+from tiering import history_collections
+
+# 기기 사용률 집계 (usage_daily 컬렉션)
+# - 기기 × 날짜마다 문서 하나: 시간대별 점유 슬롯 수(hours.HH), 예약 수, 예약 시간(분)
+# - 예약 / 취소 때 $inc로 바로 반영하므로 통계 조회에 db.use를 읽지 않음
+# - python usage_stats.py --rebuild : 예약 기록 전체로 다시 계산
+USAGE_COLLECTION = "usage_daily"
+REBUILD_BATCH_SIZE = int(os.getenv("USAGE_REBUILD_BATCH_SIZE", 5000))
+
+
+def _day(time):
+    return datetime(time.year, time.month, time.day)
+
+
+def usage_id(laundry_id, day):
+    return f"{laundry_id}:{day:%Y%m%d}"
+
+
+# 예약 하나가 날짜별로 차지하는 (시간대별 슬롯 수, 분) - 자정을 넘기는 예약은 날짜가 둘
+def reservation_usage(reservation):
+    by_day = defaultdict(lambda: defaultdict(int))
+    for day, slot in covered_slots(reservation["start_time"], reservation["end_time"]):
+        by_day[day][f"{slot * SLOT_MINUTES // 60:02d}"] += 1
+    return by_day
+
+
+# 예약 생성(sign=1) / 취소(sign=-1) 반영 (bulk_write 1회)
+def record_usage(db, reservation, sign=1):
+    minutes = int((reservation["end_time"] - reservation["start_time"]).total_seconds() // 60)
+    start_day = _day(reservation["start_time"])
+    requests = []
+    for day, hours in reservation_usage(reservation).items():
+        inc = {f"hours.{hour}": sign * count for hour, count in hours.items()}
+        if day == start_day:
+            inc.update(reservations=sign, minutes=sign * minutes)
+        requests.append(UpdateOne(
+            {"_id": usage_id(reservation["laundry_id"], day)},
+            {"$inc": inc, "$setOnInsert": {
+                "campus_id": reservation.get("campus_id"), "laundry_id": reservation["laundry_id"], "day": day,
+            }},
+            upsert=True,
+        ))
+    if requests:
+        db[USAGE_COLLECTION].bulk_write(requests, ordered=False)
+
+
+# 예약 기록(db.use + 월별 기록 컬렉션)으로 집계를 처음부터 다시 계산
+# 새 컬렉션에 모두 쓴 다음 이름을 바꿔서 교체하므로, 계산하는 동안에도 기존 통계를 조회할 수 있음
+# (다시 계산하는 동안 들어온 예약/취소는 반영되지 않으므로 한가한 시간에 실행)
+def rebuild_usage(db, batch_size=REBUILD_BATCH_SIZE):
+    docs = {}
+    projection = {"_id": 0, "campus_id": 1, "laundry_id": 1, "start_time": 1, "end_time": 1}
+    for name in ["use", *history_collections(db)]:
+        for reservation in db[name].find({}, projection).batch_size(batch_size):
+            start_day = _day(reservation["start_time"])
+            for day, hours in reservation_usage(reservation).items():
+                key = usage_id(reservation["laundry_id"], day)
+                doc = docs.get(key)
+                if doc is None:
+                    doc = docs[key] = {
+                        "_id": key, "campus_id": reservation.get("campus_id"),
+                        "laundry_id": reservation["laundry_id"], "day": day,
+                        "hours": {}, "reservations": 0, "minutes": 0,
+                    }
+                for hour, count in hours.items():
+                    doc["hours"][hour] = doc["hours"].get(hour, 0) + count
+                if day == start_day:
+                    doc["reservations"] += 1
+                    doc["minutes"] += int((reservation["end_time"] - reservation["start_time"]).total_seconds() // 60)
+
+    staging = db[f"{USAGE_COLLECTION}_rebuild"]
+    staging.drop()
+    values = list(docs.values())
+    for offset in range(0, len(values), batch_size):
+        staging.insert_many(values[offset:offset + batch_size], ordered=False)
+    if values:
+        staging.rename(USAGE_COLLECTION, dropTarget=True)
+    else:
+        db[USAGE_COLLECTION].delete_many({})
+    ensure_collection_indexes(db, USAGE_COLLECTION)
+    return len(values)
+
+
+# 사용률 히트맵 [start, end) - 집계 문서(기기 × 날짜)만 읽음
+# by="weekday": 요일(월=0) × 시간, by="laundry": 기기 × 시간, by="day": 날짜 × 시간
+# 값은 점유율 (점유된 슬롯 수 / 전체 슬롯 수)
+def usage_heatmap(db, campus_id, start, end, laundry_ids, by="weekday"):
+    slots_per_hour = 60 // SLOT_MINUTES
+    cursor = db[USAGE_COLLECTION].find(
+        {"campus_id": campus_id, "day": {"$gte": start, "$lt": end}},
+        {"_id": 0, "laundry_id": 1, "day": 1, "hours": 1},
+    )
+
+    rows = defaultdict(lambda: [0] * 24)
+    for doc in cursor:
+        if by == "weekday":
+            key = doc["day"].weekday()
+        elif by == "day":
+            key = doc["day"].strftime("%Y-%m-%d")
+        else:
+            key = str(doc["laundry_id"])
+        row = rows[key]
+        for hour, count in doc.get("hours", {}).items():
+            row[int(hour)] += count
+
+    # 점유율 분모: 요일별이면 (그 요일 수 × 기기 수), 날짜별이면 기기 수, 기기별이면 날짜 수
+    days = [start + timedelta(days=i) for i in range((end - start).days)]
+    if by == "weekday":
+        capacity = {w: sum(1 for d in days if d.weekday() == w) * len(laundry_ids) * slots_per_hour
+                    for w in range(7)}
+        keys = range(7)
+    elif by == "day":
+        keys = [d.strftime("%Y-%m-%d") for d in days]
+        capacity = {key: len(laundry_ids) * slots_per_hour for key in keys}
+    else:
+        capacity = {str(laundry_id): len(days) * slots_per_hour for laundry_id in laundry_ids}
+        keys = [str(laundry_id) for laundry_id in laundry_ids]
+
+    return {
+        str(key): [round(count / capacity[key], 4) if capacity[key] else 0.0 for count in rows[key]]
+        for key in keys
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="기기 사용률 집계")
+    parser.add_argument("--rebuild", action="store_true", help="예약 기록 전체로 다시 계산")
+    args = parser.parse_args()
+
+    load_dotenv()
+    client = MongoClient(os.getenv("MONGO_URI", "mongodb://localhost:27017/"))
+    db = client[os.getenv("MONGO_DB", "jungdry")]
+
+    ensure_collection_indexes(db, USAGE_COLLECTION)
+    if args.rebuild:
+        started = time.monotonic()
+        count = rebuild_usage(db)
+        print(f"사용률 집계 재계산 완료: {count}개 문서 ({time.monotonic() - started:.1f}초)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+import os
+import time
+from datetime import datetime, timedelta
+
+from bson.errors import InvalidId
+from bson.objectid import ObjectId
+from pymongo.errors import PyMongoError
+from redis.exceptions import RedisError
+
+from availability import SLOT_MINUTES, slot_duration, slot_keys
+from redis_service import redis_client
+from reservations import create_reservation
+
+# 예약 대기열 (Redis)
+# - (기기, 시작 시간)마다 정렬 집합 하나: 멤버는 사용자 _id, 점수는 등록 시각(ms) → 먼저 등록한 사람이 앞
+# - 사용자별 정렬 집합: 등록한 대기열 목록 (점수는 시작 시각, 지난 항목은 등록 때 정리)
+# - 예약이 취소되면 비게 된 시간과 겹치는 대기열의 맨 앞 사용자를 바로 예약으로 옮김
+#   맨 앞 꺼내기는 ZPOPMIN 한 번으로 처리하므로 같은 사용자가 두 번 꺼내지지 않고,
+#   예약 저장은 슬롯 유니크 인덱스가 막으므로 한 시간에 예약이 둘 생기지 않음
+WAITLIST_MAX_PER_USER = int(os.getenv("WAITLIST_MAX_PER_USER", 5))
+
+# 대기 등록 (이미 등록되어 있으면 그대로) - 반환: 0부터 시작하는 순번, 등록 수 초과면 -1
+# KEYS: 대기열, 사용자 목록 / ARGV: 사용자 _id, 등록 시각(ms), 대기열 항목, 시작 시각(초), 현재 시각(초), 최대 등록 수
+_JOIN_SCRIPT = redis_client.register_script("""
+local rank = redis.call('ZRANK', KEYS[1], ARGV[1])
+if rank then
+    return rank
+end
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', ARGV[5])
+if redis.call('ZCARD', KEYS[2]) >= tonumber(ARGV[6]) then
+    return -1
+end
+redis.call('ZADD', KEYS[1], ARGV[2], ARGV[1])
+redis.call('EXPIREAT', KEYS[1], ARGV[4])
+redis.call('ZADD', KEYS[2], ARGV[4], ARGV[3])
+redis.call('EXPIREAT', KEYS[2], redis.call('ZRANGE', KEYS[2], -1, -1, 'WITHSCORES')[2])
+return redis.call('ZRANK', KEYS[1], ARGV[1])
+""")
+
+def _stamp(start_time):
+    return f"{start_time:%Y%m%d%H%M}"
+
+
+def queue_entry(laundry_id, start_time):
+    return f"{laundry_id}:{_stamp(start_time)}"
+
+
+def queue_key(laundry_id, start_time):
+    return f"waitlist:{queue_entry(laundry_id, start_time)}"
+
+
+USER_KEY_PREFIX = "waitlist:user:"
+
+
+def user_key(user_id):
+    return f"{USER_KEY_PREFIX}{user_id}"
+
+
+# 대기 등록 → 1부터 시작하는 순번, 등록 수 초과면 None
+def join_waitlist(laundry_id, start_time, user_id, now=None):
+    now = now or datetime.now()
+    rank = _JOIN_SCRIPT(keys=[queue_key(laundry_id, start_time), user_key(user_id)], args=[
+        str(user_id), int(time.time() * 1000), queue_entry(laundry_id, start_time),
+        int(start_time.timestamp()), int(now.timestamp()), WAITLIST_MAX_PER_USER,
+    ])
+    return None if rank < 0 else rank + 1
+
+
+# 대기 취소
+def leave_waitlist(laundry_id, start_time, user_id):
+    pipe = redis_client.pipeline()
+    pipe.zrem(queue_key(laundry_id, start_time), str(user_id))
+    pipe.zrem(user_key(user_id), queue_entry(laundry_id, start_time))
+    pipe.execute()
+
+
+# 대기 등록 전 확인: 그 시간과 겹치는 예약을 가진 사용자 _id 집합 (비어 있으면 바로 예약 가능한 시간)
+# 누가 가졌는지 알아야 하므로 비트맵이 아니라 슬롯 인덱스로 MongoDB에서 확인
+def slot_holders(db, laundry, start_time):
+    end_time = start_time + slot_duration(laundry)
+    rows = db.use.find({"campus_id": laundry["campus_id"], "laundry_id": laundry["_id"],
+                        "slots": {"$in": slot_keys(start_time, end_time)}}, {"user_id": 1})
+    return {row["user_id"] for row in rows}
+
+
+# 내 대기 목록: [{laundry_id, start_time, position, size}] (시작 시간순, 파이프라인 2회)
+def get_user_waitlist(user_id, now=None):
+    now = now or datetime.now()
+    entries = redis_client.zrangebyscore(user_key(user_id), int(now.timestamp()), "+inf")
+    parsed = []
+    for entry in entries:
+        laundry_id, stamp = entry.decode().split(":", 1)
+        parsed.append((ObjectId(laundry_id), datetime.strptime(stamp, "%Y%m%d%H%M")))
+
+    pipe = redis_client.pipeline()
+    for laundry_id, start_time in parsed:
+        pipe.zrank(queue_key(laundry_id, start_time), str(user_id))
+        pipe.zcard(queue_key(laundry_id, start_time))
+    results = pipe.execute() if parsed else []
+
+    waitlist = []
+    for i, (laundry_id, start_time) in enumerate(parsed):
+        rank, size = results[i * 2], results[i * 2 + 1]
+        if rank is None:
+            continue
+        waitlist.append({"laundry_id": laundry_id, "start_time": start_time, "position": rank + 1, "size": size})
+    return waitlist
+
+
+def serialize_waitlist_entry(entry):
+    return {
+        "laundry_id": str(entry["laundry_id"]),
+        "start": entry["start_time"].strftime("%Y-%m-%dT%H:%M"),
+        "position": entry["position"],
+        "size": entry["size"],
+    }
+
+
+# 비게 된 시간 [start, end)와 겹치는 예약 시작 시간 후보 (지나간 시간 제외)
+def _candidate_starts(laundry, start_time, end_time, now):
+    duration = slot_duration(laundry)
+    step = timedelta(minutes=SLOT_MINUTES)
+    candidate = start_time - duration + step
+    starts = []
+    while candidate < end_time:
+        if candidate > now:
+            starts.append(candidate)
+        candidate += step
+    return starts
+
+
+# 대기열 맨 앞 사용자 꺼내기 (ZPOPMIN) 후 사용자 목록에서도 제거 - 반환: (사용자 _id, 등록 시각) 또는 None
+# 사용자 목록은 내 대기 목록 표시용이라 따로 지워도 됨 (대기열에 없는 항목은 목록에서 빠짐)
+def _pop_head(key, entry):
+    popped = redis_client.zpopmin(key)
+    if not popped:
+        return None
+    head = popped[0]
+    redis_client.zrem(user_key(head[0].decode()), entry)
+    return head
+
+
+# 예약을 취소한 사용자의, 그 시간과 겹치는 대기 등록 제거 (자기 예약을 기다리다가 취소하자마자 다시 예약되지 않도록)
+def leave_overlapping(laundry, start_time, end_time, user_id, now=None):
+    now = now or datetime.now()
+    starts = _candidate_starts(laundry, start_time, end_time, now)
+    if not starts:
+        return
+    pipe = redis_client.pipeline()
+    for candidate in starts:
+        pipe.zrem(queue_key(laundry["_id"], candidate), str(user_id))
+        pipe.zrem(user_key(user_id), queue_entry(laundry["_id"], candidate))
+    pipe.execute()
+
+
+# 꺼낸 사용자를 원래 등록 시각으로 대기열 맨 앞에 되돌림
+def _restore(key, entry, head, start_time):
+    pipe = redis_client.pipeline()
+    pipe.zadd(key, {head[0]: float(head[1])})
+    pipe.expireat(key, int(start_time.timestamp()))
+    pipe.zadd(user_key(head[0].decode()), {entry: int(start_time.timestamp())})
+    pipe.execute()
+
+
+# 취소로 비게 된 시간의 대기자를 예약으로 옮김 - 새로 만든 예약 목록 반환
+# 대기열마다 맨 앞 사용자를 꺼내서 예약을 저장하고, 그 사이 다른 예약이 먼저 들어왔으면
+# 꺼낸 사용자를 원래 순서(등록 시각)로 되돌림
+def promote_waiters(db, laundry, start_time, end_time, now=None):
+    now = now or datetime.now()
+    promoted = []
+    starts = _candidate_starts(laundry, start_time, end_time, now)
+    try:
+        pipe = redis_client.pipeline()
+        for candidate in starts:
+            pipe.exists(queue_key(laundry["_id"], candidate))
+        waiting = [candidate for candidate, exists in zip(starts, pipe.execute() if starts else []) if exists]
+
+        for candidate in waiting:
+            key = queue_key(laundry["_id"], candidate)
+            entry = queue_entry(laundry["_id"], candidate)
+            while True:
+                head = _pop_head(key, entry)
+                if not head:
+                    break
+                try:
+                    user_id = ObjectId(head[0].decode())
+                except InvalidId:
+                    continue
+                try:
+                    reservation = create_reservation(db, laundry["campus_id"], laundry["_id"], user_id,
+                                                     candidate, candidate + slot_duration(laundry))
+                except PyMongoError:
+                    _restore(key, entry, head, candidate)
+                    raise
+                if reservation is not None:
+                    promoted.append(reservation)
+                elif user_id in slot_holders(db, laundry, candidate):
+                    # 꺼낸 사용자가 겹치는 시간을 이미 예약해 둔 경우: 대기에서 빼고 다음 사용자로
+                    continue
+                else:
+                    # 시간이 이미 다시 찼으면 순서를 되돌리고 다음 대기열로
+                    _restore(key, entry, head, candidate)
+                break
+    except (RedisError, PyMongoError) as e:
+        print(f"대기자 예약 처리 실패 ({laundry['_id']}): {e}")
+    return promoted